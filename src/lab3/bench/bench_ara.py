@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# How ARA* uses its budget: for each budget, how long the call actually took, whether it got to the goal, the
+#   suboptimality bound it reported, and what the path really cost against the optimal one from A*. On the stage
+#   worlds that can be rasterized, on big fully explored rooms and on random mazes, with the start and goal as far
+#   apart as they get. Mazes are the worst case: the heuristic points the wrong way most of the time, so a higher
+#   weight doesn't make the first search much faster.
+#
+#   python3 bench_ara.py --budgets 0.01 0.05 0.2 1.0 --rooms 1500 --mazes 1024 2048
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ara_star import ara_star
+from bench_jps import far_apart, path_cost
+from costmap import Costmap
+from grid_search import astar
+from maps import load_world, make_maze, make_rooms
+
+
+WORLDS = ["closed_maze", "house_closed"]
+
+
+def bench(name, im, resolution, budgets, weight, repeats):
+    passable = Costmap(im, resolution).planning_passable
+    start, goal = far_apart(passable)
+    t0 = time.perf_counter()
+    optimal = astar(passable, start, goal)
+    astar_seconds = time.perf_counter() - t0
+    best = path_cost(optimal.path)
+
+    rows = []
+    for budget in budgets:
+        seconds = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = ara_star(passable, start, goal, budget=budget, weight=weight)
+            seconds.append(time.perf_counter() - t0)
+        rows.append({"budget": budget, "max_seconds": max(seconds), "mean_seconds": sum(seconds) / len(seconds),
+                     "reached": bool(result.reached), "bound": result.bound, "weight": result.weight,
+                     "iterations": result.iterations, "expansions": result.expansions,
+                     "cost_ratio": path_cost(result.path) / best if result.reached else None})
+    return {"map": name, "shape": list(passable.shape), "astar_seconds": astar_seconds,
+            "astar_expansions": optimal.expansions, "budgets": rows}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time taken and suboptimality of ARA* against its budget")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.01, 0.05, 0.2, 1.0], help="seconds")
+    parser.add_argument("--rooms", type=int, nargs="*", default=[1500], help="sizes of random rooms")
+    parser.add_argument("--mazes", type=int, nargs="*", default=[1024, 2048], help="sizes of random mazes")
+    parser.add_argument("--weight", type=float, default=3.0, help="heuristic weight of the first search")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    maps = [(world, load_world(world, args.resolution)[0]) for world in WORLDS]
+    maps += [(f"rooms_{size}", make_rooms(size, known_fraction=1.0)[0]) for size in args.rooms]
+    maps += [(f"maze_{size}", make_maze(size)[0]) for size in args.mazes]
+    results = [bench(name, im, args.resolution, args.budgets, args.weight, args.repeats) for name, im in maps]
+
+    print(f"{'map':>14} {'A* s':>8} {'budget':>7} {'max s':>8} {'reached':>8} {'bound':>6} {'cost':>6} {'searches':>9}")
+    for r in results:
+        for row in r["budgets"]:
+            cost = f"{row['cost_ratio']:.3f}" if row["cost_ratio"] is not None else "-"
+            print(f"{r['map']:>14} {r['astar_seconds']:>8.3f} {row['budget']:>7.3f} {row['max_seconds']:>8.4f} "
+                  f"{str(row['reached']):>8} {row['bound']:>6.2f} {cost:>6} {row['iterations']:>9}")
+    if args.json:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# Compares the array-backed A* in grid_search against the original dictionary-based search from
+#   path_planning.dijkstra, on synthetic maps with the same layout gmapping gives us: a big grid that is mostly
+#   unseen, with a known region of rooms in the middle.
+#
+# Run from anywhere:
+#   python3 bench_astar.py --sizes 500 1000 2000 4000
+#
+# Prints a table, and with --json also the raw numbers.
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.ndimage import convolve
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from grid_search import astar
+from maps import make_rooms
+
+
+def legacy_is_free(im, pix):
+    """ The original path_planning.is_free"""
+    if not isinstance(pix, tuple) or len(pix) != 2:
+        raise ValueError(f"Invalid pixel coordinate: {pix}")
+    pix = (int(pix[0]), int(pix[1]))
+    if not (0 <= pix[1] < im.shape[0] and 0 <= pix[0] < im.shape[1]):
+        raise IndexError(f"Pixel {pix} is out of bounds for image shape {im.shape}")
+    if im[pix[1], pix[0]] == 255:
+        return True
+    return False
+
+
+def legacy_search(im, free_areas, robot_loc, goal_loc):
+    """ The search loop of the original path_planning.dijkstra, minus the logging and plotting
+    @return path as a list of pixels, number of expansions"""
+    priority_queue = []
+    heapq.heappush(priority_queue, (0, robot_loc))
+    visited = {robot_loc: (0, None, False)}
+    expansions = 0
+    while priority_queue:
+        node_ij = heapq.heappop(priority_queue)[1]
+        visited_distance, visited_parent, visited_closed_yn = visited[node_ij]
+        if node_ij == goal_loc:
+            break
+        if visited_closed_yn:
+            continue
+        visited[node_ij] = (visited_distance, visited_parent, True)
+        expansions += 1
+        for di in [-1, 0, 1]:
+            for dj in [-1, 0, 1]:
+                if di == 0 and dj == 0:
+                    continue
+                neighbor = (node_ij[0] + di, node_ij[1] + dj)
+                if not legacy_is_free(im, neighbor):
+                    continue
+                if not free_areas[neighbor[1], neighbor[0]]:
+                    continue
+                distance = np.linalg.norm((di, dj)) + visited_distance
+                heuristic = np.linalg.norm((neighbor[0] - goal_loc[0], neighbor[1] - goal_loc[1]))
+                if neighbor not in visited or distance < visited[neighbor][0]:
+                    visited[neighbor] = (distance, node_ij, False)
+                    heapq.heappush(priority_queue, (distance + heuristic, neighbor))
+
+    path = []
+    current = goal_loc if goal_loc in visited else robot_loc
+    while current is not None:
+        path.insert(0, current)
+        current = visited[current][1]
+    return path, expansions
+
+
+def inflate(im, resolution):
+    """ The same inflation dijkstra does"""
+    robot_height_in_pixels = int(0.44 / resolution * 1.5)
+    kernel = np.ones((robot_height_in_pixels, robot_height_in_pixels))
+    return convolve(im == 0, kernel, mode='constant', cval=1) == 0
+
+
+def measure(fn):
+    """ Run fn twice, once for the wall clock time and once under tracemalloc for the peak memory (tracemalloc
+    slows down every allocation, so the two can't be measured in the same run)
+    @return result, seconds, peak bytes"""
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(sizes, resolution, skip_legacy_above):
+    rows = []
+    for size in sizes:
+        im, start, goal = make_rooms(size)
+        free_areas = inflate(im, resolution)
+        passable = (im == 255) & free_areas
+
+        result, t_new, mem_new = measure(lambda: astar(passable, start, goal))
+        row = {"size": size, "new": {"seconds": t_new, "expansions": result.expansions,
+                                     "expansions_per_sec": result.expansions / t_new, "peak_mb": mem_new / 1e6,
+                                     "path_length": len(result.path), "reached": bool(result.reached)}}
+
+        if size <= skip_legacy_above:
+            (path, expansions), t_old, mem_old = measure(lambda: legacy_search(im, free_areas, start, goal))
+            row["legacy"] = {"seconds": t_old, "expansions": expansions,
+                             "expansions_per_sec": expansions / t_old, "peak_mb": mem_old / 1e6,
+                             "path_length": len(path)}
+        rows.append(row)
+    return rows
+
+
+def print_table(rows):
+    print(f"{'size':>6} {'impl':>7} {'seconds':>9} {'expansions':>11} {'exp/sec':>10} {'peak MB':>9} {'path':>6}")
+    for row in rows:
+        for impl in ("legacy", "new"):
+            if impl not in row:
+                continue
+            r = row[impl]
+            print(f"{row['size']:>6} {impl:>7} {r['seconds']:>9.3f} {r['expansions']:>11} "
+                  f"{r['expansions_per_sec']:>10.0f} {r['peak_mb']:>9.1f} {r['path_length']:>6}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the grid A* against the original dijkstra")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--skip-legacy-above", type=int, default=4000,
+                        help="don't run the original search on maps bigger than this")
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.resolution, args.skip_legacy_above)
+    print_table(rows)
+    if args.json:
+        print(json.dumps(rows, indent=2))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# Bidirectional A* against A*, for far away goals that can be reached and for goals in a closed off pocket (like
+#   a frontier point seen through a gap the robot doesn't fit through), which A* only gives up on after flooding
+#   everything the robot can get to.
+#
+#   python3 bench_bidirectional.py --size 4000
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_jps import path_cost
+from bidirectional import bidirectional_astar
+from costmap import Costmap
+from grid_search import astar
+from maps import make_maze, make_rooms
+
+
+PLANNERS = {"astar": astar, "bidirectional": bidirectional_astar}
+
+
+def wall_in(im, goal, inside=20, wall=10):
+    """ Copy of im with a closed box of walls around the goal"""
+    im = im.copy()
+    x, y = goal
+    outside = inside + wall
+    im[y - outside:y + outside, x - outside:x + outside] = 0
+    im[y - inside:y + inside, x - inside:x + inside] = 255
+    return im
+
+
+def bench(name, im, resolution, start, goal):
+    passable = Costmap(im, resolution).planning_passable
+    row = {"map": name}
+    for planner, fn in PLANNERS.items():
+        t0 = time.perf_counter()
+        result = fn(passable, start, goal)
+        row[planner] = {"seconds": time.perf_counter() - t0, "expansions": result.expansions,
+                        "reached": bool(result.reached), "cost": path_cost(result.path) if result.reached else None}
+    return row
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bidirectional A* against A*")
+    parser.add_argument("--size", type=int, default=4000)
+    parser.add_argument("--maze", type=int, default=2000)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for name, (im, start, goal) in ((f"rooms_{args.size}", make_rooms(args.size, known_fraction=0.5)),
+                                    (f"maze_{args.maze}", make_maze(args.maze))):
+        rows.append(bench(name, im, args.resolution, start, goal))
+        rows.append(bench(name + "_walled", wall_in(im, goal), args.resolution, start, goal))
+
+    print(f"{'map':>18} {'planner':>13} {'seconds':>9} {'expansions':>11} {'reached':>8} {'cost':>9}")
+    for row in rows:
+        for planner in PLANNERS:
+            r = row[planner]
+            cost = f"{r['cost']:>9.1f}" if r["cost"] is not None else f"{'-':>9}"
+            print(f"{row['map']:>18} {planner:>13} {r['seconds']:>9.3f} {r['expansions']:>11} {str(r['reached']):>8} "
+                  f"{cost}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Goal selection with one cost field against planning to the closest few frontier points in parallel
+#   (candidate_pool.CandidatePool), on the same maps as bench_suite.py. Explorer.update is timed from start to end,
+#   and the length of the path it picks is compared, since the pool only looks at the closest few points and the
+#   cost field looks at all of them. The pool is started before the timing, the way the controller keeps it warm.
+#
+#   python3 bench_candidates.py --candidates 2 4 8 --workers 3
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_suite import MAZE_SIZES, load_maps
+from candidate_pool import CandidatePool, path_length
+from planning_core import Explorer
+
+
+def run(explorer, m, repeats):
+    resolution = m["info"]["resolution"]
+    origin = tuple(m["info"]["origin"][:2])
+    seconds = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        # A new version each time, so nothing is cached between repeats
+        step = explorer.update(m["data"], m["robot"], resolution, origin, version=(m["name"], i))
+        seconds.append(time.perf_counter() - t0)
+    if step is None:
+        return {"seconds": float(np.median(seconds)), "goal": None, "meters": None}
+    meters = path_length(np.asarray(step.path) / resolution) * resolution
+    return {"seconds": float(np.median(seconds)), "goal": list(step.goal), "meters": meters}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cost field goal selection against parallel candidate planning")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[2, 4, 8], help="how many to plan to")
+    parser.add_argument("--workers", type=int, default=None, help="processes, one less than the cores if not given")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds for each candidate's search")
+    parser.add_argument("--sizes", type=int, nargs="*", default=MAZE_SIZES[:2], help="random maze sizes")
+    parser.add_argument("--explored", type=float, default=0.6,
+                        help="for rasterized maps, how much is seen, as a radius in fractions of the map size")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    pool = CandidatePool(workers=args.workers, budget=args.budget)
+    results = []
+    for m in load_maps(args):
+        if m["source"] == "skipped":
+            continue
+        row = {"map": m["name"], "workers": pool.workers, "field": run(Explorer(), m, args.repeats)}
+        for k in args.candidates:
+            row[f"pool_{k}"] = run(Explorer(candidate_pool=pool, candidates=k), m, args.repeats)
+        results.append(row)
+    pool.close()
+
+    print(f"{'map':>14} {'method':>9} {'seconds':>8} {'meters':>8}")
+    for row in results:
+        for method, r in row.items():
+            if isinstance(r, dict):
+                meters = f"{r['meters']:.2f}" if r["meters"] is not None else "-"
+                print(f"{row['map']:>14} {method:>9} {r['seconds']:>8.3f} {meters:>8}")
+    print(f"pool: {pool.calls} calls, {pool.planned} planned, {pool.failed} failed, {pool.cancelled} cancelled, "
+          f"{pool.timed_out} timed out")
+    if args.json:
+        print(json.dumps(results, indent=2))
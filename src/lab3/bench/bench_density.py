@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Counting the unseen map around frontier points with a summed area table (density.UnseenDensity) against the
+#   circular kernel convolution find_highest_concentration_point used to do on every call, on the same maps as
+#   bench_suite.py. The table is built once per map and then queried at every radius; the convolution is done again
+#   for each radius. Also how far the strip disks are from the exact circle.
+#
+#   python3 bench_density.py --radii 0.25 0.5 1.0 2.0
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.ndimage import convolve
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_suite import MAZE_SIZES, load_maps
+from density import UnseenDensity
+
+
+def convolution(im, points, radius_pixels):
+    """ The old way: unseen pixels under a circular kernel, for the whole image. Timed with the areas, which the old
+    way didn't do, so this is a little slower than it was"""
+    y, x = np.ogrid[-radius_pixels:radius_pixels + 1, -radius_pixels:radius_pixels + 1]
+    kernel = (x * x + y * y <= radius_pixels * radius_pixels).astype(float)
+    counts = convolve((im == 128).astype(float), kernel, mode='constant', cval=0.0)
+    # Out of the pixels of the disk that are on the image, the same as the table
+    areas = convolve(np.ones(im.shape), kernel, mode='constant', cval=0.0)
+    return counts[points[:, 1], points[:, 0]] / areas[points[:, 1], points[:, 0]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summed area table against convolution for unseen density")
+    parser.add_argument("--radii", type=float, nargs="+", default=[0.25, 0.5, 1.0, 2.0], help="in meters")
+    parser.add_argument("--candidates", type=int, default=300, help="points to query")
+    parser.add_argument("--sizes", type=int, nargs="*", default=MAZE_SIZES[:2], help="random maze sizes")
+    parser.add_argument("--explored", type=float, default=0.6,
+                        help="for rasterized maps, how much is seen, as a radius in fractions of the map size")
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for m in load_maps(args):
+        if m["source"] == "skipped":
+            continue
+        im = np.where(m["data"] == -1, 128, np.where(m["data"] == 0, 255, 0)).astype(np.uint8)
+        free = np.argwhere(m["data"] == 0)[:, ::-1]
+        points = free[np.linspace(0, len(free) - 1, args.candidates).astype(np.intp)]
+
+        t0 = time.perf_counter()
+        density = UnseenDensity(im)
+        row = {"map": m["name"], "shape": list(im.shape), "build": time.perf_counter() - t0, "radii": []}
+        for radius in args.radii:
+            radius_pixels = int(radius / args.resolution)
+            t0 = time.perf_counter()
+            exact = convolution(im, points, radius_pixels)
+            t1 = time.perf_counter()
+            box = density.box(points, radius_pixels)
+            t2 = time.perf_counter()
+            disk = density.disk(points, radius_pixels)
+            t3 = time.perf_counter()
+            row["radii"].append({"radius": radius, "convolution": t1 - t0, "box": t2 - t1, "disk": t3 - t2,
+                                 "disk_error": float(np.abs(disk - exact).max()),
+                                 "same_best": bool(np.argmax(disk) == np.argmax(exact))})
+        results.append(row)
+
+    print(f"{'map':>14} {'radius':>6} {'conv ms':>9} {'box ms':>7} {'disk ms':>8} {'disk err':>9} {'same':>5}")
+    for row in results:
+        for r in row["radii"]:
+            print(f"{row['map']:>14} {r['radius']:>6.2f} {r['convolution'] * 1000:>9.2f} {r['box'] * 1000:>7.3f} "
+                  f"{r['disk'] * 1000:>8.3f} {r['disk_error']:>9.3f} {str(r['same_best']):>5}")
+        print(f"{row['map']:>14} table for {tuple(row['shape'])}: {row['build'] * 1000:.2f} ms")
+    if args.json:
+        print(json.dumps(results, indent=2))
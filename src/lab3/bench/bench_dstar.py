@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# Replanning latency after small map updates: D* Lite repairing its last search, against a fresh A* every time.
+#   Each update moves the robot a few pixels along its path and changes the map a little:
+#     noise    - a few small obstacles appear or disappear anywhere in the known area, which is most of what
+#                consecutive gmapping maps look like
+#     blocking - one small obstacle lands right next to the current path, so the route has to change
+#
+#   python3 bench_dstar.py --sizes 1000 2000 --updates 20
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from costmap import Costmap
+from dstar_lite import DStarLite
+from grid_search import astar
+from maps import make_rooms
+
+
+def change_map(im, path, scenario, rng):
+    """ A copy of the map with a small change, see the top of this file"""
+    im = im.copy()
+    if scenario == "blocking":
+        x, y = path[rng.integers(len(path) // 2, len(path))] + rng.integers(-15, 16, 2)
+        im[y:y + 3, x:x + 3] = 0
+        return im
+    known = np.argwhere(im != 128)
+    for y, x in known[rng.integers(len(known), size=5)]:
+        im[y:y + 2, x:x + 2] = 255 if im[y, x] == 0 else 0
+    return im
+
+
+def run(size, updates, resolution, scenario, seed=0):
+    rng = np.random.default_rng(seed)
+    im, start, goal = make_rooms(size, known_fraction=0.5)
+    planner = DStarLite()
+
+    passable = Costmap(im, resolution).planning_passable
+    t0 = time.perf_counter()
+    result = planner.plan(passable, start, goal)
+    first = time.perf_counter() - t0
+
+    repair_times = []
+    astar_times = []
+    for _ in range(updates):
+        # Drive a little way along the path, and see a new obstacle somewhere near it
+        path = result.path
+        start = tuple(int(v) for v in path[min(5, len(path) - 1)])
+        im = change_map(im, path, scenario, rng)
+        im[goal[1], goal[0]] = 255
+        passable = Costmap(im, resolution).planning_passable
+
+        t0 = time.perf_counter()
+        result = planner.plan(passable, start, goal)
+        repair_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        reference = astar(passable, start, goal)
+        astar_times.append(time.perf_counter() - t0)
+        assert result.reached == reference.reached
+
+    return {"size": size, "scenario": scenario, "first_search": first,
+            "repair_median": float(np.median(repair_times)), "repair_max": float(np.max(repair_times)),
+            "astar_median": float(np.median(astar_times)), "astar_max": float(np.max(astar_times)),
+            "full_searches": planner.full_searches, "repairs": planner.repairs}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="D* Lite replanning against fresh A* searches")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000])
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    rows = [run(size, args.updates, args.resolution, scenario) for scenario in ("noise", "blocking")
+            for size in args.sizes]
+    print(f"{'size':>6} {'scenario':>9} {'first':>8} {'repair med':>11} {'repair max':>11} {'A* med':>8} {'A* max':>8} "
+          f"{'speedup':>8}")
+    for r in rows:
+        print(f"{r['size']:>6} {r['scenario']:>9} {r['first_search']:>8.3f} {r['repair_median']:>11.4f} "
+              f"{r['repair_max']:>11.4f} "
+              f"{r['astar_median']:>8.3f} {r['astar_max']:>8.3f} {r['astar_median'] / r['repair_median']:>7.1f}x")
+    if args.json:
+        print(json.dumps(rows, indent=2))
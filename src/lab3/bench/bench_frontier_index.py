@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# Incremental frontier updates (frontier_index.FrontierIndex) against finding the frontier from scratch, on a fake
+#   exploration run: a big map of rooms inside a gmapping sized grid, seen a disk at a time along a line, the way the
+#   laser uncovers it. The index only looks inside the laser window around the last two positions. Every step checks
+#   that the incremental mask is the same as the one from scratch. The threshold and costmap, which the Explorer
+#   still does on the whole known region for every version, are timed too for comparison.
+#
+#   python3 bench_frontier_index.py --steps 40 --size 2000
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from costmap import Costmap
+from frontier_index import FrontierIndex, frontier_mask, laser_window
+from known_region import inflation_margin, known_region
+from maps import make_rooms, to_occupancy
+from planning_core import convert_image
+
+
+def run(size, grid, steps, radius, stride, resolution):
+    full, _, _ = make_rooms(size, known_fraction=1.0)
+    data = np.full((grid, grid), -1, dtype=np.int8)
+    offset = (grid - size) // 2
+    y, x = np.ogrid[:size, :size]
+    seen = np.zeros((size, size), dtype=bool)
+    index = FrontierIndex()
+    rows = []
+    last = None
+    for step in range(steps):
+        center = (size // 2 - steps * stride // 2 + step * stride, size // 2)
+        seen |= (x - center[0]) ** 2 + (y - center[1]) ** 2 <= radius ** 2
+        im = np.where(seen, full, 128).astype(np.uint8)
+        data[offset:offset + size, offset:offset + size] = to_occupancy(im)
+
+        t0 = time.perf_counter()
+        region = known_region(data, inflation_margin(resolution))
+        im_thresh = convert_image(region.crop(data), wall_threshold=0.8, free_threshold=0.2)
+        costmap = Costmap(im_thresh, resolution)
+        costmap.frontier_free_areas
+        t1 = time.perf_counter()
+
+        robot = (center[0] + offset, center[1] + offset)
+        window = None if last is None else laser_window((last, robot), radius * resolution, resolution, data.shape)
+        last = robot
+        t2 = time.perf_counter()
+        scratch = frontier_mask(im_thresh, costmap.frontier_free_areas)
+        t3 = time.perf_counter()
+        mask = index.update(data, region, im_thresh, costmap, (0.0, 0.0), resolution, window)
+        t4 = time.perf_counter()
+        if not np.array_equal(mask, scratch):
+            raise AssertionError(f"incremental frontier differs from scratch at step {step}")
+        rows.append({"step": step, "region": list(region.shape), "costmap": t1 - t0, "scratch": t3 - t2,
+                     "incremental": t4 - t3})
+    return {"size": size, "grid": grid, "steps": rows, "rebuilds": index.rebuilds, "updates": index.updates,
+            "pixels_updated": index.pixels_updated, "mask_bytes": index.mask.nbytes, "grid_bytes": data.size}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Incremental frontier updates against from scratch")
+    parser.add_argument("--size", type=int, default=2000, help="side of the map of rooms, in pixels")
+    parser.add_argument("--grid", type=int, default=4000, help="side of the gmapping grid it sits in")
+    parser.add_argument("--steps", type=int, default=40)
+    parser.add_argument("--radius", type=int, default=150, help="pixels seen around each position")
+    parser.add_argument("--stride", type=int, default=20, help="pixels moved between map updates")
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    np.seterr(divide="ignore", invalid="ignore")   # convert_image divides by the max, which is 0 on unseen crops
+    result = run(args.size, args.grid, args.steps, args.radius, args.stride, args.resolution)
+    updates = result["steps"][1:]
+    print(f"{'region':>12} {'costmap ms':>11} {'scratch ms':>11} {'incremental ms':>15}")
+    for row in updates[::max(len(updates) // 10, 1)]:
+        print(f"{str(tuple(row['region'])):>12} {row['costmap'] * 1000:>11.2f} {row['scratch'] * 1000:>11.2f} "
+              f"{row['incremental'] * 1000:>15.2f}")
+    print(f"mean: scratch {np.mean([r['scratch'] for r in updates]) * 1000:.2f} ms, incremental "
+          f"{np.mean([r['incremental'] for r in updates]) * 1000:.2f} ms, {result['rebuilds']} rebuilds, "
+          f"{result['pixels_updated'] / max(result['updates'], 1):.0f} pixels redone per update")
+    print(f"mask: {result['mask_bytes'] / 1e6:.2f} MB for the known region, the grid is {result['grid_bytes'] / 1e6:.2f} MB")
+    if args.json:
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# Long range queries with the hierarchical planner against a fresh A*, on three maps: the rasterized house_closed
+#   world in the middle of a gmapping sized (mostly unseen) image, a block of rooms covering half of such an image,
+#   and a big random maze. For each map this times building the entrance graph, a query on the built graph, and
+#   the rebuild after a small obstacle appears on the path.
+#
+#   python3 bench_hierarchical.py --size 4000
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_jps import far_apart, path_cost
+from costmap import Costmap
+from grid_search import astar
+from hierarchical import HierarchicalPlanner
+from maps import load_world, make_maze, make_rooms
+
+
+def in_gmapping_map(im, size):
+    """ A size x size unseen image with im in the middle of it"""
+    big = np.full((size, size), 128, dtype=np.uint8)
+    lo_y = (size - im.shape[0]) // 2
+    lo_x = (size - im.shape[1]) // 2
+    big[lo_y:lo_y + im.shape[0], lo_x:lo_x + im.shape[1]] = im
+    return big
+
+
+def bench(name, im, resolution, cluster_size, start=None, goal=None):
+    passable = Costmap(im, resolution).planning_passable
+    if start is None:
+        start, goal = far_apart(passable)
+    planner = HierarchicalPlanner(cluster_size)
+
+    t0 = time.perf_counter()
+    planner.plan(passable, start, goal)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = planner.plan(passable, start, goal)
+    query = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    reference = astar(passable, start, goal)
+    astar_time = time.perf_counter() - t0
+
+    # Something shows up in the middle of the path
+    im = im.copy()
+    x, y = reference.path[len(reference.path) // 2]
+    im[y - 2:y + 3, x - 2:x + 3] = 0
+    passable = Costmap(im, resolution).planning_passable
+    t0 = time.perf_counter()
+    planner.plan(passable, start, goal)
+    update = time.perf_counter() - t0
+
+    return {"map": name, "shape": list(im.shape), "build": build, "query": query, "update": update,
+            "clusters_rebuilt": planner.clusters_rebuilt, "astar": astar_time,
+            "expansions": result.expansions, "astar_expansions": reference.expansions,
+            "cost_ratio": path_cost(result.path) / path_cost(reference.path)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Hierarchical planner against A*")
+    parser.add_argument("--size", type=int, default=4000, help="side of the gmapping image the world is put in")
+    parser.add_argument("--maze", type=int, default=2000)
+    parser.add_argument("--cluster-size", type=int, default=48)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    house, _ = load_world("house_closed", args.resolution)
+    rows = [bench("house_closed", in_gmapping_map(house, args.size), args.resolution, args.cluster_size)]
+    im, start, goal = make_rooms(args.size, known_fraction=0.5)
+    rows.append(bench(f"rooms_{args.size}", im, args.resolution, args.cluster_size, start, goal))
+    im, start, goal = make_maze(args.maze)
+    rows.append(bench(f"maze_{args.maze}", im, args.resolution, args.cluster_size, start, goal))
+
+    print(f"{'map':>14} {'build':>7} {'query':>7} {'update':>7} {'A*':>7} {'expansions':>11} {'A* exp':>8} "
+          f"{'cost':>6}")
+    for r in rows:
+        print(f"{r['map']:>14} {r['build']:>7.3f} {r['query']:>7.3f} {r['update']:>7.3f} {r['astar']:>7.3f} "
+              f"{r['expansions']:>11} {r['astar_expansions']:>8} {r['cost_ratio']:>6.3f}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
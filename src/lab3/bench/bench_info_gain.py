@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# Picking the cheapest frontier point against picking by information gain (info_gain.InformationGain), on the same
+#   maps as bench_suite.py. For each map: how long Explorer.update takes, how far away the goal is, and how much
+#   unseen map the laser would see from it (the same raycast for both, so they can be compared). Also how long the
+#   raycasts take for --candidates points on their own.
+#
+#   python3 bench_info_gain.py --distance-weights 0.1 0.2 0.5
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_suite import MAZE_SIZES, load_maps
+from candidate_pool import path_length
+from info_gain import InformationGain
+from planning_core import Explorer
+
+
+def run(explorer, m, gain, repeats):
+    resolution = m["info"]["resolution"]
+    origin = tuple(m["info"]["origin"][:2])
+    seconds = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        step = explorer.update(m["data"], m["robot"], resolution, origin, version=(m["name"], i))
+        seconds.append(time.perf_counter() - t0)
+    if step is None:
+        return {"seconds": float(np.median(seconds)), "goal": None}
+    local = step.region.to_local(step.goal)
+    return {"seconds": float(np.median(seconds)), "goal": list(step.goal),
+            "meters": path_length(np.asarray(step.path) / resolution) * resolution,
+            "gain": float(gain.gains(step.im, resolution, [local])[0])}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cheapest frontier point against information gain")
+    parser.add_argument("--distance-weights", type=float, nargs="+", default=[0.1, 0.2, 0.5],
+                        help="per meter fall off of the score with the path cost")
+    parser.add_argument("--candidates", type=int, default=300, help="points to time the raycasts on")
+    parser.add_argument("--sizes", type=int, nargs="*", default=MAZE_SIZES[:2], help="random maze sizes")
+    parser.add_argument("--explored", type=float, default=0.6,
+                        help="for rasterized maps, how much is seen, as a radius in fractions of the map size")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    gain = InformationGain()
+    results = []
+    for m in load_maps(args):
+        if m["source"] == "skipped":
+            continue
+        row = {"map": m["name"], "cheapest": run(Explorer(), m, gain, args.repeats)}
+        for weight in args.distance_weights:
+            row[f"gain_{weight:g}"] = run(Explorer(information_gain=InformationGain(distance_weight=weight)), m,
+                                          gain, args.repeats)
+        free = np.argwhere(m["data"] == 0)[:, ::-1]
+        points = free[np.linspace(0, len(free) - 1, args.candidates).astype(np.intp)]
+        im = np.where(m["data"] == -1, 128, np.where(m["data"] == 0, 255, 0)).astype(np.uint8)
+        t0 = time.perf_counter()
+        gain.gains(im, args.resolution, points)
+        row["raycast_seconds"] = time.perf_counter() - t0
+        results.append(row)
+
+    print(f"{'map':>14} {'method':>9} {'seconds':>8} {'meters':>7} {'gain m^2':>9}")
+    for row in results:
+        for method, r in row.items():
+            if isinstance(r, dict):
+                if r["goal"] is None:
+                    print(f"{row['map']:>14} {method:>9} {r['seconds']:>8.3f} {'-':>7} {'-':>9}")
+                else:
+                    print(f"{row['map']:>14} {method:>9} {r['seconds']:>8.3f} {r['meters']:>7.2f} {r['gain']:>9.1f}")
+        print(f"{row['map']:>14} raycasts for {args.candidates} points: {row['raycast_seconds'] * 1000:.1f} ms")
+    if args.json:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# Expansion counts and wall clock time for the A* and JPS planners, on the stage_osu worlds that can be
+#   rasterized (see maps.load_world) and on random mazes with long corridors.
+#
+#   python3 bench_jps.py --mazes 1000 2000
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.ndimage import label
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from costmap import Costmap
+from grid_search import astar
+from jump_point import jump_point_search
+from maps import load_world, make_maze
+
+
+WORLDS = ["closed_maze", "house_closed", "willow_closed"]
+PLANNERS = {"astar": astar, "jps": jump_point_search}
+
+
+def far_apart(passable):
+    """ Start and goal in the biggest connected piece of free space, as far apart as possible from its lower
+    left corner"""
+    labels, count = label(passable, structure=np.ones((3, 3)))
+    biggest = np.argmax(np.bincount(labels.ravel())[1:]) + 1
+    cells = np.argwhere(labels == biggest)[:, ::-1]
+    start = cells[np.argmin(cells.sum(axis=1))]
+    goal = cells[np.argmax(np.hypot(*(cells - start).T))]
+    return tuple(int(v) for v in start), tuple(int(v) for v in goal)
+
+
+def path_cost(path):
+    steps = np.abs(np.diff(path, axis=0)).sum(axis=1)
+    return float(np.where(steps == 2, np.sqrt(2), 1.0).sum())
+
+
+def bench(name, im, resolution, start=None, goal=None, repeats=3):
+    passable = Costmap(im, resolution).planning_passable
+    if start is None:
+        start, goal = far_apart(passable)
+    row = {"map": name, "shape": list(im.shape), "start": start, "goal": goal}
+    for planner, fn in PLANNERS.items():
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = fn(passable, start, goal)
+            times.append(time.perf_counter() - t0)
+        row[planner] = {"seconds": min(times), "expansions": result.expansions, "reached": bool(result.reached),
+                        "cost": path_cost(result.path)}
+    return row
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare A* and JPS")
+    parser.add_argument("--mazes", type=int, nargs="*", default=[1000, 2000])
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for world in WORLDS:
+        im, info = load_world(world, args.resolution)
+        if not (im == 255).any():
+            print(f"{world}: nothing to plan in, skipped geometry {info['skipped']}")
+            continue
+        rows.append(bench(world, im, args.resolution))
+    for size in args.mazes:
+        im, start, goal = make_maze(size)
+        rows.append(bench(f"maze_{size}", im, args.resolution, start, goal))
+
+    print(f"{'map':>14} {'planner':>7} {'seconds':>9} {'expansions':>11} {'cost':>9}")
+    for row in rows:
+        for planner in PLANNERS:
+            r = row[planner]
+            print(f"{row['map']:>14} {planner:>7} {r['seconds']:>9.4f} {r['expansions']:>11} {r['cost']:>9.1f}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
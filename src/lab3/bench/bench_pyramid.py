@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# Coarse to fine planning (pyramid.coarse_to_fine) against full resolution A*, and frontier finding on the coarse
+#   levels against the full resolution one. Path quality is the cost of the path over the optimal A* cost.
+#
+#   python3 bench_pyramid.py --size 4000
+
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_hierarchical import in_gmapping_map
+from bench_jps import far_apart, path_cost
+from costmap import Costmap
+from exploring import find_all_possible_goals
+from grid_search import astar
+from maps import load_world, make_maze, make_rooms
+from pyramid import coarse_to_fine
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def bench_planning(name, im, resolution, start=None, goal=None):
+    costmap = Costmap(im, resolution)
+    passable = costmap.planning_passable
+    if start is None:
+        start, goal = far_apart(passable)
+    pyramid, build = timed(lambda: costmap.planning_pyramid)
+    reference, astar_time = timed(astar, passable, start, goal)
+    result, pyramid_time = timed(coarse_to_fine, passable, start, goal, pyramid)
+    return {"map": name, "shape": list(im.shape), "astar": astar_time, "pyramid_build": build,
+            "coarse_to_fine": pyramid_time, "astar_expansions": reference.expansions,
+            "expansions": result.expansions, "reached": bool(result.reached),
+            "cost_ratio": path_cost(result.path) / path_cost(reference.path)}
+
+
+def bench_frontiers(name, im, resolution):
+    map_data = SimpleNamespace(resolution=resolution)
+    row = {"map": name}
+    for factor in (1, 2, 4):
+        costmap = Costmap(im, resolution)
+        points, seconds = timed(find_all_possible_goals, im, map_data, costmap, factor)
+        row[factor] = {"seconds": seconds, "points": len(points)}
+    return row
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Coarse to fine planning against full resolution A*")
+    parser.add_argument("--size", type=int, default=4000)
+    parser.add_argument("--maze", type=int, default=2000)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    house, _ = load_world("house_closed", args.resolution)
+    house = in_gmapping_map(house, args.size)
+    rooms, rooms_start, rooms_goal = make_rooms(args.size, known_fraction=0.5)
+    # Some unseen patches in the rooms, so there are frontiers to find
+    rng = np.random.default_rng(0)
+    for x, y in rng.integers(args.size // 4, 3 * args.size // 4, size=(40, 2)):
+        rooms[y:y + 30, x:x + 30] = 128
+    maze, maze_start, maze_goal = make_maze(args.maze)
+
+    plans = [bench_planning("house_closed", house, args.resolution),
+             bench_planning(f"rooms_{args.size}", rooms, args.resolution),
+             bench_planning(f"maze_{args.maze}", maze, args.resolution, maze_start, maze_goal)]
+    frontiers = [bench_frontiers("house_closed", house, args.resolution),
+                 bench_frontiers(f"rooms_{args.size}", rooms, args.resolution)]
+
+    print(f"{'map':>14} {'A*':>7} {'build':>7} {'c2f':>7} {'A* exp':>8} {'c2f exp':>8} {'cost':>6}")
+    for r in plans:
+        print(f"{r['map']:>14} {r['astar']:>7.3f} {r['pyramid_build']:>7.3f} {r['coarse_to_fine']:>7.3f} "
+              f"{r['astar_expansions']:>8} {r['expansions']:>8} {r['cost_ratio']:>6.3f}")
+    print()
+    print(f"{'map':>14} {'frontiers 1x':>15} {'2x':>15} {'4x':>15}")
+    for r in frontiers:
+        print(f"{r['map']:>14} " + " ".join(f"{r[f]['seconds']:>7.3f}s {r[f]['points']:>6}" for f in (1, 2, 4)))
+    if args.json:
+        print(json.dumps({"planning": plans, "frontiers": frontiers}, indent=2))
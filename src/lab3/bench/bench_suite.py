@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+# Offline benchmark of the whole map_update pipeline: convert_image, the costmap, find_all_possible_goals (and the
+#   same pixels grouped by find_frontier_clusters), picking a goal (the cost field and find_cheapest_point) and dijkstra on a fixed set of start/goal pairs.
+#
+# Maps:
+#   simple_rooms, closed_maze, house_closed, willow_closed - the newest map record_map.py saved for that world
+#       in bench/recorded/ if there is one. Otherwise the world is rasterized (see maps.py) and everything further
+#       than --explored of its size from the start is made unseen, so there are frontiers to find. willow_closed
+#       is all meshes, so it needs a recording
+#   maze_<n> - random mazes, n from 256 to 4096 pixels square
+#
+# Each stage is timed --repeats times, and dijkstra once per pair per repeat. Peak memory is measured in a separate
+#   run under tracemalloc, so it doesn't slow down the timed ones. The start/goal pairs come from a fixed seed, so
+#   two versions of the code plan the same routes and their JSON can be diffed.
+#
+#   python3 bench_suite.py --output before.json
+#   python3 bench_suite.py --sizes 256 512 --pairs 3 --output quick.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+from scipy.ndimage import label
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import path_planning
+from costmap import Costmap
+from exploring import find_all_possible_goals, find_cheapest_point, find_frontier_clusters
+from grid_search import cost_field
+from maps import (explored_around, load_floorplan, load_recording, load_world, make_maze, recordings, to_occupancy,
+                  to_pixel)
+
+
+WORLDS = ["simple_rooms", "closed_maze", "house_closed", "willow_closed"]
+MAZE_SIZES = [256, 512, 1024, 2048, 4096]
+# Where the robot starts in simple.world
+SIMPLE_ROOMS_START = (-5.0, -5.0)
+
+
+class RecordingPlanner:
+    """ Planner object for dijkstra that runs one of path_planning.PLANNERS and keeps the last SearchResult, so the
+    expansions can be read back"""
+    def __init__(self, name):
+        self.search = path_planning.PLANNERS[name]
+        self.last = None
+
+    def plan(self, passable, robot_loc, goal_loc, origin=None):
+        self.last = self.search(passable, robot_loc, goal_loc)
+        return self.last
+
+
+def map_data_for(shape, info):
+    """ Stand-in for the MapMetaData message, with the fields the pipeline uses"""
+    position = SimpleNamespace(x=info["origin"][0], y=info["origin"][1])
+    return SimpleNamespace(resolution=info["resolution"], width=shape[1], height=shape[0],
+                           origin=SimpleNamespace(position=position))
+
+
+def biggest_component(passable):
+    """ Pixels (i, j) of the biggest eight connected piece of passable"""
+    labels, count = label(passable, structure=np.ones((3, 3)))
+    if count == 0:
+        return np.empty((0, 2), dtype=int)
+    biggest = np.argmax(np.bincount(labels.ravel())[1:]) + 1
+    return np.argwhere(labels == biggest)[:, ::-1]
+
+
+def load_maps(args):
+    """ Every map to run on
+    @return list of dicts with name, source, raw grid data, info and robot pixel (None for skipped maps)"""
+    maps = []
+    for world in WORLDS:
+        saved = recordings(world)
+        if saved:
+            data, info = load_recording(saved[-1])
+            maps.append({"name": world, "source": os.path.basename(saved[-1]), "data": data, "info": info,
+                         "robot": info.get("robot")})
+            continue
+        if world == "simple_rooms":
+            im, info = load_floorplan(world, resolution=args.resolution)
+            robot = to_pixel(SIMPLE_ROOMS_START, info)
+        else:
+            im, info = load_world(world, args.resolution)
+            robot = None
+        if not (im == 255).any():
+            maps.append({"name": world, "source": "skipped", "reason": f"nothing to rasterize, {info['skipped']}"})
+            continue
+        maps.append({"name": world, "source": "rasterized", "im": im, "info": info, "robot": robot})
+
+    for size in args.sizes:
+        im, start, _ = make_maze(size, seed=args.seed)
+        info = {"origin": (0.0, 0.0), "resolution": args.resolution, "skipped": []}
+        maps.append({"name": f"maze_{size}", "source": "synthetic", "im": im, "info": info, "robot": start})
+
+    for m in maps:
+        if "im" not in m:
+            continue
+        im = m.pop("im")
+        if m["robot"] is None:
+            m["robot"] = tuple(int(v) for v in biggest_component(Costmap(im, args.resolution).planning_passable)[0])
+        m["data"] = to_occupancy(explored_around(im, m["robot"], args.explored * max(im.shape)))
+    return maps
+
+
+def pairs_for(name, passable, count, seed):
+    """ Start/goal pairs in the biggest connected piece of free space, the same every run for the same map"""
+    cells = biggest_component(passable)
+    if len(cells) < 2:
+        return []
+    rng = np.random.default_rng([seed, zlib.crc32(name.encode())])
+    picks = rng.integers(len(cells), size=(count, 2))
+    return [(tuple(int(v) for v in cells[a]), tuple(int(v) for v in cells[b])) for a, b in picks]
+
+
+def percentiles(samples):
+    samples = np.asarray(samples, dtype=float)
+    if len(samples) == 0:
+        return None
+    return {"p50": float(np.percentile(samples, 50)), "p90": float(np.percentile(samples, 90)),
+            "p99": float(np.percentile(samples, 99)), "max": float(samples.max()), "n": int(len(samples))}
+
+
+def timed(fn, repeats):
+    """ Run fn repeats times
+    @return the last result, list of seconds"""
+    seconds = []
+    result = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - t0)
+    return result, seconds
+
+
+def peak_memory(fn):
+    """ Peak bytes allocated while fn runs"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_map(m, args):
+    data = m["data"]
+    info = m["info"]
+    resolution = info["resolution"]
+    map_data = map_data_for(data.shape, info)
+    robot = m["robot"]
+    row = {"map": m["name"], "source": m["source"], "shape": list(data.shape), "robot": list(robot),
+           "known_pixels": int(np.count_nonzero(data != -1)), "stages": {}}
+
+    def convert():
+        return path_planning.convert_image(data, wall_threshold=0.8, free_threshold=0.2)
+
+    im_thresh = convert()
+
+    def build_costmap():
+        costmap = Costmap(im_thresh, resolution)
+        costmap.planning_passable
+        costmap.frontier_free_areas
+        return costmap
+
+    costmap = build_costmap()
+
+    def frontiers():
+        return find_all_possible_goals(im_thresh, map_data, costmap)
+
+    points = frontiers()
+
+    def clusters():
+        return find_frontier_clusters(im_thresh, map_data, costmap)
+
+    def select_goal():
+        field = cost_field(costmap.planning_passable, robot)
+        return find_cheapest_point(points, robot, map_data, field)
+
+    stages = [("convert_image", convert), ("costmap", build_costmap), ("find_all_possible_goals", frontiers),
+              ("find_frontier_clusters", clusters), ("goal_selection", select_goal)]
+    for name, fn in stages:
+        _, seconds = timed(fn, args.repeats)
+        row["stages"][name] = {"seconds": percentiles(seconds), "peak_bytes": peak_memory(fn)}
+    row["frontier_points"] = len(points)
+    row["frontier_clusters"] = len(clusters().sizes)
+    goal, cost = select_goal()
+    row["goal"] = None if goal is None else list(goal)
+    row["goal_cost"] = None if goal is None else cost
+
+    planner = RecordingPlanner(args.planner)
+    pairs = pairs_for(m["name"], costmap.planning_passable, args.pairs, args.seed)
+    seconds = []
+    expansions = []
+    reached = 0
+    for start, goal in pairs:
+        def plan():
+            return path_planning.dijkstra(im_thresh, start, goal, map_data, costmap, planner)
+        _, pair_seconds = timed(plan, args.repeats)
+        seconds.extend(pair_seconds)
+        expansions.append(planner.last.expansions)
+        reached += bool(planner.last.reached)
+    row["stages"]["dijkstra"] = {
+        "seconds": percentiles(seconds),
+        "peak_bytes": peak_memory(lambda: path_planning.dijkstra(im_thresh, pairs[0][0], pairs[0][1], map_data,
+                                                                 costmap, planner)) if pairs else None,
+        "expansions": percentiles(expansions), "pairs": [[list(s), list(g)] for s, g in pairs], "reached": reached}
+    return row
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline benchmark of the planning pipeline")
+    parser.add_argument("--sizes", type=int, nargs="*", default=MAZE_SIZES, help="random maze sizes")
+    parser.add_argument("--pairs", type=int, default=5, help="start/goal pairs per map")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--planner", default="astar", choices=sorted(path_planning.PLANNERS))
+    parser.add_argument("--explored", type=float, default=0.6,
+                        help="for rasterized maps, how much is seen, as a radius in fractions of the map size")
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON here instead of printing it")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(), "python": platform.python_version(), "numpy": np.__version__,
+               "settings": vars(args), "maps": []}
+    for m in load_maps(args):
+        if m["source"] == "skipped":
+            results["maps"].append({"map": m["name"], "source": "skipped", "reason": m["reason"]})
+            print(f"{m['name']}: skipped, {m['reason']}", file=sys.stderr)
+            continue
+        row = run_map(m, args)
+        results["maps"].append(row)
+        stages = row["stages"]
+        print(f"{row['map']:>14} {row['source']:>10} " +
+              " ".join(f"{name} {stage['seconds']['p50']:.3f}s" for name, stage in stages.items()
+                       if stage["seconds"] is not None), file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
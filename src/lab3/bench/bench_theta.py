@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# Waypoints from any-angle paths against the eight connected ones, on the stage worlds.
+#
+#   grid     - grid_search.astar, then exploring.find_waypoints (every 10th pixel), which is what the driver used to get
+#   shortcut - the same A* path pulled tight with theta_star.shortcut, every corner is a waypoint (what Explorer does)
+#   theta    - theta_star.lazy_theta_star, every corner is a waypoint
+#
+# Time to goal is a model, not a run of stage: driving the path length at --speed, plus --per-waypoint seconds for
+#   each waypoint. new_driver does a rotate_360 at every waypoint, 39 laser callbacks at stage's 10 Hz, and the
+#   controller sends the next goal on its 10 Hz loop, so the default is 4 seconds.
+#
+#   python3 bench_theta.py --pairs 20
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_suite import pairs_for
+from costmap import Costmap
+from exploring import find_corner_waypoints, find_waypoints
+from grid_search import astar
+from maps import load_floorplan, load_world
+from theta_star import lazy_theta_star, shortcut
+
+
+def length(path):
+    return float(np.hypot(*np.diff(np.asarray(path, dtype=float), axis=0).T).sum())
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def bench(name, im, resolution, pairs, seed, speed, per_waypoint):
+    passable = Costmap(im, resolution).planning_passable
+    rows = {method: {"seconds": [], "waypoints": [], "meters": []} for method in ("grid", "shortcut", "theta")}
+    for start, goal in pairs_for(name, passable, pairs, seed):
+        grid, grid_seconds = timed(astar, passable, start, goal)
+        tight, shortcut_seconds = timed(shortcut, passable, grid.path)
+        theta, theta_seconds = timed(lazy_theta_star, passable, start, goal)
+        for method, path, seconds, waypoints in (
+                ("grid", grid.path, grid_seconds, find_waypoints(None, grid.path)),
+                ("shortcut", tight, grid_seconds + shortcut_seconds, find_corner_waypoints(tight)),
+                ("theta", theta.path, theta_seconds, find_corner_waypoints(theta.path))):
+            rows[method]["seconds"].append(seconds)
+            rows[method]["waypoints"].append(len(waypoints))
+            rows[method]["meters"].append(length(path) * resolution)
+
+    result = {"map": name, "pairs": len(rows["grid"]["seconds"])}
+    for method, row in rows.items():
+        waypoints = np.array(row["waypoints"])
+        meters = np.array(row["meters"])
+        result[method] = {"plan_seconds": float(np.mean(row["seconds"])), "waypoints": float(waypoints.mean()),
+                          "meters": float(meters.mean()),
+                          "time_to_goal": float(np.mean(meters / speed + waypoints * per_waypoint))}
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Waypoints and time to goal for any-angle paths")
+    parser.add_argument("--pairs", type=int, default=20, help="start/goal pairs per world")
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--speed", type=float, default=0.5, help="meters per second")
+    parser.add_argument("--per-waypoint", type=float, default=4.0, help="seconds spent at each waypoint")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="also print the raw numbers as JSON")
+    args = parser.parse_args()
+
+    worlds = [("simple_rooms", load_floorplan("simple_rooms", resolution=args.resolution)[0])]
+    for world in ("closed_maze", "house_closed"):
+        worlds.append((world, load_world(world, args.resolution)[0]))
+
+    results = [bench(name, im, args.resolution, args.pairs, args.seed, args.speed, args.per_waypoint)
+               for name, im in worlds]
+
+    print(f"{'map':>14} {'method':>9} {'plan s':>8} {'waypoints':>10} {'meters':>8} {'to goal s':>10}")
+    for r in results:
+        for method in ("grid", "shortcut", "theta"):
+            m = r[method]
+            print(f"{r['map']:>14} {method:>9} {m['plan_seconds']:>8.4f} {m['waypoints']:>10.1f} {m['meters']:>8.2f} "
+                  f"{m['time_to_goal']:>10.1f}")
+    if args.json:
+        print(json.dumps(results, indent=2))
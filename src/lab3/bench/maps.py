@@ -0,0 +1,279 @@
+# Maps for the planner benchmarks
+#
+# Every function here returns a thresholded image in the same format convert_image gives (0 wall, 128 unseen,
+#   255 free), so the results can be fed straight into the planning code.
+#
+#   make_rooms - a gmapping-sized grid that is mostly unseen, with a known block of rooms in the middle
+#   make_maze  - a random maze with long one-corridor-wide passages
+#   load_world - rasterizes the box and cylinder collision geometry of a Gazebo .world file from stage_osu.
+#                Mesh geometry (the willowgarage walls, the cafe table) can't be rasterized without the mesh
+#                files, so it is left out and listed in the returned info
+#   load_floorplan - a Stage floorplan bitmap (simple_rooms.png), scaled to the size the .world gives it
+#
+# Recorded maps are OccupancyGrids saved by record_map.py, and come back as the raw grid data (-1 unknown, 0-100
+#   occupancy) that StudentController gets, so they go through convert_image like the real thing. to_occupancy
+#   turns any of the images above into the same kind of data.
+
+import glob
+import math
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from scipy.ndimage import binary_closing, label
+from PIL import Image
+
+
+WORLDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "stage_osu", "config")
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded")
+
+
+def make_rooms(size, known_fraction=0.25, seed=0):
+    """ Thresholded image with a grid of rooms in the middle
+    @param size - width and height of the image in pixels
+    @param known_fraction - side of the known square as a fraction of size
+    @param seed - random seed for the doors
+    @return image, start pixel, goal pixel"""
+    rng = np.random.default_rng(seed)
+    im = np.full((size, size), 128, dtype=np.uint8)
+    room = 80
+    side = max(int(size * known_fraction) // room, 2) * room + 2
+    lo = (size - side) // 2
+    hi = lo + side
+    im[lo:hi, lo:hi] = 255
+    for k in range(lo, hi, room):
+        im[k:k + 2, lo:hi] = 0
+        im[lo:hi, k:k + 2] = 0
+    im[hi - 2:hi, lo:hi] = 0
+    im[lo:hi, hi - 2:hi] = 0
+    # Knock a door in each inside wall of each room
+    for k in range(lo + room, hi - 2, room):
+        for m in range(lo, hi - 2, room):
+            d = m + int(rng.integers(10, room - 34))
+            im[k:k + 2, d:d + 24] = 255
+            im[d:d + 24, k:k + 2] = 255
+    start = (lo + 20, lo + 20)
+    goal = (hi - 20, hi - 20)
+    return im, start, goal
+
+
+def make_maze(size, corridor=24, wall=4, seed=0):
+    """ Random maze (depth first carving) with corridors a few robot widths wide
+    @param size - width and height of the image in pixels
+    @param corridor - width of a corridor in pixels
+    @param wall - thickness of a wall in pixels
+    @param seed - random seed
+    @return image, start pixel (first cell), goal pixel (last cell)"""
+    rng = np.random.default_rng(seed)
+    pitch = corridor + wall
+    cells = max((size - wall) // pitch, 2)
+    im = np.zeros((size, size), dtype=np.uint8)
+
+    def cell_origin(c):
+        return wall + c * pitch
+
+    visited = np.zeros((cells, cells), dtype=bool)
+    stack = [(0, 0)]
+    visited[0, 0] = True
+    im[cell_origin(0):cell_origin(0) + corridor, cell_origin(0):cell_origin(0) + corridor] = 255
+    while stack:
+        ci, cj = stack[-1]
+        options = [(ci + di, cj + dj) for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= ci + di < cells and 0 <= cj + dj < cells and not visited[cj + dj, ci + di]]
+        if not options:
+            stack.pop()
+            continue
+        ni, nj = options[rng.integers(len(options))]
+        visited[nj, ni] = True
+        x0, y0 = cell_origin(min(ci, ni)), cell_origin(min(cj, nj))
+        x1, y1 = cell_origin(max(ci, ni)) + corridor, cell_origin(max(cj, nj)) + corridor
+        im[y0:y1, x0:x1] = 255
+        stack.append((ni, nj))
+
+    half = corridor // 2
+    start = (cell_origin(0) + half, cell_origin(0) + half)
+    goal = (cell_origin(cells - 1) + half, cell_origin(cells - 1) + half)
+    return im, start, goal
+
+
+def _pose(element):
+    """ x, y, yaw from a <pose> child of element, zeros if there isn't one"""
+    pose = element.find("pose") if element is not None else None
+    if pose is None or not pose.text:
+        return 0.0, 0.0, 0.0
+    values = [float(v) for v in pose.text.split()]
+    return values[0], values[1], values[5]
+
+
+def _compose(a, b):
+    """ Pose b expressed in frame a, as a pose in a's parent frame"""
+    ax, ay, ayaw = a
+    bx, by, byaw = b
+    c, s = math.cos(ayaw), math.sin(ayaw)
+    return ax + c * bx - s * by, ay + s * bx + c * by, ayaw + byaw
+
+
+def world_shapes(world_path):
+    """ Box and cylinder collision shapes in a Gazebo world, in world coordinates
+    Link poses come from the <state> section when there is one, since that is where the world was saved
+    @param world_path - path to the .world file
+    @return list of ("box", x, y, yaw, size_x, size_y) and ("cylinder", x, y, radius), list of skipped geometry"""
+    world = ET.parse(world_path).getroot().find("world")
+
+    state_links = {}
+    state = world.find("state")
+    if state is not None:
+        for model in state.findall("model"):
+            for link in model.findall("link"):
+                state_links[(model.get("name"), link.get("name"))] = _pose(link)
+
+    shapes = []
+    skipped = []
+    for model in world.findall("model"):
+        model_pose = _pose(model)
+        for link in model.findall("link"):
+            link_pose = state_links.get((model.get("name"), link.get("name")))
+            if link_pose is None:
+                link_pose = _compose(model_pose, _pose(link))
+            for collision in link.findall("collision"):
+                x, y, yaw = _compose(link_pose, _pose(collision))
+                geometry = collision.find("geometry")
+                box = geometry.find("box")
+                cylinder = geometry.find("cylinder")
+                if box is not None:
+                    sx, sy = [float(v) for v in box.find("size").text.split()][:2]
+                    shapes.append(("box", x, y, yaw, sx, sy))
+                elif cylinder is not None:
+                    shapes.append(("cylinder", x, y, float(cylinder.find("radius").text)))
+                elif geometry.find("plane") is None:
+                    skipped.append(f"{model.get('name')}/{link.get('name')}/{geometry[0].tag}")
+    return shapes, skipped
+
+
+def load_world(name, resolution=0.05, margin=0.5, door=2.0):
+    """ Thresholded image of a stage_osu world, with everything the walls enclose marked free
+    @param name - world name, like "closed_maze"
+    @param resolution - size of a pixel in meters
+    @param margin - border around the walls, in meters
+    @param door - widest opening in the outside walls, in meters
+    @return image, info dict with the origin (meters) of pixel (0, 0) and the skipped geometry"""
+    shapes, skipped = world_shapes(os.path.join(WORLDS_DIR, name + ".world"))
+    if not shapes:
+        raise ValueError(f"{name} has no box or cylinder geometry to rasterize")
+
+    corners = []
+    for shape in shapes:
+        if shape[0] == "box":
+            _, x, y, yaw, sx, sy = shape
+            c, s = math.cos(yaw), math.sin(yaw)
+            for lx, ly in ((sx / 2, sy / 2), (sx / 2, -sy / 2), (-sx / 2, sy / 2), (-sx / 2, -sy / 2)):
+                corners.append((x + c * lx - s * ly, y + s * lx + c * ly))
+        else:
+            _, x, y, radius = shape
+            corners.extend([(x - radius, y - radius), (x + radius, y + radius)])
+    corners = np.array(corners)
+    x_min, y_min = corners.min(axis=0)
+    x_max, y_max = corners.max(axis=0)
+
+    origin = (float(x_min - margin), float(y_min - margin))
+    width = int(math.ceil((x_max - x_min + 2 * margin) / resolution))
+    height = int(math.ceil((y_max - y_min + 2 * margin) / resolution))
+
+    im = np.full((height, width), 255, dtype=np.uint8)
+
+    # Pixel centers in world coordinates
+    xs = origin[0] + (np.arange(width) + 0.5) * resolution
+    ys = origin[1] + (np.arange(height) + 0.5) * resolution
+    for shape in shapes:
+        if shape[0] == "box":
+            _, x, y, yaw, sx, sy = shape
+            reach = math.hypot(sx, sy) / 2
+        else:
+            _, x, y, reach = shape
+        i0, i1 = np.searchsorted(xs, [x - reach, x + reach])
+        j0, j1 = np.searchsorted(ys, [y - reach, y + reach])
+        gx, gy = np.meshgrid(xs[i0:i1] - x, ys[j0:j1] - y)
+        if shape[0] == "box":
+            c, s = math.cos(yaw), math.sin(yaw)
+            local_x = c * gx + s * gy
+            local_y = -s * gx + c * gy
+            # Walls thinner than a pixel still need to show up, so grow them by half a pixel
+            inside = (np.abs(local_x) <= sx / 2 + resolution / 2) & (np.abs(local_y) <= sy / 2 + resolution / 2)
+        else:
+            inside = gx * gx + gy * gy <= (reach + resolution / 2) ** 2
+        im[j0:j1, i0:i1][inside] = 0
+
+    # The robot never sees outside of the walls, so anything connected to the edge of the image is unseen. Doorways
+    #   in the outside walls are closed up first so the flood doesn't leak into the building
+    iterations = int(door / resolution / 2) + 1
+    sealed = binary_closing(np.pad(im == 0, iterations), iterations=iterations)[iterations:-iterations, iterations:-iterations]
+    labels, _ = label(~sealed)
+    outside = np.unique(np.concatenate((labels[0], labels[-1], labels[:, 0], labels[:, -1])))
+    im[np.isin(labels, outside[outside > 0])] = 128
+
+    return im, {"origin": origin, "resolution": resolution, "skipped": skipped}
+
+
+def to_pixel(point, info):
+    """ World (x, y) in meters to an (i, j) pixel of a loaded world"""
+    return (int((point[0] - info["origin"][0]) / info["resolution"]),
+            int((point[1] - info["origin"][1]) / info["resolution"]))
+
+
+def load_floorplan(name, size=(16.0, 16.0), resolution=0.05, margin=0.5):
+    """ Thresholded image of a Stage floorplan bitmap. Stage stretches the bitmap to size and puts a wall around
+    it (boundary 1 in map.inc), and the outside is unseen
+    @param name - bitmap name, like "simple_rooms"
+    @param size - (x, y) size in meters the .world gives the floorplan
+    @param resolution - size of a pixel in meters
+    @param margin - unseen border around the floorplan, in meters
+    @return image, info dict with the origin (meters) of pixel (0, 0)"""
+    bitmap = Image.open(os.path.join(WORLDS_DIR, name + ".png")).convert("L")
+    width = int(round(size[0] / resolution))
+    height = int(round(size[1] / resolution))
+    # Image rows go down, map rows go up
+    walls = np.array(bitmap.resize((width, height), Image.NEAREST))[::-1] < 128
+    walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+
+    border = int(round(margin / resolution))
+    im = np.full((height + 2 * border, width + 2 * border), 128, dtype=np.uint8)
+    im[border:-border, border:-border] = np.where(walls, 0, 255)
+    origin = (-size[0] / 2 - border * resolution, -size[1] / 2 - border * resolution)
+    return im, {"origin": origin, "resolution": resolution, "skipped": []}
+
+
+def to_occupancy(im):
+    """ Thresholded image (0 wall, 128 unseen, 255 free) to OccupancyGrid data (100, -1, 0), as an (H, W) array"""
+    data = np.full(im.shape, -1, dtype=np.int8)
+    data[im == 0] = 100
+    data[im == 255] = 0
+    return data
+
+
+def explored_around(im, center, radius):
+    """ Copy of a thresholded image where only the pixels within radius of center have been seen, which looks like
+    a map part way through exploring it
+    @param center - pixel (i, j)
+    @param radius - in pixels"""
+    height, width = im.shape
+    y, x = np.ogrid[:height, :width]
+    im = im.copy()
+    im[(x - center[0]) ** 2 + (y - center[1]) ** 2 > radius ** 2] = 128
+    return im
+
+
+def load_recording(path):
+    """ An OccupancyGrid saved by record_map.py
+    @return (H, W) int8 grid data, info dict with the origin and resolution (and the robot pixel, if it was saved)"""
+    with np.load(path) as saved:
+        data = saved["data"].reshape(int(saved["height"]), int(saved["width"]))
+        info = {"origin": (float(saved["origin"][0]), float(saved["origin"][1])),
+                "resolution": float(saved["resolution"]), "skipped": []}
+        if "robot" in saved:
+            info["robot"] = tuple(int(v) for v in saved["robot"])
+    return data, info
+
+
+def recordings(world):
+    """ Paths of the saved OccupancyGrids of runs on a world, oldest first"""
+    return sorted(glob.glob(os.path.join(RECORDINGS_DIR, world + "*.npz")))
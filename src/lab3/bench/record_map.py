@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+# Saves the OccupancyGrids gmapping publishes during a run, for bench_suite.py. Run it next to lab3.launch:
+#   rosrun lab3 record_map.py simple_rooms     (or python3 record_map.py simple_rooms)
+#
+# Every --every'th map is written to bench/recorded/<world>_<seq>.npz, with the robot pixel if the map to
+#   base_link transform is available.
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import rospy
+import tf
+from nav_msgs.msg import OccupancyGrid
+
+from maps import RECORDINGS_DIR
+
+
+def save(msg, world, robot):
+    info = msg.info
+    path = os.path.join(RECORDINGS_DIR, f"{world}_{msg.header.seq:05d}.npz")
+    extra = {} if robot is None else {"robot": np.array(robot)}
+    np.savez_compressed(path, data=np.array(msg.data, dtype=np.int8), width=info.width, height=info.height,
+                        resolution=info.resolution, origin=np.array((info.origin.position.x, info.origin.position.y)),
+                        **extra)
+    rospy.loginfo(f"Saved {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Save gmapping maps for the offline benchmarks")
+    parser.add_argument("world", help="name to save the maps under, like simple_rooms")
+    parser.add_argument("--every", type=int, default=10, help="only keep every n'th map")
+    args = parser.parse_args(rospy.myargv(sys.argv)[1:])
+
+    rospy.init_node("record_map")
+    os.makedirs(RECORDINGS_DIR, exist_ok=True)
+    listener = tf.TransformListener()
+    count = [0]
+
+    def callback(msg):
+        count[0] += 1
+        if count[0] % args.every:
+            return
+        robot = None
+        try:
+            (x, y, _), _ = listener.lookupTransform(msg.header.frame_id, "base_link", rospy.Time(0))
+            robot = (int((x - msg.info.origin.position.x) / msg.info.resolution),
+                     int((y - msg.info.origin.position.y) / msg.info.resolution))
+        except (tf.LookupException, tf.ConnectivityException, tf.ExtrapolationException):
+            pass
+        save(msg, args.world, robot)
+
+    rospy.Subscriber("map", OccupancyGrid, callback, queue_size=1)
+    rospy.spin()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+# Draws the debug snapshots planning_core saves when a goal can't be reached (see snapshots.py): the thresholded
+#   map, every pixel the search visited, the path it sent instead, the robot and the goal. The picture is cropped to
+#   the box around all of those, plus a margin. Each snapshot.npz is drawn to snapshot.png next to it.
+#
+#   python3 render_snapshot.py ~/ros_ws/src/lab3/snapshots/*.npz
+#   python3 render_snapshot.py --show unreachable_20240101_120000_0001.npz
+
+import argparse
+import os
+
+import matplotlib
+import numpy as np
+
+
+def render(path, margin=40, show=False):
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    snapshot = np.load(path)
+    im = snapshot["im"]
+    robot = snapshot["robot"]
+    goal = snapshot["goal"]
+    route = snapshot["path"]
+    visited = np.argwhere(snapshot["visited"])[:, ::-1] if "visited" in snapshot else np.empty((0, 2), dtype=int)
+
+    points = np.vstack((visited, route, [robot], [goal]))
+    height, width = im.shape
+    x0, y0 = np.maximum(points.min(axis=0) - margin, 0)
+    x1, y1 = np.minimum(points.max(axis=0) + margin + 1, (width, height))
+
+    fig, ax = plt.subplots()
+    ax.imshow(im[y0:y1, x0:x1], cmap="gist_gray", vmin=0, vmax=255, origin="lower",
+              extent=(x0 - 0.5, x1 - 0.5, y0 - 0.5, y1 - 0.5))
+    ax.scatter(visited[:, 0], visited[:, 1], color="blue", marker=".", s=0.25, alpha=0.5, label="visited")
+    ax.plot(route[:, 0], route[:, 1], "-y", label="path")
+    ax.scatter([robot[0]], [robot[1]], color="red", marker="*", s=100, label="robot")
+    ax.scatter([goal[0]], [goal[1]], color="green", marker="*", s=100, label="goal")
+    ax.set_title(os.path.basename(path))
+    ax.legend(loc="upper right", fontsize="small")
+
+    if show:
+        plt.show()
+    else:
+        out = os.path.splitext(path)[0] + ".png"
+        fig.savefig(out, dpi=150)
+        print(out)
+    plt.close(fig)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Draw unreachable goal snapshots")
+    parser.add_argument("snapshots", nargs="+", help=".npz files from snapshots.SnapshotWriter")
+    parser.add_argument("--margin", type=int, default=40, help="pixels around the interesting part")
+    parser.add_argument("--show", action="store_true", help="show the figures instead of saving them")
+    args = parser.parse_args()
+
+    for path in args.snapshots:
+        render(path, args.margin, args.show)
@@ -0,0 +1,218 @@
+# Anytime planning with a deadline: ARA*
+#
+# map_update runs in the map subscriber callback, so however long a search takes, that is how long nothing else
+#   happens. ARA* (Likhachev, Gordon and Thrun, "ARA*: Anytime A* with provable bounds on sub-optimality", NIPS
+#   2003) first runs a weighted A* with the heuristic blown up by a weight, which finds a path quickly that costs at
+#   most weight times the best one. Then it lowers the weight and improves the path, reusing everything the earlier
+#   searches found, until the weight gets to 1 (the path is optimal) or the time runs out.
+#
+# Every search stops at the deadline, and the best path found so far is returned with how far from optimal it can
+#   be: the achieved bound, min(weight, cost / smallest unweighted f still in the queue). Working that out goes through
+#   the whole queue, so it is done a chunk at a time with a look at the clock in between, and if the deadline comes
+#   first the bound is just the weight. If the deadline comes before the first path is found, or the goal can't be
+#   reached, the path goes to the visited pixel closest (straight line) to the goal, the same as grid_search.astar,
+#   and the bound is inf. That pixel is kept track of during the search, so giving up costs nothing extra.
+#
+# Same inputs as grid_search.astar and the same padded flat grid for the search state. AnytimeResult has the fields
+#   of a SearchResult plus the bound, so it can go anywhere a SearchResult does.
+
+import heapq
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from grid_search import SQRT2, SearchResult, padded_grid, neighbor_offsets, octile_tables, octile, \
+    trace_parents, visited_image
+
+
+INF = float("inf")
+
+# bound - the path costs at most this many times the optimal one (inf if it doesn't get to the goal)
+# weight - the heuristic weight of the last search that finished
+# iterations - how many searches finished
+# timed_out - the deadline came before the searches were done. Without a path, that means the goal might be
+#   reachable with more time, not that it can't be reached
+AnytimeResult = namedtuple("AnytimeResult", SearchResult._fields + ("bound", "weight", "iterations", "timed_out"))
+
+# How many expansions between looks at the clock
+CLOCK_EVERY = 64
+# Part of the budget kept back for tracing the path and returning
+RESERVE = 0.1
+# How many queue entries to go through between looks at the clock, when working out the bound
+QUEUE_CHUNK = 65536
+
+
+def ara_star(passable, robot_loc, goal_loc, budget=0.2, weight=3.0, weight_step=0.5):
+    """ ARA* on an eight connected grid with an octile heuristic, that always returns within budget seconds
+    If the goal cannot be reached (or not in time), the path goes to the visited pixel closest to the goal instead,
+    and visited is only filled in if there is time left for it.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @param budget - wall clock seconds to spend. The search stops a little early to leave time for tracing the path.
+        Setting up the arrays comes out of it too and takes a couple of milliseconds on a 2048 x 2048 map, so a
+        budget smaller than that runs over
+    @param weight - heuristic weight of the first search
+    @param weight_step - how much the weight goes down for each search after that
+    @return AnytimeResult"""
+    deadline = time.perf_counter() + budget * (1.0 - RESERVE)
+    height, width = passable.shape
+    padded_width = width + 2
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+
+    free_array = padded_grid(passable)
+    free = memoryview(free_array)
+    g_array = np.zeros(free_array.size, dtype=np.float64)
+    parent_array = np.zeros(free_array.size, dtype=np.int32)   # parent id + 1, 0 means never visited
+    # Which search closed the pixel, so CLOSED can be emptied for the next search without touching the array
+    closed_array = np.zeros(free_array.size, dtype=np.int32)
+    g = memoryview(g_array)
+    parent = memoryview(parent_array)
+    closed = memoryview(closed_array)
+    offsets = neighbor_offsets(padded_width)
+    dx_table, dy_table = octile_tables(width, height, goal_loc)
+
+    start = (robot_loc[1] + 1) * padded_width + robot_loc[0] + 1
+    goal = (goal_loc[1] + 1) * padded_width + goal_loc[0] + 1
+
+    dx_array = np.array(dx_table)
+    dy_array = np.array(dy_table)
+
+    def heuristic(node):
+        node_y, node_x = divmod(node, padded_width)
+        return octile(dx_table[node_x], dy_table[node_y])
+
+    def open_nodes():
+        """ The pixels left in OPEN (without the stale entries) and INCONS, with their g and h, a chunk of the queue at
+        a time
+        @return nodes, g, h, or None if the deadline came first"""
+        chunks = []
+        for first in range(0, len(queue), QUEUE_CHUNK):
+            if perf_counter() > deadline:
+                return None
+            entries = np.array(queue[first:first + QUEUE_CHUNK], dtype=np.float64).reshape(-1, 3)
+            nodes = entries[:, 2].astype(np.int64)
+            chunks.append(nodes[(closed_array[nodes] != iteration) & (entries[:, 1] == g_array[nodes])])
+        chunks.append(np.fromiter(inconsistent, dtype=np.int64, count=len(inconsistent)))
+        nodes = np.unique(np.concatenate(chunks))
+        node_y, node_x = np.divmod(nodes, padded_width)
+        dx = dx_array[node_x]
+        dy = dy_array[node_y]
+        return nodes, g_array[nodes], np.maximum(dx, dy) + (SQRT2 - 1.0) * np.minimum(dx, dy)
+
+    parent[start] = start + 1
+    # Visited pixel closest to the goal, by squared straight line distance, ties to the lowest id like np.argmin
+    closest = start
+    closest_d2 = dx_table[robot_loc[0] + 1] ** 2 + dy_table[robot_loc[1] + 1] ** 2
+    # (weighted f, g when it was pushed, node). An entry is stale if the pixel has been closed since or its g went down
+    queue = [(weight * heuristic(start), 0.0, start)]
+    # Pixels whose g went down after they were closed in this search, they go back in the queue for the next one
+    inconsistent = set()
+    iteration = 1
+    expansions = 0
+    best_path = None
+    best_bound = INF
+    finished_weight = None
+    finished = 0
+    out_of_time = False
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+    perf_counter = time.perf_counter
+
+    while True:
+        # Improve the path with this weight, until nothing in the queue can beat the goal
+        while queue:
+            f, pushed_g, node = queue[0]
+            if closed[node] == iteration or pushed_g != g[node]:
+                heappop(queue)
+                continue
+            if parent[goal] and g[goal] <= f:
+                break
+            heappop(queue)
+            closed[node] = iteration
+            expansions += 1
+            if expansions % CLOCK_EVERY == 0 and perf_counter() > deadline:
+                out_of_time = True
+                break
+
+            node_y, node_x = divmod(node, padded_width)
+            node_g = g[node]
+            for offset, di, dj, cost in offsets:
+                neighbor = node + offset
+                if not free[neighbor]:
+                    continue
+                distance = node_g + cost
+                if parent[neighbor] and distance >= g[neighbor]:
+                    continue
+                dx = dx_table[node_x + di]
+                dy = dy_table[node_y + dj]
+                if not parent[neighbor]:
+                    d2 = dx * dx + dy * dy
+                    if d2 < closest_d2 or (d2 == closest_d2 and neighbor < closest):
+                        closest_d2 = d2
+                        closest = neighbor
+                g[neighbor] = distance
+                parent[neighbor] = node + 1
+                if closed[neighbor] == iteration:
+                    inconsistent.add(neighbor)
+                else:
+                    h = dx + (SQRT2 - 1.0) * dy if dx > dy else dy + (SQRT2 - 1.0) * dx
+                    heappush(queue, (distance + weight * h, distance, neighbor))
+
+        if out_of_time or not parent[goal]:
+            break
+
+        # A path with this weight. How good it is: no path can cost less than the smallest unweighted f left
+        best_path = trace_parents(parent_array, goal, padded_width)
+        finished_weight = weight
+        finished += 1
+        if weight <= 1.0:
+            best_bound = 1.0
+            break
+        left = open_nodes()
+        if left is None:
+            # Out of time going through the queue, so all that is known is the weight
+            best_bound = weight
+            out_of_time = True
+            break
+        nodes, node_g, node_h = left
+        lowest = float((node_g + node_h).min()) if len(nodes) else INF
+        best_bound = min(weight, g[goal] / lowest) if lowest > 0 else weight
+        if best_bound <= 1.0 or weight <= 1.0 or perf_counter() > deadline:
+            out_of_time = best_bound > 1.0 and weight > 1.0
+            best_bound = max(best_bound, 1.0)
+            break
+
+        # Next search: lower weight, queue is what was left plus the inconsistent pixels, CLOSED is empty
+        weight = max(1.0, weight - weight_step)
+        iteration += 1
+        queue = list(zip((node_g + weight * node_h).tolist(), node_g.tolist(), nodes.tolist()))
+        heapq.heapify(queue)
+        inconsistent = set()
+
+    if best_path is not None:
+        return AnytimeResult(best_path, True, expansions, None, best_bound, finished_weight, finished, out_of_time)
+
+    # No path yet, either out of time or the goal can't be reached
+    visited = None if out_of_time else visited_image(parent_array, height, width)
+    return AnytimeResult(trace_parents(parent_array, closest, padded_width), False, expansions, visited, INF, weight,
+                         0, out_of_time)
+
+
+class ARAStar:
+    """ Planner object for ara_star with its settings, see plan in planning_core. Remembers how the last call went"""
+    def __init__(self, budget=0.2, weight=3.0, weight_step=0.5):
+        """
+        @param budget - wall clock seconds each plan can take
+        @param weight - heuristic weight of the first search
+        @param weight_step - how much the weight goes down for each search after that"""
+        self.budget = budget
+        self.weight = weight
+        self.weight_step = weight_step
+        self.last = None
+
+    def plan(self, passable, robot_loc, goal_loc, origin=None):
+        self.last = ara_star(passable, robot_loc, goal_loc, self.budget, self.weight, self.weight_step)
+        return self.last
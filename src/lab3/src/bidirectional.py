@@ -0,0 +1,163 @@
+# Bidirectional A* on the eight connected grid
+#
+# One A* grows out from the robot and another one grows back from the goal, and the path is joined where they
+#   meet. For a goal across the map each search only has to cover about half the distance, so together they
+#   expand a lot less than a single A* with its big frontier near the goal.
+#
+# The side with the smaller queue is always expanded next. If the goal is in a small pocket of free space that the
+#   robot can't get to, the search from the goal runs out of pixels almost right away, and we know the goal can't
+#   be reached. The path then goes as close as the robot can get, the same as grid_search.astar, so the search from
+#   the robot keeps going on its own until it has been everywhere the robot can get to.
+#
+# Both searches are ordered by the average of the two heuristics (Goldberg and Harrelson, "Computing the shortest
+#   path: A* search meets graph theory", 2005): the forward key of a pixel is g + (h_goal - h_start) / 2 and the
+#   backward key is g + (h_start - h_goal) / 2. The octile heuristics are consistent, so this is the same as two
+#   Dijkstra searches on a graph with adjusted (but still non negative) step costs.
+#
+# Stopping: mu is the cost of the best path found so far, through a pixel both sides have reached. With the
+#   averaged keys, no path can be cheaper than mu once the smallest forward key plus the smallest backward key is
+#   at least mu, so the search stops there.
+#
+# Same inputs and output as grid_search.astar, and the same padded flat grid for the search state.
+
+import heapq
+
+import numpy as np
+
+from grid_search import SQRT2, SearchResult, padded_grid, neighbor_offsets, octile_tables, octile, unpad, closest_visited, \
+    visited_image, astar
+
+
+INF = float("inf")
+
+
+def _trace(parent, node):
+    """ Flat ids from node back to the root of one of the searches (which is its own parent)"""
+    ids = [node]
+    while parent[node] - 1 != node:
+        node = parent[node] - 1
+        ids.append(node)
+    return ids
+
+
+def bidirectional_astar(passable, robot_loc, goal_loc):
+    """ Bidirectional A* on an eight connected grid with octile heuristics
+    If the goal cannot be reached, the path goes to the pixel closest to the goal that the robot can get to, the same
+    one as grid_search.astar.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @return SearchResult"""
+    height, width = passable.shape
+    padded_width = width + 2
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+    if not passable[goal_loc[1], goal_loc[0]]:
+        # Nothing can get into the goal, so there is nothing for the backwards search to do
+        return astar(passable, robot_loc, goal_loc)
+
+    start = (robot_loc[1] + 1) * padded_width + robot_loc[0] + 1
+    goal = (goal_loc[1] + 1) * padded_width + goal_loc[0] + 1
+
+    free_array = padded_grid(passable)
+    # The backwards search has to be able to step into the start, even if it is inside the inflation
+    free_array[start] = True
+    free = memoryview(free_array)
+    offsets = neighbor_offsets(padded_width)
+
+    # Forward (from the robot) and backward (from the goal) search state, see grid_search.astar
+    g_arrays = [np.zeros(free_array.size, dtype=np.float32) for _ in range(2)]
+    parent_arrays = [np.zeros(free_array.size, dtype=np.int32) for _ in range(2)]
+    closed_arrays = [np.zeros(free_array.size, dtype=bool) for _ in range(2)]
+    g = [memoryview(a) for a in g_arrays]
+    parent = [memoryview(a) for a in parent_arrays]
+    closed = [memoryview(a) for a in closed_arrays]
+    # Octile distance tables to the goal and to the start. The key of pixel v is g + potential(v) going forward and
+    #   g - potential(v) going backward, with potential(v) = (h_goal(v) - h_start(v)) / 2
+    goal_dx, goal_dy = octile_tables(width, height, goal_loc)
+    start_dx, start_dy = octile_tables(width, height, robot_loc)
+    # The 1/2 of the potential, with the direction
+    signs = (0.5, -0.5)
+
+    def potential(x, y):
+        return 0.5 * (octile(goal_dx[x], goal_dy[y]) - octile(start_dx[x], start_dy[y]))
+
+    parent[0][start] = start + 1
+    parent[1][goal] = goal + 1
+    queues = [[(potential(robot_loc[0] + 1, robot_loc[1] + 1), start)],
+              [(-potential(goal_loc[0] + 1, goal_loc[1] + 1), goal)]]
+
+    best = INF
+    meet = -1
+    if start == goal:
+        best = 0.0
+        meet = start
+    expansions = 0
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while True:
+        # Throw away queue entries for pixels that have been expanded already
+        for side in (0, 1):
+            queue = queues[side]
+            while queue and closed[side][queue[0][1]]:
+                heappop(queue)
+        if not queues[0] or (not queues[1] and meet != -1):
+            # Either we already have the best path, or the robot has been everywhere it can get to
+            break
+        if queues[1] and queues[0][0][0] + queues[1][0][0] >= best:
+            break
+
+        # Once the search from the goal runs out of pixels without meeting the other one, the goal can't be reached,
+        #   and only the search from the robot goes on
+        side = 0 if not queues[1] or len(queues[0]) <= len(queues[1]) else 1
+        other = 1 - side
+        queue = queues[side]
+        g_side = g[side]
+        parent_side = parent[side]
+        closed_side = closed[side]
+        g_other = g[other]
+        parent_other = parent[other]
+        sign = signs[side]
+
+        node = heappop(queue)[1]
+        closed_side[node] = True
+        expansions += 1
+
+        node_y, node_x = divmod(node, padded_width)
+        node_g = g_side[node]
+        for offset, di, dj, cost in offsets:
+            neighbor = node + offset
+            if not free[neighbor] or closed_side[neighbor]:
+                continue
+            distance = node_g + cost
+            if parent_side[neighbor] and distance >= g_side[neighbor]:
+                continue
+            g_side[neighbor] = distance
+            parent_side[neighbor] = node + 1
+            if parent_other[neighbor]:
+                # The other side has been here too, so this joins up into a whole path
+                total = distance + g_other[neighbor]
+                if total < best:
+                    best = total
+                    meet = neighbor
+            # potential() written out, this is the inner loop
+            x = node_x + di
+            y = node_y + dj
+            dx = goal_dx[x]
+            dy = goal_dy[y]
+            h_goal = dx + (SQRT2 - 1.0) * dy if dx > dy else dy + (SQRT2 - 1.0) * dx
+            dx = start_dx[x]
+            dy = start_dy[y]
+            h_start = dx + (SQRT2 - 1.0) * dy if dx > dy else dy + (SQRT2 - 1.0) * dx
+            heappush(queue, (distance + sign * (h_goal - h_start), neighbor))
+
+    if meet == -1:
+        end = closest_visited(parent_arrays[0], padded_width, goal_loc)
+        path = unpad(_trace(parent_arrays[0], end)[::-1], padded_width)
+        visited = visited_image(parent_arrays[0], height, width) | visited_image(parent_arrays[1], height, width)
+        return SearchResult(path, False, expansions, visited)
+
+    forward = _trace(parent_arrays[0], meet)[::-1]
+    backward = _trace(parent_arrays[1], meet)[1:]
+    return SearchResult(unpad(forward + backward, padded_width), True, expansions, None)
@@ -0,0 +1,147 @@
+# Planning to several frontier points at once, in a pool of worker processes
+#
+# Instead of one wavefront that scores every frontier point, the closest few points (in a straight line) can each
+#   get their own search, on their own core, and the cheapest path that gets there wins. The searches are ARA*
+#   (see ara_star.py) with a budget, so a candidate that is slow to plan to can't hold the others up for long.
+#
+# The pool is made once and kept for the whole run, so starting the processes and importing numpy and the planners
+#   only happens once. The map goes into a map_store.MapStore once per version, and the tasks only carry its
+#   version number: the workers read the passable mask straight out of shared memory.
+#
+# As soon as nothing still running could be more than tolerance cheaper than the best path so far (no path can be
+#   shorter than the octile distance to its goal), the candidates that haven't started are cancelled. The ones that
+#   have started can't be stopped, they finish within their budget and are ignored.
+
+import multiprocessing
+import os
+import time
+import weakref
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from ara_star import ara_star
+from grid_search import octile
+from map_store import MapReader, MapStore, StaleMap
+from planning_core import get_logger
+
+
+# The cheapest candidate: the goal pixel, the path to it in pixels and its length in pixels
+Candidate = namedtuple("Candidate", ["goal", "pixels", "cost"])
+
+# The MapReader of each worker process, by store name
+_readers = {}
+
+
+def _warm():
+    return os.getpid()
+
+
+def _plan(store_name, version, robot_loc, goal_loc, budget):
+    """ Runs in a worker: ARA* from the robot to one candidate
+    @return the goal and the path to it in pixels, or None if it couldn't get there in time (or the map is gone)"""
+    reader = _readers.get(store_name)
+    if reader is None:
+        reader = _readers[store_name] = MapReader(store_name)
+    try:
+        view = reader.read(version)
+    except StaleMap:
+        return goal_loc, None
+    result = ara_star(view.passable, robot_loc, goal_loc, budget=budget)
+    if not view.valid():
+        # Written over part way through, so the path may go through walls
+        return goal_loc, None
+    return goal_loc, (result.path if result.reached else None)
+
+
+def path_length(pixels):
+    """ Length of a path in pixels, straight lines between consecutive points"""
+    return float(np.hypot(*np.diff(np.asarray(pixels, dtype=float), axis=0).T).sum())
+
+
+class CandidatePool:
+    """ A warm pool of worker processes that plan to a few candidate goals at once and keep the cheapest path"""
+    def __init__(self, workers=None, budget=0.5, timeout=1.0, tolerance=0.1):
+        """
+        @param workers - how many processes, one less than the number of cores if None
+        @param budget - seconds each search can take (ARA* returns its best path so far after that)
+        @param timeout - seconds to wait for all of them, after that the best path so far wins
+        @param tolerance - stop waiting once nothing left could be more than this fraction cheaper"""
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.budget = budget
+        self.timeout = timeout
+        self.tolerance = tolerance
+        # Not forked, rospy has threads running by the time this is made
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.store = MapStore()
+        # Shared memory outlives the process unless it is removed, so remove it on the way out too (ctrl-c)
+        self._remove_store = weakref.finalize(self, self.store.close)
+        self._key = None
+        # Start every process now instead of on the first map update
+        for future in [self._executor.submit(_warm) for _ in range(self.workers)]:
+            future.result()
+
+        self.calls = 0
+        self.planned = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timed_out = 0
+
+    def best_path(self, data, passable, resolution, origin, key, robot_loc, goals):
+        """ Plan to every goal in parallel, and return the cheapest path that gets there
+        @param data - (H, W) OccupancyGrid data the passable mask was made from
+        @param passable - (H, W) boolean image, True where the robot can go
+        @param resolution - size of a pixel in meters
+        @param origin - (x, y) of pixel (0, 0) in the map frame
+        @param key - anything that changes when passable does, like the map version and known region. The map is
+            only written to the store when it changes. None if there is nothing to tell versions apart
+        @param robot_loc - where the robot is (tuple, i,j)
+        @param goals - candidate goal pixels (i, j), closest first
+        @return Candidate, or None if none of them could be reached in time"""
+        self.calls += 1
+        if key is None or key != self._key:
+            self.store.write(data, passable, resolution, origin)
+            self._key = key
+        version = self.store.version
+        robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+        futures = {}
+        for goal in goals:
+            goal = (int(goal[0]), int(goal[1]))
+            future = self._executor.submit(_plan, self.store.name, version, robot_loc, goal, self.budget)
+            futures[future] = octile(abs(goal[0] - robot_loc[0]), abs(goal[1] - robot_loc[1]))
+
+        best = None
+        pending = set(futures)
+        deadline = time.monotonic() + self.timeout
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                self.timed_out += 1
+                break
+            for future in done:
+                try:
+                    goal, pixels = future.result()
+                except Exception:
+                    get_logger().error("Planning to a candidate failed", exc_info=True)
+                    pixels = None
+                if pixels is None:
+                    self.failed += 1
+                    continue
+                self.planned += 1
+                cost = path_length(pixels)
+                if best is None or cost < best.cost:
+                    best = Candidate(goal, pixels, cost)
+            if best is not None and all(futures[future] * (1.0 + self.tolerance) >= best.cost
+                                        for future in pending):
+                break
+
+        for future in pending:
+            if future.cancel():
+                self.cancelled += 1
+        return best
+
+    def close(self):
+        """ Stop the worker processes and remove the shared memory"""
+        self._executor.shutdown(wait=False)
+        self._remove_store()
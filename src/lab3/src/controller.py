@@ -20,6 +20,7 @@ from lab2.msg import NavTargetAction, NavTargetActionGoal
 #Import path_planning and exploring code
 from path_planning import dijkstra, open_image, plot_with_path, is_free, get_neighbors
 from exploring import find_all_possible_goals, find_best_point, plot_with_explore_points, find_waypoints
+from planning_worker import PlanningWorker
 
 
 
@@ -43,8 +44,12 @@ class RobotController:
 		# Visualize the goal points.
 		self.marker_pub = rospy.Publisher('goal_points', MarkerArray, queue_size=10)
 
+		# map_update runs on its own thread, always on the newest map. Maps that come in while it is busy replace
+		# each other, so only the last one gets planned on.
+		self.planning_worker = PlanningWorker(self.map_update)
+
 		# Subscribe to the map and the map metadata.
-		self.map_sub = rospy.Subscriber('map', OccupancyGrid, self._map_callback, queue_size=10)
+		self.map_sub = rospy.Subscriber('map', OccupancyGrid, self._map_callback, queue_size=1)
 		self.map_data_sub = rospy.Subscriber('map_metadata', MapMetaData, self._map_data_callback, queue_size=10)
 
 		self.odom_pub = rospy.Subscriber('odom', Odometry, self._odom_callback, queue_size=1)
@@ -68,6 +73,7 @@ class RobotController:
 		return map_point
 
 	def _shutdown(self, sig, frame):
+		self.planning_worker.close(wait=False)
 		self.set_waypoints([])
 		sys.exit()
 
@@ -84,7 +90,9 @@ class RobotController:
 		except:
 			point = None
 
-		self.map_update(point, map, self._map_data)
+		# The pose is looked up now, so it goes with this map even if the map waits
+		if self.planning_worker.submit(point, map, self._map_data):
+			rospy.logdebug(f'Dropped a map that was never planned on ({self.planning_worker.dropped} so far)')
 
 	def _map_data_callback(self, data):
 		self._map_data = data
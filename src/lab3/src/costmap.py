@@ -0,0 +1,202 @@
+# Inflated free space for the planner and the frontier finder
+#
+# Both dijkstra and find_all_possible_goals need to know which pixels are far enough away from a wall for the
+#   robot to fit. That used to be a full-grid convolution in each of them, on every map update. A Costmap does
+#   the work once for a version of the map and hands the same masks to everyone who asks for them.
+#
+# There are two ways of inflating:
+#   "distance" - one Euclidean distance transform of the walls gives the clearance of every pixel. Any radius is
+#                then just a threshold on it, so the footprint is a circle and changing the radius is cheap
+#   "box"      - the original square kernel convolution, one per radius. Its cost grows with the kernel area
+#                and it over-inflates around corners
+
+from collections import OrderedDict
+
+import numpy as np
+from scipy.ndimage import convolve, distance_transform_edt
+
+from density import UnseenDensity
+from pyramid import min_pool, build_pyramid
+
+
+# Length of the robot, in meters
+ROBOT_LENGTH = 0.44
+
+# How far (in meters) a pixel has to be from a wall for the planner and for a frontier goal. These are half the
+#   side of the square that gets checked, and match the old 1.5x and 1.75x robot length kernels.
+PLANNING_RADIUS = ROBOT_LENGTH * 1.5 / 2
+FRONTIER_RADIUS = ROBOT_LENGTH * 1.75 / 2
+
+INFLATION_MODES = ("distance", "box")
+
+
+def map_version(header):
+    """ Key for one version of the map
+    @param header - the std_msgs Header of the OccupancyGrid
+    @return hashable key"""
+    return (header.seq, header.stamp.secs, header.stamp.nsecs)
+
+
+class Costmap:
+    """ Inflated free space masks for one thresholded image, computed the first time they are asked for"""
+    def __init__(self, im, resolution, version=None, planning_radius=PLANNING_RADIUS, frontier_radius=FRONTIER_RADIUS,
+                 inflation="distance"):
+        """
+        @param im - the thresholded image (0 wall, 128 unseen, 255 free)
+        @param resolution - size of a pixel in meters
+        @param version - key of the map this was built from, see map_version
+        @param planning_radius - clearance in meters the planner needs around the robot
+        @param frontier_radius - clearance in meters a frontier goal needs
+        @param inflation - "distance" or "box", see the top of this file"""
+        if inflation not in INFLATION_MODES:
+            raise ValueError(f"Unknown inflation mode {inflation}, expected one of {INFLATION_MODES}")
+
+        self.im = im
+        self.resolution = resolution
+        self.version = version
+        self.planning_radius = planning_radius
+        self.frontier_radius = frontier_radius
+        self.inflation = inflation
+
+        self._walls = None
+        self._clearance = None
+        self._free_areas = {}
+        self._passable = {}
+        self._coarse = {}
+        self._pyramid = None
+        self._unseen_density = None
+
+    def kernel_pixels(self, radius):
+        """ Side in pixels of the square kernel for a clearance radius in meters"""
+        return int(2 * radius / self.resolution)
+
+    def _mask_key(self, radius):
+        """ Radii that give the same mask share a cache entry"""
+        if self.inflation == "box":
+            return self.kernel_pixels(radius)
+        return radius / self.resolution
+
+    @property
+    def walls(self):
+        """ Boolean image of the wall pixels"""
+        if self._walls is None:
+            self._walls = self.im == 0
+        return self._walls
+
+    @property
+    def clearance(self):
+        """ Distance in pixels from every pixel to the center of the closest wall pixel, as float32. The outside
+        of the map counts as wall. Computed once, the first time anyone asks for it"""
+        if self._clearance is None:
+            # Pad with a ring of walls so that the edge of the map is treated like the box kernel treats it
+            not_walls = np.pad(~self.walls, 1, mode='constant', constant_values=False)
+            self._clearance = distance_transform_edt(not_walls)[1:-1, 1:-1].astype(np.float32)
+        return self._clearance
+
+    def clearance_at(self, pix):
+        """ Clearance in meters of one pixel
+        @param pix - the pixel i,j"""
+        return float(self.clearance[pix[1], pix[0]]) * self.resolution
+
+    def free_areas(self, radius):
+        """ Pixels that have no wall within radius (meters). Outside the map counts as wall
+        @param radius - clearance in meters
+        @return boolean image"""
+        key = self._mask_key(radius)
+        if key not in self._free_areas:
+            if self.inflation == "box":
+                kernel = np.ones((key, key))
+                convolve_result = convolve(self.walls, kernel, mode='constant', cval=1)
+                self._free_areas[key] = convolve_result == 0
+            else:
+                self._free_areas[key] = self.clearance > key
+        return self._free_areas[key]
+
+    def passable(self, radius):
+        """ Pixels the robot can drive through: free, and with no wall within radius (meters)
+        @param radius - clearance in meters
+        @return boolean image"""
+        key = self._mask_key(radius)
+        if key not in self._passable:
+            self._passable[key] = (self.im == 255) & self.free_areas(radius)
+        return self._passable[key]
+
+    @property
+    def planning_free_areas(self):
+        return self.free_areas(self.planning_radius)
+
+    @property
+    def planning_passable(self):
+        return self.passable(self.planning_radius)
+
+    @property
+    def frontier_free_areas(self):
+        return self.free_areas(self.frontier_radius)
+
+    def coarse(self, factor):
+        """ Costmap of this map shrunk by factor. A coarse pixel is a wall if any of the pixels it covers is, and
+        free only if all of them are (see pyramid.min_pool). Inflation is done again at the coarse resolution
+        @param factor - how much to shrink by
+        @return Costmap"""
+        if factor not in self._coarse:
+            self._coarse[factor] = Costmap(min_pool(self.im, factor, 128), self.resolution * factor, self.version,
+                                           self.planning_radius, self.frontier_radius, self.inflation)
+        return self._coarse[factor]
+
+    @property
+    def planning_pyramid(self):
+        """ The planning passable mask at 1x, 2x, 4x and 8x, for pyramid.coarse_to_fine. A coarse pixel is only
+        passable if all of the full resolution pixels it covers are"""
+        if self._pyramid is None:
+            self._pyramid = build_pyramid(self.planning_passable)
+        return self._pyramid
+
+    @property
+    def unseen_density(self):
+        """ density.UnseenDensity of this map, for how much is unseen around a point at any radius"""
+        if self._unseen_density is None:
+            self._unseen_density = UnseenDensity(self.im)
+        return self._unseen_density
+
+
+class CostmapCache:
+    """ Keeps the costmaps of the last few versions of the map"""
+    def __init__(self, max_versions=2, planning_radius=PLANNING_RADIUS, frontier_radius=FRONTIER_RADIUS,
+                 inflation="distance"):
+        """
+        @param max_versions - how many costmaps (a version of the map and how it was cropped) to keep around
+        @param planning_radius - clearance in meters the planner needs around the robot
+        @param frontier_radius - clearance in meters a frontier goal needs
+        @param inflation - "distance" or "box", see the top of this file"""
+        self.max_versions = max_versions
+        self.planning_radius = planning_radius
+        self.frontier_radius = frontier_radius
+        self.inflation = inflation
+        self._costmaps = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, im, resolution, origin=None):
+        """ The costmap for a version of the map, building it if we haven't seen this version yet
+        The same version cropped differently (see known_region) is a different image, so the crop is part of the key
+        @param version - key of the map, see map_version
+        @param im - the thresholded image of that version
+        @param resolution - size of a pixel in meters
+        @param origin - (x, y) of pixel (0, 0) of im in the map frame, for a crop of the map
+        @return Costmap"""
+        key = (version, im.shape, None if origin is None else tuple(float(v) for v in origin), resolution)
+        if key in self._costmaps:
+            self.hits += 1
+            self._costmaps.move_to_end(key)
+            return self._costmaps[key]
+
+        self.misses += 1
+        costmap = Costmap(im, resolution, version, self.planning_radius, self.frontier_radius, self.inflation)
+        self._costmaps[key] = costmap
+        while len(self._costmaps) > self.max_versions:
+            self._costmaps.popitem(last=False)
+        return costmap
+
+    def clear(self):
+        self._costmaps.clear()
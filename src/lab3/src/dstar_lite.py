@@ -0,0 +1,270 @@
+# Incremental replanning with D* Lite
+#
+# Consecutive gmapping maps only differ in a handful of pixels, and the robot has usually only moved a little,
+#   so most of the previous search is still right. D* Lite searches backwards from the goal and keeps its g and
+#   rhs values between calls. On the next call only the pixels whose neighborhood changed (and the new start)
+#   get repaired, instead of searching again from scratch.
+#
+# A full search is done when there is nothing to repair from: the first call, a new goal, or a map that changed
+#   size or moved its origin. Very large changes also get a full search, since repairing them costs more.
+#
+# Koenig and Likhachev, "D* Lite", AAAI 2002 (the optimized version, with lazy removal from the queue).
+
+import heapq
+
+import numpy as np
+
+from grid_search import SQRT2, SearchResult, padded_grid, neighbor_offsets, unpad, astar
+
+
+INF = float("inf")
+
+# Path costs are sums of 1s and sqrt(2)s added up in different orders, so two keys that should tie can be off by
+#   a rounding error. The first part of a key is rounded to this many decimals so that ties really are ties, in
+#   the queue and in the stopping test
+KEY_DECIMALS = 9
+
+
+class DStarLite:
+    """ D* Lite planner that keeps its search between calls. Call plan() with each new passable mask"""
+    def __init__(self, max_changed_fraction=0.05):
+        """
+        @param max_changed_fraction - if more than this fraction of the pixels changed, do a full search instead"""
+        self.max_changed_fraction = max_changed_fraction
+
+        self._free = None
+        self._shape = None
+        self._origin = None
+        self._goal = None
+        self._start = None
+        self._km = 0.0
+        self._g = None
+        self._rhs = None
+        self._open = {}
+        self._queue = []
+
+        # How the last few calls went, for logging
+        self.full_searches = 0
+        self.repairs = 0
+        self.last_changed = 0
+
+    def reset(self):
+        """ Forget the search, so the next call starts from scratch"""
+        self._free = None
+
+    def _heuristic(self, a, b):
+        ay, ax = divmod(a, self._padded_width)
+        by, bx = divmod(b, self._padded_width)
+        dx = abs(ax - bx)
+        dy = abs(ay - by)
+        if dx > dy:
+            return dx + (SQRT2 - 1.0) * dy
+        return dy + (SQRT2 - 1.0) * dx
+
+    def _key(self, node):
+        m = min(self._g[node], self._rhs[node])
+        return (round(m + self._heuristic(self._start, node) + self._km, KEY_DECIMALS), m)
+
+    def _update_vertex(self, node):
+        """ Recompute rhs of a node from its successors, and put it on (or take it off) the queue"""
+        g = self._g
+        rhs = self._rhs
+        free = self._free_mv
+        if node != self._goal:
+            best = INF
+            for offset, _, _, cost in self._offsets:
+                neighbor = node + offset
+                if free[neighbor]:
+                    value = g[neighbor] + cost
+                    if value < best:
+                        best = value
+            rhs[node] = best
+        self._push(node)
+
+    def _push(self, node):
+        """ Put a node on the queue if it is inconsistent, take it off if it isn't"""
+        if self._g[node] != self._rhs[node]:
+            key = self._key(node)
+            self._open[node] = key
+            heapq.heappush(self._queue, (key[0], key[1], node))
+        else:
+            self._open.pop(node, None)
+
+    def _update_predecessors(self, node):
+        # Only pixels the robot can be in need a g value: free ones, and the start (which might be inside the
+        #   inflation). This also keeps the search from wandering off into the padding
+        free = self._free_mv
+        start = self._start
+        for offset, _, _, _ in self._offsets:
+            neighbor = node + offset
+            if free[neighbor] or neighbor == start:
+                self._update_vertex(neighbor)
+
+    def _lower_predecessors(self, node):
+        """ g of node just went down, so going through it might now be the best way for its neighbors. Cheaper
+        than _update_predecessors, since only the one new option needs checking"""
+        free = self._free_mv
+        start = self._start
+        goal = self._goal
+        rhs = self._rhs
+        node_g = self._g[node]
+        if not free[node]:
+            # Nobody can move into this pixel
+            return
+        for offset, _, _, cost in self._offsets:
+            neighbor = node + offset
+            if neighbor != goal and (free[neighbor] or neighbor == start):
+                value = node_g + cost
+                if value < rhs[neighbor]:
+                    rhs[neighbor] = value
+                    self._push(neighbor)
+
+    def _raise_predecessors(self, node, old_g):
+        """ g of node just went up, so only the neighbors that were going through it need a new rhs"""
+        free = self._free_mv
+        start = self._start
+        rhs = self._rhs
+        if not free[node]:
+            return
+        for offset, _, _, cost in self._offsets:
+            neighbor = node + offset
+            if (free[neighbor] or neighbor == start) and rhs[neighbor] == old_g + cost:
+                self._update_vertex(neighbor)
+
+    def _compute_shortest_path(self):
+        """ Process the queue until the start is consistent
+        @return number of expansions"""
+        g = self._g
+        rhs = self._rhs
+        start = self._start
+        queue = self._queue
+        open_keys = self._open
+        expansions = 0
+        while queue:
+            k1, k2, node = queue[0]
+            if open_keys.get(node) != (k1, k2):
+                # Stale entry, this node was updated or taken off since it was pushed
+                heapq.heappop(queue)
+                continue
+            start_key = self._key(start)
+            if (k1, k2) >= start_key and rhs[start] == g[start]:
+                break
+
+            heapq.heappop(queue)
+            expansions += 1
+            new_key = self._key(node)
+            if (k1, k2) < new_key:
+                open_keys[node] = new_key
+                heapq.heappush(queue, (new_key[0], new_key[1], node))
+            elif g[node] > rhs[node]:
+                g[node] = rhs[node]
+                del open_keys[node]
+                self._lower_predecessors(node)
+            else:
+                old_g = g[node]
+                g[node] = INF
+                self._update_vertex(node)
+                self._raise_predecessors(node, old_g)
+        return expansions
+
+    def _initialize(self, free, shape, origin, start, goal):
+        self._free = free
+        self._free_mv = memoryview(free)
+        self._shape = shape
+        self._origin = origin
+        self._padded_width = shape[1] + 2
+        self._size = free.size
+        self._offsets = neighbor_offsets(self._padded_width)
+        self._start = start
+        self._goal = goal
+        self._km = 0.0
+        # float64, float32 rounding is big enough to break ties the wrong way
+        self._g_array = np.full(free.size, INF, dtype=np.float64)
+        self._rhs_array = np.full(free.size, INF, dtype=np.float64)
+        self._g = memoryview(self._g_array)
+        self._rhs = memoryview(self._rhs_array)
+        self._rhs[goal] = 0.0
+        key = self._key(goal)
+        self._open = {goal: key}
+        self._queue = [(key[0], key[1], goal)]
+
+    def _extract_path(self):
+        """ Follow the cheapest successor from the start down to the goal
+        @return list of flat ids, or None if the start can't reach the goal"""
+        g = self._g
+        free = self._free_mv
+        if g[self._start] == INF:
+            return None
+        path = [self._start]
+        node = self._start
+        # Every step takes at least 1 off g, so this only stops a broken search from looping forever
+        for _ in range(int(g[self._start]) + 2):
+            if node == self._goal:
+                return path
+            best = INF
+            best_neighbor = -1
+            for offset, _, _, cost in self._offsets:
+                neighbor = node + offset
+                if free[neighbor]:
+                    value = g[neighbor] + cost
+                    if value < best:
+                        best = value
+                        best_neighbor = neighbor
+            if best_neighbor == -1:
+                return None
+            node = best_neighbor
+            path.append(node)
+        return None
+
+    def plan(self, passable, robot_loc, goal_loc, origin=None):
+        """ Plan from robot_loc to goal_loc, reusing the last search if we can
+        If the goal cannot be reached, falls back to grid_search.astar, which goes as close as it can.
+        @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+        @param robot_loc - where the robot is (tuple, i,j)
+        @param goal_loc - where to go to (tuple, i,j)
+        @param origin - (x, y) of the map origin. The search starts over if this changes
+        @return SearchResult"""
+        height, width = passable.shape
+        padded_width = width + 2
+        start = (int(robot_loc[1]) + 1) * padded_width + int(robot_loc[0]) + 1
+        goal = (int(goal_loc[1]) + 1) * padded_width + int(goal_loc[0]) + 1
+        free = padded_grid(passable)
+
+        full = (self._free is None or self._shape != passable.shape or self._origin != origin
+                or self._goal != goal)
+        if not full:
+            changed = np.flatnonzero(free != self._free)
+            self.last_changed = len(changed)
+            full = len(changed) > self.max_changed_fraction * free.size
+
+        if full:
+            self._initialize(free, passable.shape, origin, start, goal)
+            self.full_searches += 1
+            self.last_changed = 0
+        else:
+            self.repairs += 1
+            # The heuristic is measured from the start, so when the robot moves every key already on the queue is
+            #   too big by at most the distance it moved
+            self._km += self._heuristic(self._start, start)
+            self._start = start
+            self._free = free
+            self._free_mv = memoryview(free)
+            for node in changed.tolist():
+                if free[node]:
+                    # Newly open, its own value was never kept up to date while it was blocked
+                    self._update_vertex(node)
+                else:
+                    self._g[node] = INF
+                    self._rhs[node] = INF
+                    self._open.pop(node, None)
+                # Moving into this pixel got cheaper or more expensive, so everything next to it needs a look
+                self._update_predecessors(node)
+            # The new start might be a pixel that was never worth keeping up to date
+            self._update_vertex(start)
+
+        expansions = self._compute_shortest_path()
+        ids = self._extract_path()
+        if ids is None:
+            fallback = astar(passable, robot_loc, goal_loc)
+            return SearchResult(fallback.path, False, expansions + fallback.expansions, fallback.visited)
+        return SearchResult(unpad(ids, padded_width), True, expansions, None)
@@ -16,16 +16,17 @@
 
 # The ever-present numpy
 import numpy as np
-from scipy.ndimage import convolve
 
 # Your path planning code
 import path_planning as path_planning
 # Our priority queue
 import heapq
 
-# Using imageio to read in the image
-import rospy
+from density import UnseenDensity
 from helpers import world_to_map
+# The exploring itself, without ROS
+from planning_core import as_tree, cheapest_frontier, closest_frontier, frontier_clusters, frontier_points, \
+    get_logger, informative_frontier, MIN_CLUSTER_LENGTH
 
 
 # -------------- Showing start and end and path ---------------
@@ -120,130 +121,104 @@ def is_reachable(im, pix):
         return True
 
 
-def find_all_possible_goals(im, map_data):
+def find_all_possible_goals(im, map_data, costmap=None, factor=1):
     """ Find all of the places where you have a pixel that is unseen next to a pixel that is free
     It is probably easier to do this, THEN cull it down to some reasonable places to try
     This is because of noise in the map - there may be some isolated pixels
     @param im - thresholded image
+    @param map_data - MapMetaData, for the resolution of the map
+    @param costmap - Costmap of this version of the map, so the inflation can be shared. Built here if None
+    @param factor - look for them on the map shrunk by this much (see Costmap.coarse), which is quicker and gives
+        fewer points. The points are still full resolution pixels, the middle of each coarse one
     @return dictionary or list or binary image of possible pixels"""
 
-    # YOUR CODE HERE
-    
-    # Define masks for unseen and free pixels
-    unseen_mask = (im == 128)  # Replace with the actual value for "unseen" pixels
-    free_mask = (im == 255)  # Replace with the actual value for "free" pixels
-    
-    # Define a convolution kernel to check for adjacent unseen pixels
-    kernel = np.array([[1, 1, 1],
-                       [1, 0, 1],
-                       [1, 1, 1]])
-    
-    #print(f"unseen_mask shape: {unseen_mask.shape}")
-    #print(f"kernel shape: {kernel.shape}")
-    #print(f"map shape: {map.shape}")
-    #print(f"freemask shape: {free_mask.shape}")
+    return frontier_points(im, map_data.resolution, costmap, factor)
+
+
+def find_frontier_clusters(im, map_data, costmap=None, min_length=MIN_CLUSTER_LENGTH):
+    """ The same pixels as find_all_possible_goals, in arrays and grouped into connected clusters, without the ones
+    that are too small to be anything but noise
+    @param im - thresholded image
+    @param map_data - MapMetaData, for the resolution of the map
+    @param costmap - Costmap of this version of the map, so the inflation can be shared. Built here if None
+    @param min_length - smallest cluster that is kept, in meters of frontier
+    @return planning_core.Frontiers"""
+    return frontier_clusters(im, map_data.resolution, costmap, min_length)
 
-    robot_height_in_pixels = int(0.44 / map_data.resolution * 1.75)
-    robot_kernel = np.ones((robot_height_in_pixels, robot_height_in_pixels))
-    
-    unseen_or_blocked_areas = (im == 0)
-    convolve_result = convolve(unseen_or_blocked_areas, robot_kernel, mode='constant', cval=1)
-    free_areas = convolve_result == 0
-
-    # Identify unseen neighbors by convolving the unseen_mask
-    unseen_neighbors = convolve(unseen_mask.astype(int), kernel, mode="constant", cval=0)
-    # Find free pixels that are adjacent to unseen pixels
-    valid_points_mask = free_mask & (unseen_neighbors > 0) & free_areas
-    # Get coordinates of valid points
-    valid_points = np.argwhere(valid_points_mask)
-    # Swap axes if needed
-    valid_points_swapped = [(y, x) for (x, y) in valid_points] #np.column_stack((valid_points[:,1], valid_points[:0]))
-    #print(valid_points_swapped)
-    
-    # Filter points to include only reachable ones
-    reachable_points = [point for point in valid_points_swapped if is_reachable(im, point)]
-    #mask = is_reachable(im, valid_points_swapped)
-    #reachable_points = valid_points_swapped[mask]
-    # Return as set of tuples (row, column format)
-    return set(map(tuple, reachable_points))
-    
 
 def find_best_point(possible_points, robot_loc):
     """ Pick one of the unseen points to go to
-    @param im - thresholded image
-    @param possible_points - possible points to chose from
+    @param possible_points - possible points to chose from, a set of (i, j), an (N, 2) array or a FrontierTree
     @param robot_loc - location of the robot (in case you want to factor that in)
+    @return the closest point (i, j), or None if there are no points
     """
     # YOUR CODE HERE
-    min_distance = float('inf')
-    closest_point = None
-    i, j = robot_loc
-    for x, y in possible_points:
-        distance = np.sqrt((i - x)**2 + (j - y)**2)
-        if distance < min_distance:
-            min_distance = distance
-            closest_point = (x, y)
-
-    return closest_point
+    tree = as_tree(possible_points)
+    closest_point, _ = tree.nearest(robot_loc)
+    return None if closest_point is None else tree.point(closest_point)
 
 def find_closest_point(possible_points, robot_loc, map_data):
-    points = np.array(list(possible_points))
-    distances = np.linalg.norm(points - robot_loc, axis=1)
-    robot_map_area = np.linalg.norm((0.22 / map_data.resolution, 0.19 / map_data.resolution))
-    idx_not_under_robot = np.where(distances >= robot_map_area * 10)[0]
+    return closest_frontier(possible_points, robot_loc, map_data.resolution)
+
+
+def find_cheapest_point(possible_points, robot_loc, map_data, field):
+    """ Pick the frontier point that is cheapest to drive to, by path cost instead of straight line distance
+    Points right next to the robot are skipped, the same as find_closest_point
+    @param possible_points - possible points to chose from
+    @param robot_loc - location of the robot
+    @param map_data - MapMetaData, for the resolution of the map
+    @param field - grid_search.CostField from the robot, on the planning passable mask
+    @return the best point (i, j) and its path cost in pixels, or None, inf if none of them can be reached"""
+    return cheapest_frontier(possible_points, robot_loc, map_data.resolution, field)
 
-    best_point_idx = idx_not_under_robot[np.argmin(distances[idx_not_under_robot])]
-    best_point = points[best_point_idx]
-    rospy.logerr(f"Closest point found is: {best_point}")
-    return best_point
+
+def find_most_informative_point(possible_points, robot_loc, map_data, field, im, gain):
+    """ Pick the frontier point with the best trade off between the unseen map the laser would see from there and
+    the path cost to get there
+    @param possible_points - possible points to chose from
+    @param robot_loc - location of the robot
+    @param map_data - MapMetaData, for the resolution of the map
+    @param field - grid_search.CostField from the robot, on the planning passable mask
+    @param im - thresholded image
+    @param gain - info_gain.InformationGain
+    @return the best point (i, j) and its score, or None, 0 if none of them can be reached"""
+    return informative_frontier(possible_points, robot_loc, map_data.resolution, field, im, gain)
 
 
 def find_furthest_point(possible_points, robot_loc):
     """
     Pick the furthest point to go to.
     
-    @param possible_points: possible points to choose from
+    @param possible_points: possible points to choose from, a set of (i, j), an (N, 2) array or a FrontierTree
     @param robot_loc: location of the robot (x, y)
+    @return the furthest point (i, j), or None if there are no points
     """
-    max_distance = -float('inf')  # Start with the smallest possible value
-    furthest_point = None
-    i, j = robot_loc
-
-    for x, y in possible_points:
-        distance = np.sqrt((i - x)**2 + (j - y)**2)  # Calculate Euclidean distance
-        if distance > max_distance:  # Compare with max_distance
-            max_distance = distance
-            furthest_point = (x, y)
+    tree = as_tree(possible_points)
+    furthest_point, _ = tree.furthest(robot_loc)
+    return None if furthest_point is None else tree.point(furthest_point)
 
-    return furthest_point
-
-def find_highest_concentration_point(possible_points, im, map_data, radius=0.5):
-    radius_pixels = 10 #int(radius / map_data.resolution)
-    
-    # Create a binary image of all target points (where im == 128)
-    target_points = np.zeros_like(im, dtype=float)
-    target_points[im == 128] = 1
-    
-    # Create circular kernel
-    y, x = np.ogrid[-radius_pixels:radius_pixels+1, -radius_pixels:radius_pixels+1]
-    kernel = x*x + y*y <= radius_pixels*radius_pixels
-    kernel = kernel.astype(float)
-    
-    # Apply convolution to count nearby points
-    concentration_map = convolve(target_points, kernel, mode='constant', cval=0.0)
-    
-    # Create a mask of possible points
-    possible_points = np.array(list(possible_points))
-    points_mask = np.zeros_like(im, dtype=bool)
-    points_mask[possible_points[:, 0].astype(int), possible_points[:, 1].astype(int)] = True
-    
-    # Mask the concentration map to only look at possible points
-    masked_concentration = np.where(points_mask, concentration_map, -1)
-    
-    # Find the point with highest concentration
-    max_idx = np.unravel_index(np.argmax(masked_concentration), masked_concentration.shape)
-    rospy.loginfo(f"max_idx type: {type(max_idx)}, {max_idx}")
-    return max_idx
+def find_highest_concentration_point(possible_points, im, map_data, radius=0.5, costmap=None, shape="disk"):
+    """ Pick the point with the most unseen map around it
+    @param possible_points - possible points to chose from, a set of (i, j), an (N, 2) array or a FrontierTree
+    @param im - thresholded image
+    @param map_data - MapMetaData, for the resolution of the map
+    @param radius - how far around each point to count, in meters. Any radius costs the same, see density.py
+    @param costmap - Costmap of this version of the map, so the unseen counts are only added up once per version.
+        Built here if None
+    @param shape - "disk", or "box" for the square around the point, which is a little quicker
+    @return the best point (i, j), or None if there are no points"""
+    points = as_tree(possible_points).points.astype(np.intp)
+    if len(points) == 0:
+        return None
+    density = costmap.unseen_density if costmap is not None else UnseenDensity(im)
+    radius_pixels = radius / map_data.resolution
+    if shape == "box":
+        fractions = density.box(points, radius_pixels)
+    else:
+        fractions = density.disk(points, radius_pixels)
+    best = int(np.argmax(fractions))
+    get_logger().debug("Highest concentration %.2f unseen at %s", fractions[best], points[best])
+    return tuple(int(v) for v in points[best])
 
 
 def calculate_distance(point1, point2):
@@ -257,7 +232,7 @@ def calculate_vector(point1, point2):
 def find_waypoints(im, path):
     """ Place waypoints along the path
     @param im - the thresholded image
-    @param path - the initial path
+    @param path - the initial path, as a list or (N, 2) array of points
     @ return - a new path"""
 
     # Again, no right answer here
@@ -271,26 +246,34 @@ def find_waypoints(im, path):
         waypoints.append(path[i])
 
     # Add the last point as a waypoint if it's not already included
-    if len(waypoints) == 0 or waypoints[-1] != path[-1]:
+    if len(waypoints) == 0 or (len(path) - 1) % 10 != 0:
         waypoints.append(path[-1])
 
     return waypoints
 
 
-if __name__ == '__main__':
-    # Doing this here because it is a different yaml than JN
-    import yaml_1 as yaml
+def find_corner_waypoints(path):
+    """ Waypoints for a path that is already only its corners (see theta_star): all of them except the first one,
+    which is where the robot is
+    @param path - the corners, as a list or (N, 2) array of points
+    @return - list of waypoints"""
+    if len(path) < 2:
+        return list(path)
+    return list(path[1:])
 
-    im, im_thresh = path_planning.open_image("map.pgm")
+
+if __name__ == '__main__':
+    im, im_thresh, map_data = path_planning.open_image("map.pgm")
 
     robot_start_loc = (1940, 1953)
 
-    all_unseen = find_all_possible_goals(im_thresh)
-    best_unseen = find_best_point(im_thresh, all_unseen, robot_loc=robot_start_loc)
+    all_unseen = find_all_possible_goals(im_thresh, map_data)
+    best_unseen = find_best_point(all_unseen, robot_loc=robot_start_loc)
 
     plot_with_explore_points(im_thresh, zoom=0.1, robot_loc=robot_start_loc, explore_points=all_unseen, best_pt=best_unseen)
 
-    path = path_planning.dijkstra(im_thresh, robot_start_loc, best_unseen, 50)
+    path = path_planning.map_to_pixels(path_planning.dijkstra(im_thresh, robot_start_loc, best_unseen, map_data),
+                                       map_data)
     waypoints = find_waypoints(im_thresh, path)
     path_planning.plot_with_path(im, im_thresh, zoom=0.1, robot_loc=robot_start_loc, goal_loc=best_unseen, path=waypoints)
 
@@ -0,0 +1,134 @@
+# Keeping the frontier up to date from one map to the next
+#
+# Between two versions of the map only the cells the laser could see change, but finding the frontier from scratch
+#   thresholds, convolves and searches the whole known area every time. A FrontierIndex keeps the frontier mask of
+#   the known region and, for a new version, only works it out again in a window around where the robot has been
+#   since the last one, as far as the laser reaches (laser_window). It doesn't look at the map outside of that window
+#   at all, so an update costs the same however much has been explored. Nothing is kept for the rest of the gmapping
+#   grid, which can be many times bigger, so the memory goes with how much has been explored.
+#
+# Whether a pixel is on the frontier depends on its 3 x 3 neighborhood, and on whether there is a wall within the
+#   frontier radius (Costmap.frontier_free_areas). So a changed cell can only change pixels within that radius plus
+#   one of it, and the window is padded by that much. The known region the Explorer crops to is padded so that
+#   anything computed on the crop comes out the same as on the full map, which means the mask stays good when the
+#   region grows.
+#
+# Everything is built again when gmapping moves the origin or resizes the map, when the resolution changes, when
+#   the region shrinks (nothing is kept for the pixels that leave it), when there is no window, and every
+#   rebuild_every updates, in case gmapping moved some walls outside of the windows when it closed a loop.
+
+import math
+
+import numpy as np
+from scipy.ndimage import convolve
+
+from costmap import FRONTIER_RADIUS
+from known_region import Region
+
+
+def frontier_mask(im, free_areas):
+    """ planning_core.frontier_points as a boolean image, True on the frontier
+    @param im - the thresholded image, or a window of it
+    @param free_areas - Costmap.frontier_free_areas of the same pixels"""
+    unseen_mask = im == 128
+    free_mask = im == 255
+    kernel = np.array([[1, 1, 1],
+                       [1, 0, 1],
+                       [1, 1, 1]])
+    # Free pixels with an unseen neighbor, and a free neighbor so the robot can get to them
+    unseen_neighbors = convolve(unseen_mask.astype(np.uint8), kernel, mode="constant", cval=0)
+    free_neighbors = convolve(free_mask.astype(np.uint8), kernel, mode="constant", cval=0)
+    return free_mask & (unseen_neighbors > 0) & (free_neighbors > 0) & free_areas
+
+
+class FrontierIndex:
+    """ The frontier of the last version of the map, updated where the laser can have changed it"""
+    def __init__(self, frontier_radius=FRONTIER_RADIUS, rebuild_every=50):
+        """
+        @param frontier_radius - clearance in meters a frontier pixel needs, the same as the Costmap's
+        @param rebuild_every - how many updates in a row can go by before the mask is built from scratch again"""
+        self.frontier_radius = frontier_radius
+        self.rebuild_every = rebuild_every
+        # Frontier of the last region, in its pixels
+        self.mask = None
+        self._key = None
+        self._region = None
+        self._since_rebuild = 0
+
+        self.rebuilds = 0
+        self.updates = 0
+        self.pixels_updated = 0
+
+    def update(self, data, region, im, costmap, origin, resolution, window=None):
+        """ Bring the frontier up to date with a new version of the map
+        @param data - (H, W) OccupancyGrid data of the full map
+        @param region - known_region.Region that im and costmap are the crop of
+        @param im - thresholded image of the region
+        @param costmap - Costmap of im
+        @param origin - (x, y) of pixel (0, 0) of the full map in the map frame
+        @param resolution - size of a pixel in meters
+        @param window - known_region.Region of the full map with every cell that can have changed since the last
+            update in it, see laser_window. If None the mask is built from scratch
+        @return boolean image of the frontier in the region, the same pixels as im. Don't change it, the next update
+            uses it"""
+        key = (data.shape, tuple(origin), resolution)
+        previous = self._region
+        if self.mask is None or key != self._key or not _contains(region, previous) or window is None or \
+                self._since_rebuild >= self.rebuild_every:
+            self._rebuild(region, im, costmap, key)
+            return self.mask
+
+        self.updates += 1
+        self._since_rebuild += 1
+        if region != previous:
+            # The region grew. Nothing outside the last one was known, so there was no frontier there, and whatever
+            #   is known there now was seen by the laser, so it is in the window
+            mask = np.zeros(region.shape, dtype=bool)
+            mask[previous.y0 - region.y0:previous.y1 - region.y0, previous.x0 - region.x0:previous.x1 - region.x0] = \
+                self.mask
+            self.mask = mask
+        self._region = region
+
+        # The window and everything within reach of it, in the region's pixels
+        reach = int(math.ceil(self.frontier_radius / resolution)) + 1
+        top, bottom = max(window.y0 - reach, region.y0) - region.y0, min(window.y1 + reach, region.y1) - region.y0
+        left, right = max(window.x0 - reach, region.x0) - region.x0, min(window.x1 + reach, region.x1) - region.x0
+        if top >= bottom or left >= right:
+            return self.mask
+
+        # With a pixel around it for the neighbors, then only the inside is kept
+        halo_top, halo_left = max(top - 1, 0), max(left - 1, 0)
+        box = (slice(halo_top, bottom + 1), slice(halo_left, right + 1))
+        local = frontier_mask(im[box], costmap.frontier_free_areas[box])
+        self.mask[top:bottom, left:right] = local[top - halo_top:bottom - halo_top, left - halo_left:right - halo_left]
+        self.pixels_updated += (bottom - top) * (right - left)
+        return self.mask
+
+    def _rebuild(self, region, im, costmap, key):
+        self.rebuilds += 1
+        self._since_rebuild = 0
+        self._key = key
+        self._region = region
+        self.mask = frontier_mask(im, costmap.frontier_free_areas)
+
+
+def laser_window(points, max_range, resolution, shape):
+    """ Box of the full map the laser can have seen since the last update
+    @param points - pixels (i, j) of the full map the robot has been at since the last update, like where it was
+        then and where it is now. The robot is taken to have gone in a straight line between them
+    @param max_range - laser range in meters
+    @param resolution - size of a pixel in meters
+    @param shape - (H, W) of the full map
+    @return known_region.Region, clipped to the map"""
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    reach = int(math.ceil(max_range / resolution)) + 1
+    height, width = shape
+    x0, y0 = points.min(axis=0) - reach
+    x1, y1 = points.max(axis=0) + reach + 1
+    return Region(int(max(x0, 0)), int(max(y0, 0)), int(min(x1, width)), int(min(y1, height)))
+
+
+def _contains(region, other):
+    """ Is other (a Region, or None) inside region?"""
+    return other is not None and region.x0 <= other.x0 and region.y0 <= other.y0 and \
+        region.x1 >= other.x1 and region.y1 >= other.y1
@@ -0,0 +1,108 @@
+# Nearest frontier points without going through all of them
+#
+# Every way of picking a frontier point starts with a question about straight line distance to the robot: which
+#   point is closest, which few are closest, which are within some radius, and which are too close to be worth going
+#   to (the ones "under the robot"). Each of them used to turn the points into an array again and measure the
+#   distance to every one of them, and some did it in a Python loop. A FrontierTree is a k-d tree
+#   (scipy.spatial.cKDTree) over one set of frontier points, built once and handed to every strategy, so each of
+#   those is a walk down the tree instead.
+#
+# The exclusion zone is a disk around the robot. Points strictly inside it don't count, the same as the old
+#   distance < radius test. Ties in distance go to the point that comes first, the same as np.argmin did.
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class FrontierTree:
+    """ k-d tree over one set of frontier points"""
+    def __init__(self, points):
+        """
+        @param points - a set of (i, j), or an (N, 2) array (like Frontiers.cells)"""
+        if isinstance(points, np.ndarray):
+            self.points = points.reshape(-1, 2)
+        else:
+            self.points = np.array(list(points), dtype=np.int32).reshape(-1, 2)
+        self.tree = cKDTree(self.points) if len(self.points) else None
+
+    def __len__(self):
+        return len(self.points)
+
+    def excluded(self, loc, exclude):
+        """ Indices of the points strictly closer than exclude to loc
+        @param loc - (i, j)
+        @param exclude - radius in pixels
+        @return (M,) indices into points"""
+        if self.tree is None or exclude <= 0:
+            return np.zeros(0, dtype=np.intp)
+        # A hair bigger so the tree's rounding can't leave anything out, then the exact test. The ball includes its
+        #   edge, the exclusion zone doesn't
+        inside = self.within(loc, exclude * (1 + 1e-9) + 1e-9)
+        return inside[self._distances(loc, inside) < exclude]
+
+    def outside(self, loc, exclude):
+        """ Which points are not in the exclusion zone
+        @param loc - (i, j)
+        @param exclude - radius in pixels
+        @return (N,) boolean"""
+        keep = np.ones(len(self.points), dtype=bool)
+        keep[self.excluded(loc, exclude)] = False
+        return keep
+
+    def k_nearest(self, loc, count, exclude=0.0):
+        """ The closest points to loc that aren't in the exclusion zone
+        @param loc - (i, j)
+        @param count - how many
+        @param exclude - radius in pixels of the exclusion zone around loc
+        @return (M,) indices into points, closest first, and (M,) their distances. M is at most count"""
+        if self.tree is None or count <= 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        # Whatever is in the exclusion zone comes first, so ask for that many more. Then everything out to the
+        #   distance of the last one, so that points tied with it aren't left out depending on how the tree is split
+        k = min(len(self.excluded(loc, exclude)) + count, len(self.points))
+        distances, _ = self.tree.query(loc, k=k)
+        reach = float(np.max(distances))
+        indices = self.within(loc, reach * (1 + 1e-9) + 1e-9)
+        distances = self._distances(loc, indices)
+        keep = distances >= exclude
+        distances, indices = distances[keep], indices[keep]
+        order = np.argsort(distances, kind="stable")[:count]
+        return indices[order], distances[order]
+
+    def nearest(self, loc, exclude=0.0):
+        """ The closest point to loc that isn't in the exclusion zone
+        @param loc - (i, j)
+        @param exclude - radius in pixels of the exclusion zone around loc
+        @return index into points and its distance, or None, inf if every point is in the zone"""
+        indices, distances = self.k_nearest(loc, 1, exclude)
+        if len(indices) == 0:
+            return None, np.inf
+        return int(indices[0]), float(distances[0])
+
+    def within(self, loc, radius):
+        """ The points no further than radius from loc
+        @param loc - (i, j)
+        @param radius - in pixels
+        @return (M,) indices into points, in order"""
+        if self.tree is None:
+            return np.zeros(0, dtype=np.intp)
+        return np.sort(np.asarray(self.tree.query_ball_point(loc, radius), dtype=np.intp))
+
+    def furthest(self, loc):
+        """ The point furthest from loc. A k-d tree doesn't help with that, so this one looks at all of them
+        @param loc - (i, j)
+        @return index into points and its distance, or None, -inf if there are no points"""
+        if len(self.points) == 0:
+            return None, -np.inf
+        distances = self._distances(loc)
+        best = int(np.argmax(distances))
+        return best, float(distances[best])
+
+    def _distances(self, loc, indices=None):
+        """ Straight line distances from loc to the points (all of them if indices is None)"""
+        points = self.points if indices is None else self.points[indices]
+        return np.linalg.norm(points - np.asarray(loc), axis=1)
+
+    def point(self, index):
+        """ Point index as a tuple (i, j) of ints"""
+        return tuple(int(v) for v in self.points[index])
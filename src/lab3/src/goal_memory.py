@@ -0,0 +1,126 @@
+# Remembering how going to a frontier point turned out
+#
+# When the planner can't get to a frontier point, or the robot stops making progress on the way to one (the 8 second
+#   rule in student_controller), nothing used to remember it. The next map update would pick the same point, or the
+#   one next to it, and flood the map with a search again. A GoalMemory keeps what happened to each goal, hashed into
+#   square cells of the map frame (so it doesn't care about the Explorer's crop or gmapping moving the origin), and
+#   tells goal selection which frontier points to skip and which to make more expensive:
+#       unreachable - skipped, anywhere in the cells around the goal
+#       timed_out   - the robot got stuck, or got to the end of a path that stops short of the goal (more than
+#                     GOAL_TOLERANCE away). A penalty on the path cost, then skipped once it has happened skip_after
+#                     times
+#       reached     - the robot got within GOAL_TOLERANCE of it. A penalty on the path cost, in case the laser didn't
+#                     clear the frontier there. Reaching a goal also forgets the failures in its cell
+# Everything expires: a record lasts expiry[outcome] seconds for every time it happened, and the penalties fade out
+#   over that time. The map changes as the robot explores, and a goal that couldn't be reached may be reachable now.
+
+import math
+import time
+
+import numpy as np
+
+
+UNREACHABLE = "unreachable"
+TIMED_OUT = "timed_out"
+REACHED = "reached"
+OUTCOMES = (UNREACHABLE, TIMED_OUT, REACHED)
+
+# Seconds a record lasts, per time it happened
+EXPIRY = {UNREACHABLE: 30.0, TIMED_OUT: 60.0, REACHED: 30.0}
+
+# How close in meters the robot has to be to a goal for it to count as reached. A little more than the distance the
+#   driver calls a waypoint done at (1.5 robot widths, see student_driver)
+GOAL_TOLERANCE = 0.6
+
+
+class GoalMemory:
+    """ What happened to recent goals, in a spatial hash of map frame cells"""
+    def __init__(self, cell=0.5, neighborhood=1, expiry=None, penalty=2.0, skip_after=2, clock=time.monotonic):
+        """
+        @param cell - side of the hash cells, in meters
+        @param neighborhood - a record covers this many cells all around its own, so points next to a goal count too
+        @param expiry - seconds a record lasts per time it happened, per outcome. EXPIRY if None
+        @param penalty - meters added to the path cost of points near a goal that timed out or was reached, fading
+            to nothing by the time the record expires
+        @param skip_after - how many time outs before points near the goal are skipped instead
+        @param clock - where the time comes from, in seconds"""
+        self.cell = cell
+        self.neighborhood = neighborhood
+        self.expiry = dict(EXPIRY if expiry is None else expiry)
+        self.penalty = penalty
+        self.skip_after = skip_after
+        self.clock = clock
+        # (cell x, cell y) -> {outcome: [times it happened, when it last did]}
+        self._cells = {}
+
+        self.recorded = {outcome: 0 for outcome in OUTCOMES}
+        self.expired = 0
+        self.skipped = 0
+        self.penalized = 0
+        self.planner_calls_saved = 0
+
+    def __len__(self):
+        return sum(len(outcomes) for outcomes in self._cells.values())
+
+    def _key(self, point):
+        return int(math.floor(point[0] / self.cell)), int(math.floor(point[1] / self.cell))
+
+    def record(self, point, outcome, now=None):
+        """ Remember what happened to a goal
+        @param point - (x, y) of the goal in the map frame
+        @param outcome - UNREACHABLE, TIMED_OUT or REACHED"""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown goal outcome {outcome}, expected one of {OUTCOMES}")
+        now = self.clock() if now is None else now
+        self.prune(now)
+        outcomes = self._cells.setdefault(self._key(point), {})
+        if outcome == REACHED:
+            # The robot got there, so whatever went wrong on the way there before doesn't hold any more
+            outcomes.pop(UNREACHABLE, None)
+            outcomes.pop(TIMED_OUT, None)
+        count, _ = outcomes.get(outcome, (0, now))
+        outcomes[outcome] = [count + 1, now]
+        self.recorded[outcome] += 1
+
+    def prune(self, now=None):
+        """ Forget the records that have expired"""
+        now = self.clock() if now is None else now
+        for key in list(self._cells):
+            outcomes = self._cells[key]
+            for outcome, (count, last) in list(outcomes.items()):
+                if now - last > self.expiry[outcome] * count:
+                    del outcomes[outcome]
+                    self.expired += 1
+            if not outcomes:
+                del self._cells[key]
+
+    def penalties(self, points, now=None):
+        """ How much to add to the path cost of each point, for the goals near it that went wrong
+        @param points - (N, 2) of (x, y) in the map frame
+        @return (N,) meters, inf for the points to skip"""
+        now = self.clock() if now is None else now
+        self.prune(now)
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        result = np.zeros(len(points))
+        if not self._cells or not len(points):
+            return result
+        cells = np.floor(points / self.cell).astype(np.int64)
+        # Only a handful of goals are remembered at a time, so it's one pass over the points per goal
+        for key, outcomes in self._cells.items():
+            near = np.all(np.abs(cells - np.array(key)) <= self.neighborhood, axis=1)
+            if not near.any():
+                continue
+            for outcome, (count, last) in outcomes.items():
+                if outcome == UNREACHABLE or (outcome == TIMED_OUT and count >= self.skip_after):
+                    result[near] = np.inf
+                else:
+                    result[near] += self.penalty * count * (1 - (now - last) / (self.expiry[outcome] * count))
+        skipped = int(np.count_nonzero(np.isinf(result)))
+        self.skipped += skipped
+        self.penalized += int(np.count_nonzero(result > 0)) - skipped
+        return result
+
+    def stats(self):
+        """ The counters, as a dictionary"""
+        return {"recorded": dict(self.recorded), "expired": self.expired, "remembered": len(self),
+                "skipped": self.skipped, "penalized": self.penalized, "planner_calls_saved": self.planner_calls_saved}
@@ -0,0 +1,261 @@
+# Array-backed grid search used by path_planning.dijkstra
+#
+# All of the search state (g-cost, parent, closed) lives in preallocated NumPy arrays indexed by the flat id
+#   of a cell, instead of a dictionary keyed by (i, j) tuples. The grid is padded with a one cell wall border
+#   so the inner loop never has to do a bounds check, and neighbors are visited using precomputed flat offsets.
+#
+# Nothing in here depends on ROS, so it can be used from benchmarks and other tools.
+
+from collections import namedtuple
+import heapq
+import math
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+
+SQRT2 = math.sqrt(2.0)
+
+# (di, dj, step cost) for the eight connected neighbors
+EIGHT_CONNECTED = ((1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+                   (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2))
+
+# path - (N, 2) int array of (i, j) pixels from the start to the end of the path
+# reached - True if the path ends at the goal, False if it ends at the closest visited pixel instead
+# expansions - how many nodes were taken off the queue and expanded
+# visited - (H, W) boolean image of every pixel the search touched, only filled in if the goal was not reached
+SearchResult = namedtuple("SearchResult", ["path", "reached", "expansions", "visited"])
+
+
+def padded_grid(passable):
+    """ Copy a passable mask into a grid with a one pixel blocked border
+    @param passable - (H, W) boolean image, True where the robot can go
+    @return flat boolean array of size (H + 2) * (W + 2)"""
+    height, width = passable.shape
+    grid = np.zeros((height + 2, width + 2), dtype=bool)
+    grid[1:-1, 1:-1] = passable
+    return grid.ravel()
+
+
+def neighbor_offsets(padded_width):
+    """ Flat index offsets for the eight connected neighbors in a padded grid
+    @param padded_width - width of the padded grid (W + 2)
+    @return tuple of (offset, di, dj, cost)"""
+    return tuple((di + dj * padded_width, di, dj, cost) for di, dj, cost in EIGHT_CONNECTED)
+
+
+def octile_tables(width, height, goal_loc):
+    """ Precomputed per-column and per-row distances to the goal, in padded coordinates
+    The octile heuristic of padded pixel (x, y) is then max(dx, dy) + (sqrt(2) - 1) * min(dx, dy) with
+    dx = dx_table[x] and dy = dy_table[y]. Only W + H values are stored instead of a full W x H image.
+    @param width - width of the (unpadded) image
+    @param height - height of the (unpadded) image
+    @param goal_loc - goal pixel (i, j)
+    @return two lists of floats"""
+    dx_table = np.abs(np.arange(-1, width + 1) - goal_loc[0]).astype(float).tolist()
+    dy_table = np.abs(np.arange(-1, height + 1) - goal_loc[1]).astype(float).tolist()
+    return dx_table, dy_table
+
+
+def octile(dx, dy):
+    """ Octile distance for an (absolute) pixel offset"""
+    if dx > dy:
+        return dx + (SQRT2 - 1.0) * dy
+    return dy + (SQRT2 - 1.0) * dx
+
+
+def unpad(flat_ids, padded_width):
+    """ Convert flat ids in the padded grid back into (i, j) pixels
+    @param flat_ids - sequence of flat ids
+    @param padded_width - width of the padded grid (W + 2)
+    @return (N, 2) int array"""
+    flat_ids = np.asarray(flat_ids, dtype=np.int64)
+    cells = np.empty((len(flat_ids), 2), dtype=np.int64)
+    cells[:, 0] = flat_ids % padded_width - 1
+    cells[:, 1] = flat_ids // padded_width - 1
+    return cells
+
+
+def trace_parents(parent, end, padded_width):
+    """ Walk the parent array back from end to the start
+    @param parent - flat parent array, storing parent id + 1 (the start is its own parent)
+    @param end - flat id to start walking from
+    @param padded_width - width of the padded grid (W + 2)
+    @return (N, 2) int array of pixels from the start to end"""
+    ids = [end]
+    current = end
+    while parent[current] - 1 != current:
+        current = parent[current] - 1
+        ids.append(current)
+    ids.reverse()
+    return unpad(ids, padded_width)
+
+
+def closest_visited(parent, padded_width, goal_loc):
+    """ Find the visited pixel that is closest (straight line) to the goal
+    @param parent - flat parent array, non-zero for visited pixels
+    @param padded_width - width of the padded grid (W + 2)
+    @param goal_loc - goal pixel (i, j)
+    @return flat id of the closest visited pixel"""
+    visited_ids = np.flatnonzero(parent)
+    cells = unpad(visited_ids, padded_width)
+    distances = np.hypot(cells[:, 0] - goal_loc[0], cells[:, 1] - goal_loc[1])
+    return int(visited_ids[np.argmin(distances)])
+
+
+def visited_image(parent, height, width):
+    """ Boolean (H, W) image of the pixels a search has touched"""
+    return parent.reshape(height + 2, width + 2)[1:-1, 1:-1] != 0
+
+
+def astar(passable, robot_loc, goal_loc):
+    """ A* on an eight connected grid with an octile heuristic
+    If the goal cannot be reached, the path goes to the visited pixel closest to the goal instead.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @return SearchResult"""
+    height, width = passable.shape
+    padded_width = width + 2
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+
+    free = padded_grid(passable)
+    # np.zeros hands back lazily mapped memory, so only the pages the search actually touches get used
+    g_array = np.zeros(free.size, dtype=np.float32)
+    parent_array = np.zeros(free.size, dtype=np.int32)   # parent id + 1, 0 means never visited
+    closed_array = np.zeros(free.size, dtype=bool)
+
+    # memoryviews give fast scalar access to the numpy storage from the Python loop
+    free_mv = memoryview(free)
+    g = memoryview(g_array)
+    parent = memoryview(parent_array)
+    closed = memoryview(closed_array)
+
+    offsets = neighbor_offsets(padded_width)
+    dx_table, dy_table = octile_tables(width, height, goal_loc)
+
+    start = (robot_loc[1] + 1) * padded_width + robot_loc[0] + 1
+    goal = (goal_loc[1] + 1) * padded_width + goal_loc[0] + 1
+
+    parent[start] = start + 1
+    priority_queue = [(octile(dx_table[robot_loc[0] + 1], dy_table[robot_loc[1] + 1]), start)]
+    expansions = 0
+    reached = False
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while priority_queue:
+        node = heappop(priority_queue)[1]
+        if closed[node]:
+            continue
+        closed[node] = True
+        expansions += 1
+
+        if node == goal:
+            reached = True
+            break
+
+        node_y, node_x = divmod(node, padded_width)
+        node_g = g[node]
+        for offset, di, dj, cost in offsets:
+            neighbor = node + offset
+            if not free_mv[neighbor] or closed[neighbor]:
+                continue
+            distance = node_g + cost
+            if parent[neighbor] and distance >= g[neighbor]:
+                continue
+            g[neighbor] = distance
+            parent[neighbor] = node + 1
+            dx = dx_table[node_x + di]
+            dy = dy_table[node_y + dj]
+            heappush(priority_queue, (distance + (dx + (SQRT2 - 1.0) * dy if dx > dy else dy + (SQRT2 - 1.0) * dx), neighbor))
+
+    visited = None
+    end = goal
+    if not reached:
+        end = closest_visited(parent_array, padded_width, goal_loc)
+        visited = visited_image(parent_array, height, width)
+
+    path = trace_parents(parent_array, end, padded_width)
+    return SearchResult(path, reached, expansions, visited)
+
+
+class CostField:
+    """ Cost of the cheapest path from the robot to every pixel it can reach, from one Dijkstra wavefront.
+    Only the reachable pixels are stored, so a mostly unseen map costs little memory"""
+    def __init__(self, shape, start, cells, costs, parents):
+        """
+        @param shape - (H, W) of the image
+        @param start - (i, j) pixel the wavefront started from
+        @param cells - sorted flat (unpadded) ids of the pixels in the graph
+        @param costs - path cost to each of those pixels, inf if it can't be reached
+        @param parents - index into cells of the previous pixel on the path, negative for none"""
+        self.shape = shape
+        self.start = start
+        self._cells = cells
+        self._costs = costs
+        self._parents = parents
+
+    def _nodes(self, points):
+        """ Index into cells of each (i, j) point, -1 if the point is not in the graph"""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        flat = points[:, 1] * self.shape[1] + points[:, 0]
+        nodes = np.minimum(np.searchsorted(self._cells, flat), len(self._cells) - 1)
+        return np.where(self._cells[nodes] == flat, nodes, -1)
+
+    def cost(self, points):
+        """ Path cost from the start to each point, in pixels
+        @param points - (N, 2) array of (i, j) pixels
+        @return (N,) float array, inf for points that can't be reached"""
+        nodes = self._nodes(points)
+        return np.where(nodes >= 0, self._costs[nodes], np.inf)
+
+    def path_to(self, point):
+        """ Walk the parents back from point to the start
+        @param point - (i, j) pixel, must be reachable
+        @return (N, 2) int array of pixels from the start to point"""
+        node = int(self._nodes(point)[0])
+        if node < 0 or self._costs[node] == np.inf:
+            raise ValueError(f"{tuple(point)} can't be reached from {self.start}")
+        nodes = [node]
+        while self._parents[node] >= 0:
+            node = self._parents[node]
+            nodes.append(node)
+        nodes.reverse()
+        flat = self._cells[nodes]
+        return np.column_stack((flat % self.shape[1], flat // self.shape[1]))
+
+
+def cost_field(passable, robot_loc):
+    """ Dijkstra from the robot out to every pixel it can reach, eight connected with the same step costs as astar
+    The search runs in scipy (compiled code) on a graph of just the passable pixels.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @return CostField"""
+    height, width = passable.shape
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    nodes_mask = passable.copy()
+    nodes_mask[robot_loc[1], robot_loc[0]] = True
+    cells = np.flatnonzero(nodes_mask)
+
+    rows = []
+    cols = []
+    costs = []
+    # Each edge once, from a pixel to the one right of it, above it, and diagonally above it
+    for di, dj, cost in ((1, 0, 1.0), (0, 1, 1.0), (1, 1, SQRT2), (-1, 1, SQRT2)):
+        left = max(0, -di)
+        right = width - max(0, di)
+        both = nodes_mask[:height - dj, left:right] & nodes_mask[dj:, left + di:right + di]
+        ys, xs = np.nonzero(both)
+        flat = ys * width + xs + left
+        rows.append(np.searchsorted(cells, flat))
+        cols.append(np.searchsorted(cells, flat + dj * width + di))
+        costs.append(np.full(len(flat), cost))
+    graph = coo_matrix((np.concatenate(costs), (np.concatenate(rows), np.concatenate(cols))),
+                       shape=(len(cells), len(cells))).tocsr()
+
+    start = int(np.searchsorted(cells, robot_loc[1] * width + robot_loc[0]))
+    distances, parents = csgraph_dijkstra(graph, directed=False, indices=start, return_predecessors=True)
+    return CostField(passable.shape, robot_loc, cells, distances, parents)
@@ -18,4 +18,8 @@ def map_to_world(index, map_data):
     world_x = grid_x * map_data.resolution + map_data.origin.position.x
     world_y = grid_y * map_data.resolution + map_data.origin.position.y
 
-    return (world_x, world_y)
\ No newline at end of file
+    return (world_x, world_y)
+
+def map_origin(map_data):
+    """ (x, y) of pixel (0, 0) of the map, in the map frame"""
+    return (map_data.origin.position.x, map_data.origin.position.y)
@@ -0,0 +1,339 @@
+# Hierarchical path planning (HPA*) for big maps
+#
+# The map is cut into square clusters. Wherever the free space crosses the border between two clusters there is
+#   an entrance, and the cost of driving between every pair of entrances inside a cluster is worked out ahead of
+#   time. A long query then only has to search that small graph of entrances, and the pixel path is filled in one
+#   cluster at a time with grid_search.astar on just that cluster.
+#
+# The entrance graph is kept between calls. When the map changes only the clusters with changed pixels (and the
+#   borders around them) are redone, so the mostly unseen gmapping map costs nothing after the first call.
+#
+# The paths are a little longer than the optimal ones (they have to go through the entrance pixels). If the entrance
+#   graph can't get to the goal, the query falls back to a full grid_search.astar, which either finds the path
+#   anyway or goes as close as it can.
+#
+# Botea, Mueller and Schaeffer, "Near Optimal Hierarchical Path-Finding", 2004.
+
+import heapq
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+from grid_search import SQRT2, SearchResult, octile, astar
+
+
+# Entrances longer than this get a transition at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+
+def _window_graph(mask):
+    """ Sparse eight connected graph of the True pixels of a small image
+    @param mask - (h, w) boolean image
+    @return (h * w, h * w) sparse matrix of step costs, for scipy.sparse.csgraph"""
+    height, width = mask.shape
+    ids = np.arange(height * width).reshape(height, width)
+    rows = []
+    cols = []
+    costs = []
+    # Each undirected edge once: right, down, down-right, down-left
+    for a, b, cost in ((np.s_[:, :-1], np.s_[:, 1:], 1.0),
+                       (np.s_[:-1, :], np.s_[1:, :], 1.0),
+                       (np.s_[:-1, :-1], np.s_[1:, 1:], SQRT2),
+                       (np.s_[:-1, 1:], np.s_[1:, :-1], SQRT2)):
+        both = mask[a] & mask[b]
+        rows.append(ids[a][both])
+        cols.append(ids[b][both])
+        costs.append(np.full(np.count_nonzero(both), cost))
+    return coo_matrix((np.concatenate(costs), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(ids.size, ids.size)).tocsr()
+
+
+def _runs(open_cells):
+    """ Start and end (inclusive) of every run of True values in a 1D boolean array"""
+    padded = np.concatenate(([False], open_cells, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return zip(edges[0::2].tolist(), (edges[1::2] - 1).tolist())
+
+
+class HierarchicalPlanner:
+    """ HPA* planner that keeps its entrance graph between calls. Call plan() with each new passable mask"""
+    def __init__(self, cluster_size=48):
+        """
+        @param cluster_size - side of a cluster in pixels"""
+        self.cluster_size = cluster_size
+
+        self._passable = None
+        self._origin = None
+
+        # How the last few calls went, for logging
+        self.full_builds = 0
+        self.clusters_rebuilt = 0
+        self.last_changed = 0
+
+    def reset(self):
+        """ Forget the entrance graph, so the next call builds it from scratch"""
+        self._passable = None
+
+    def _cluster_of(self, cell):
+        """ Cluster index of a flat (unpadded) pixel id"""
+        y, x = divmod(cell, self._width)
+        return (y // self.cluster_size) * self._clusters_x + x // self.cluster_size
+
+    def _bounds(self, cluster):
+        """ x0, x1, y0, y1 of the pixels in a cluster"""
+        cy, cx = divmod(cluster, self._clusters_x)
+        size = self.cluster_size
+        return (cx * size, min((cx + 1) * size, self._width), cy * size, min((cy + 1) * size, self._height))
+
+    def _border(self, a, b):
+        """ Transitions across the border between two clusters, b to the right of or above a
+        @return list of (cell in a, cell in b) flat pixel ids"""
+        ax0, ax1, ay0, ay1 = self._bounds(a)
+        passable = self._passable
+        width = self._width
+        transitions = []
+        # Going by the column and not b == a + 1, which is also the cluster above when the map is one cluster wide
+        if b % self._clusters_x != a % self._clusters_x:
+            x = ax1 - 1
+            open_cells = passable[ay0:ay1, x] & passable[ay0:ay1, x + 1]
+            for first, last in _runs(open_cells):
+                rows = (first, last) if last - first + 1 > LONG_ENTRANCE else ((first + last) // 2,)
+                transitions.extend(((ay0 + r) * width + x, (ay0 + r) * width + x + 1) for r in rows)
+        else:
+            y = ay1 - 1
+            open_cells = passable[y, ax0:ax1] & passable[y + 1, ax0:ax1]
+            for first, last in _runs(open_cells):
+                columns = (first, last) if last - first + 1 > LONG_ENTRANCE else ((first + last) // 2,)
+                transitions.extend((y * width + ax0 + c, (y + 1) * width + ax0 + c) for c in columns)
+        return transitions
+
+    def _neighbor_clusters(self, cluster):
+        """ Clusters to the right of and above a cluster, if there are any"""
+        cy, cx = divmod(cluster, self._clusters_x)
+        if cx + 1 < self._clusters_x:
+            yield cluster + 1
+        if cy + 1 < self._clusters_y:
+            yield cluster + self._clusters_x
+
+    def _distances(self, cluster, sources, targets, extra=None):
+        """ Path costs inside one cluster, never leaving it
+        @param cluster - cluster index
+        @param sources - flat pixel ids to measure from
+        @param targets - flat pixel ids to measure to
+        @param extra - a flat pixel id to count as passable even if it isn't (the robot)
+        @return (len(sources), len(targets)) array, inf where there is no path"""
+        x0, x1, y0, y1 = self._bounds(cluster)
+        mask = self._passable[y0:y1, x0:x1]
+        if extra is not None:
+            mask = mask.copy()
+            y, x = divmod(extra, self._width)
+            mask[y - y0, x - x0] = True
+        window_width = x1 - x0
+
+        def local(cells):
+            return [(c // self._width - y0) * window_width + c % self._width - x0 for c in cells]
+
+        distances = csgraph_dijkstra(_window_graph(mask), directed=False, indices=local(sources))
+        return distances[:, local(targets)]
+
+    def _build_cluster(self, cluster):
+        """ Work out the costs between every pair of entrances in a cluster"""
+        entrances = sorted(self._entrances[cluster])
+        edges = {}
+        if len(entrances) > 1:
+            distances = self._distances(cluster, entrances, entrances)
+            for k, u in enumerate(entrances):
+                edges[u] = [(v, float(d)) for v, d in zip(entrances, distances[k]) if v != u and d != np.inf]
+        self._intra[cluster] = edges
+
+    def _cluster_entrances(self, cluster):
+        """ Every transition pixel on the four borders of a cluster"""
+        entrances = set()
+        for a, b in ((cluster - 1, cluster), (cluster, cluster + 1),
+                     (cluster - self._clusters_x, cluster), (cluster, cluster + self._clusters_x)):
+            for u, v in self._borders.get((a, b), ()):
+                entrances.add(u if a == cluster else v)
+        return entrances
+
+    def _set_border(self, a, b):
+        """ Recompute the transitions between two clusters
+        @return True if the entrances of either cluster changed"""
+        old = self._borders.pop((a, b), [])
+        for u, v in old:
+            self._inter[u].remove(v)
+            self._inter[v].remove(u)
+        new = self._border(a, b) if self._occupied[a] and self._occupied[b] else []
+        if new:
+            self._borders[(a, b)] = new
+        for u, v in new:
+            self._inter.setdefault(u, []).append(v)
+            self._inter.setdefault(v, []).append(u)
+        return old != new
+
+    def _occupied_clusters(self, passable):
+        """ Which clusters have any passable pixel at all"""
+        size = self.cluster_size
+        height, width = passable.shape
+        padded = np.zeros((self._clusters_y * size, self._clusters_x * size), dtype=bool)
+        padded[:height, :width] = passable
+        return padded.reshape(self._clusters_y, size, self._clusters_x, size).any(axis=(1, 3)).ravel()
+
+    def _update(self, passable, origin):
+        """ Bring the entrance graph up to date with a new passable mask"""
+        size = self.cluster_size
+        if self._passable is None or self._passable.shape != passable.shape or self._origin != origin:
+            self._height, self._width = passable.shape
+            self._clusters_x = -(-self._width // size)
+            self._clusters_y = -(-self._height // size)
+            self._origin = origin
+            self._borders = {}
+            self._inter = {}
+            self._entrances = {}
+            self._intra = {}
+            dirty = range(self._clusters_x * self._clusters_y)
+            self.full_builds += 1
+            self.last_changed = 0
+        else:
+            changed = passable != self._passable
+            self.last_changed = int(np.count_nonzero(changed))
+            if not self.last_changed:
+                self.clusters_rebuilt = 0
+                return
+            padded = np.zeros((self._clusters_y * size, self._clusters_x * size), dtype=bool)
+            padded[:self._height, :self._width] = changed
+            dirty = np.flatnonzero(padded.reshape(self._clusters_y, size, self._clusters_x, size).any(axis=(1, 3)))
+            dirty = dirty.tolist()
+
+        self._passable = passable.copy()
+        self._occupied = self._occupied_clusters(passable)
+
+        # Every border that touches a changed cluster, and the clusters on both sides of it
+        rebuild = set(dirty)
+        borders = set()
+        for cluster in dirty:
+            cy, cx = divmod(cluster, self._clusters_x)
+            for a in (cluster, cluster - 1 if cx > 0 else None, cluster - self._clusters_x if cy > 0 else None):
+                if a is None:
+                    continue
+                for b in self._neighbor_clusters(a):
+                    if cluster in (a, b):
+                        borders.add((a, b))
+        for a, b in borders:
+            if self._set_border(a, b):
+                rebuild.update((a, b))
+
+        for cluster in rebuild:
+            self._entrances[cluster] = self._cluster_entrances(cluster)
+            if self._entrances[cluster]:
+                self._build_cluster(cluster)
+            else:
+                self._intra.pop(cluster, None)
+        self.clusters_rebuilt = len(rebuild)
+
+    def _connect(self, cell, cluster, extra=None):
+        """ Costs from a pixel to the entrances of its cluster
+        @return list of (entrance, cost)"""
+        entrances = sorted(self._entrances.get(cluster, ()))
+        if not entrances:
+            return []
+        distances = self._distances(cluster, [cell], entrances, extra)[0]
+        return [(u, float(d)) for u, d in zip(entrances, distances) if d != np.inf]
+
+    def _abstract_search(self, start, goal, start_edges, goal_edges):
+        """ A* over the entrance graph, with the start and goal hooked into it
+        @return list of flat pixel ids from start to goal (entrances only), or None, and the expansion count"""
+        width = self._width
+        goal_y, goal_x = divmod(goal, width)
+        to_goal = {u: cost for u, cost in goal_edges}
+        cost_so_far = {start: 0.0}
+        parent = {start: start}
+        closed = set()
+        start_y, start_x = divmod(start, width)
+        queue = [(octile(abs(start_x - goal_x), abs(start_y - goal_y)), start)]
+        expansions = 0
+        while queue:
+            node = heapq.heappop(queue)[1]
+            if node in closed:
+                continue
+            closed.add(node)
+            expansions += 1
+            if node == goal:
+                path = [node]
+                while parent[node] != node:
+                    node = parent[node]
+                    path.append(node)
+                path.reverse()
+                return path, expansions
+
+            node_cost = cost_so_far[node]
+            edges = list(self._intra.get(self._cluster_of(node), {}).get(node, ()))
+            edges.extend((v, 1.0) for v in self._inter.get(node, ()))
+            if node == start:
+                edges.extend(start_edges)
+            if node in to_goal:
+                edges.append((goal, to_goal[node]))
+            for neighbor, cost in edges:
+                distance = node_cost + cost
+                if neighbor in closed or distance >= cost_so_far.get(neighbor, np.inf):
+                    continue
+                cost_so_far[neighbor] = distance
+                parent[neighbor] = node
+                y, x = divmod(neighbor, width)
+                heapq.heappush(queue, (distance + octile(abs(x - goal_x), abs(y - goal_y)), neighbor))
+        return None, expansions
+
+    def _refine(self, waypoints):
+        """ Fill in the pixels between consecutive abstract waypoints
+        @return (N, 2) int array of pixels, and the expansion count"""
+        width = self._width
+        pieces = []
+        expansions = 0
+        for u, v in zip(waypoints[:-1], waypoints[1:]):
+            cluster = self._cluster_of(u)
+            uy, ux = divmod(u, width)
+            if cluster != self._cluster_of(v):
+                # Stepping across a border
+                pieces.append(np.array([(ux, uy)]))
+                continue
+            x0, x1, y0, y1 = self._bounds(cluster)
+            vy, vx = divmod(v, width)
+            result = astar(self._passable[y0:y1, x0:x1], (ux - x0, uy - y0), (vx - x0, vy - y0))
+            expansions += result.expansions
+            pieces.append(result.path[:-1] + (x0, y0))
+        last_y, last_x = divmod(waypoints[-1], width)
+        pieces.append(np.array([(last_x, last_y)]))
+        return np.concatenate(pieces), expansions
+
+    def plan(self, passable, robot_loc, goal_loc, origin=None):
+        """ Plan from robot_loc to goal_loc on the entrance graph, then fill in the pixels
+        If the entrance graph can't get to the goal, falls back to grid_search.astar.
+        @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+        @param robot_loc - where the robot is (tuple, i,j)
+        @param goal_loc - where to go to (tuple, i,j)
+        @param origin - (x, y) of the map origin. The entrance graph is rebuilt if this changes
+        @return SearchResult"""
+        self._update(passable, origin)
+
+        start = int(robot_loc[1]) * self._width + int(robot_loc[0])
+        goal = int(goal_loc[1]) * self._width + int(goal_loc[0])
+        start_cluster = self._cluster_of(start)
+        goal_cluster = self._cluster_of(goal)
+
+        waypoints = None
+        expansions = 0
+        if passable[int(goal_loc[1]), int(goal_loc[0])]:
+            start_edges = self._connect(start, start_cluster, extra=start)
+            goal_edges = self._connect(goal, goal_cluster)
+            if start_cluster == goal_cluster:
+                direct = self._distances(start_cluster, [start], [goal], extra=start)[0, 0]
+                if direct != np.inf:
+                    start_edges.append((goal, float(direct)))
+            waypoints, expansions = self._abstract_search(start, goal, start_edges, goal_edges)
+
+        if waypoints is None:
+            fallback = astar(passable, robot_loc, goal_loc)
+            return SearchResult(fallback.path, fallback.reached, expansions + fallback.expansions, fallback.visited)
+
+        path, refine_expansions = self._refine(waypoints)
+        return SearchResult(path, True, expansions + refine_expansions, None)
@@ -0,0 +1,108 @@
+# How much unseen space the laser would see from a frontier point
+#
+# Going to the closest or cheapest frontier point often ends with the robot at a corner of the frontier that only
+#   uncovers a few cells. InformationGain estimates, for every candidate at once, how many square meters of unseen
+#   map the laser would see from there, and trades that off against the path cost to get there:
+#       score = gain * exp(-distance_weight * cost)
+#   (Gonzalez-Banos and Latombe, "Navigation strategies for exploring indoor environments", IJRR 2002).
+#
+# The laser is the one in stage_osu/config/sick.inc: 8 m range, 180 samples over 180 degrees. new_driver spins the
+#   robot all the way around at every waypoint, so by default the same 180 rays are spread over the full turn.
+#
+# The rays are cast on a coarse copy of the map (cells of about `cell` meters): a cell stops a ray if any pixel in it
+#   is a wall, and is worth the fraction of its pixels that are unseen. Past the edge of the image is unseen space by
+#   default, since the Explorer hands over its crop of the known region. Every ray of every candidate is sampled at
+#   once as a (candidates, rays, samples) array, in chunks of candidates to bound the memory. Rays go through unseen
+#   space, so the gain is what could be seen if there are no walls there. Each sample counts for the area of the
+#   ring sector it stands for, so the rays bunching up near the candidate don't count the same cells over and over.
+
+import math
+
+import numpy as np
+
+
+# The SICK LMS200 in stage_osu/config/sick.inc
+SICK_RANGE = 8.0
+SICK_FOV = 180.0
+SICK_SAMPLES = 180
+
+# Candidates raycast together, each one is rays x samples floats
+CHUNK = 64
+
+
+class InformationGain:
+    """ Scores frontier candidates by the unseen area the laser would see from them and the cost to get there"""
+    def __init__(self, max_range=SICK_RANGE, rays=SICK_SAMPLES, sweep=360.0, cell=0.2, distance_weight=0.2):
+        """
+        @param max_range - laser range in meters
+        @param rays - how many rays over the sweep
+        @param sweep - degrees the rays cover, 360 since the robot spins at every waypoint
+        @param cell - size in meters of the coarse cells the rays are cast on
+        @param distance_weight - per meter of path, how fast the score falls off with the cost to get there"""
+        self.max_range = max_range
+        self.rays = rays
+        self.sweep = sweep
+        self.cell = cell
+        self.distance_weight = distance_weight
+
+    def gains(self, im, resolution, points, outside_unseen=True):
+        """ Unseen area the laser would see from each point
+        @param im - the thresholded image (0 wall, 128 unseen, 255 free)
+        @param resolution - size of a pixel in meters
+        @param points - (N, 2) pixels (i, j)
+        @param outside_unseen - what is past the edge of im: unseen space (for a crop to the known region, which has
+            only unseen space around it), or a wall (for a whole map)
+        @return (N,) square meters"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        factor = max(1, int(round(self.cell / resolution)))
+        cell = factor * resolution
+        walls, unseen = _coarse(im, factor)
+        height, width = walls.shape
+
+        sweep = math.radians(self.sweep)
+        angles = -sweep / 2 + (np.arange(self.rays) + 0.5) * sweep / self.rays
+        # Two samples per cell so a ray can't step over the corner of a wall
+        step = 0.5
+        distances = (np.arange(int(self.max_range / cell / step)) + 1) * step
+        dx = (np.cos(angles)[:, None] * distances[None, :]).astype(np.float32)
+        dy = (np.sin(angles)[:, None] * distances[None, :]).astype(np.float32)
+        # Area of the ring sector each sample stands for, in square meters
+        area = (distances * step * (sweep / self.rays) * cell * cell).astype(np.float32)
+
+        padded_walls = np.pad(walls, 1, constant_values=not outside_unseen).ravel()
+        padded_unseen = np.pad(unseen, 1, constant_values=float(outside_unseen)).ravel()
+        origins = ((points + 0.5) / factor).astype(np.float32)
+        result = np.empty(len(points))
+        for start in range(0, len(points), CHUNK):
+            chunk = origins[start:start + CHUNK]
+            # In the cells of the padded map. Everything from the padding in is positive, so truncating is floor
+            xs = (chunk[:, 0, None, None] + dx[None] + 1).astype(np.int32)
+            ys = (chunk[:, 1, None, None] + dy[None] + 1).astype(np.int32)
+            # Everything off the map lands in the ring of padding cells
+            np.clip(xs, 0, width + 1, out=xs)
+            np.clip(ys, 0, height + 1, out=ys)
+            cells = ys * (width + 2) + xs
+            blocked = padded_walls.take(cells)
+            # Samples before the first wall along each ray
+            first = np.where(blocked.any(axis=2), blocked.argmax(axis=2), blocked.shape[2])
+            visible = np.arange(blocked.shape[2]) < first[..., None]
+            result[start:start + CHUNK] = np.einsum("crs,crs,s->c", padded_unseen.take(cells), visible, area)
+        return result
+
+    def scores(self, gains, costs):
+        """ gain * exp(-distance_weight * cost), 0 where the cost is inf
+        @param gains - (N,) from gains
+        @param costs - (N,) path costs in meters"""
+        return np.asarray(gains) * np.exp(-self.distance_weight * np.asarray(costs, dtype=float))
+
+
+def _coarse(im, factor):
+    """ Walls (any pixel of the cell) and unseen fraction of factor x factor cells, the edge padded with unseen"""
+    if factor == 1:
+        return im == 0, (im == 128).astype(np.float32)
+    height, width = im.shape
+    padded = np.pad(im, ((0, -height % factor), (0, -width % factor)), constant_values=128)
+    blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+    walls = (blocks == 0).any(axis=(1, 3))
+    unseen = (blocks == 128).mean(axis=(1, 3), dtype=np.float32)
+    return walls, unseen
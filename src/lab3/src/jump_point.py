@@ -0,0 +1,206 @@
+# Jump Point Search on the eight connected grid
+#
+# On a uniform cost grid there are lots of equally good paths between two points, and A* ends up expanding
+#   most of them. JPS only puts "jump points" on the queue: pixels where the best path might have to turn
+#   because of a nearby wall. Everything in between is skipped over by scanning along rows, columns and
+#   diagonals, so long corridors cost one expansion instead of one per pixel.
+#
+# Diagonal moves are only allowed when both of the straight moves next to them are open (no cutting corners).
+#   On the inflated mask this makes almost no difference to the path, and it keeps the pruning rules simple.
+#
+# Same inputs and output as grid_search.astar, and the same padded flat grid for the search state.
+
+import heapq
+
+import numpy as np
+
+from grid_search import SearchResult, padded_grid, octile_tables, octile, trace_parents, closest_visited, \
+    visited_image
+
+
+def _jump_straight(free, node, step, side, goal):
+    """ Scan along a row or column until we hit a wall, the goal, or a pixel with a forced neighbor
+    @param free - flat passable grid
+    @param node - flat id to start from (not checked)
+    @param step - flat offset of one step along the scan
+    @param side - flat offset of one step across the scan
+    @param goal - flat id of the goal
+    @return flat id of the jump point, or -1 if there isn't one"""
+    while True:
+        node += step
+        if not free[node]:
+            return -1
+        if node == goal:
+            return node
+        # A pixel beside us is open but the one beside the pixel we came from wasn't, so the best path to it
+        #   might go through here
+        if (free[node + side] and not free[node + side - step]) or (free[node - side] and not free[node - side - step]):
+            return node
+
+
+def _jump_diagonal(free, node, step_x, step_y, padded_width, goal):
+    """ Scan along a diagonal, checking the row and the column out of every pixel on the way
+    @return flat id of the jump point, or -1 if there isn't one"""
+    while True:
+        node += step_x + step_y
+        if not free[node]:
+            return -1
+        if node == goal:
+            return node
+        if _jump_straight(free, node, step_x, padded_width, goal) != -1 or _jump_straight(free, node, step_y, 1, goal) != -1:
+            return node
+        # Keep going only if we can do it without cutting a corner
+        if not (free[node + step_x] and free[node + step_y]):
+            return -1
+
+
+def _directions(free, node, parent_node, padded_width):
+    """ The directions worth searching from node, given which way we came in
+    @return list of (di, dj)"""
+    if parent_node == node:
+        # The start pixel, so look everywhere
+        directions = []
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if di == 0 and dj == 0:
+                    continue
+                if not free[node + di + dj * padded_width]:
+                    continue
+                if di and dj and not (free[node + di] and free[node + dj * padded_width]):
+                    continue
+                directions.append((di, dj))
+        return directions
+
+    node_y, node_x = divmod(node, padded_width)
+    parent_y, parent_x = divmod(parent_node, padded_width)
+    di = (node_x > parent_x) - (node_x < parent_x)
+    dj = (node_y > parent_y) - (node_y < parent_y)
+    step_y = dj * padded_width
+
+    directions = []
+    if di and dj:
+        open_x = free[node + di]
+        open_y = free[node + step_y]
+        if open_y:
+            directions.append((0, dj))
+        if open_x:
+            directions.append((di, 0))
+        if open_x and open_y:
+            directions.append((di, dj))
+    elif di:
+        open_next = free[node + di]
+        open_up = free[node + padded_width]
+        open_down = free[node - padded_width]
+        if open_next:
+            directions.append((di, 0))
+            if open_up:
+                directions.append((di, 1))
+            if open_down:
+                directions.append((di, -1))
+        if open_up:
+            directions.append((0, 1))
+        if open_down:
+            directions.append((0, -1))
+    else:
+        open_next = free[node + step_y]
+        open_right = free[node + 1]
+        open_left = free[node - 1]
+        if open_next:
+            directions.append((0, dj))
+            if open_right:
+                directions.append((1, dj))
+            if open_left:
+                directions.append((-1, dj))
+        if open_right:
+            directions.append((1, 0))
+        if open_left:
+            directions.append((-1, 0))
+    return directions
+
+
+def densify(jump_cells):
+    """ Fill in the straight (row, column or diagonal) runs between consecutive jump points
+    @param jump_cells - (N, 2) int array of pixels
+    @return (M, 2) int array with every pixel along the way"""
+    if len(jump_cells) < 2:
+        return jump_cells
+    pieces = []
+    for a, b in zip(jump_cells[:-1], jump_cells[1:]):
+        steps = int(np.max(np.abs(b - a)))
+        t = np.arange(steps)[:, None]
+        pieces.append(a + np.sign(b - a) * t)
+    pieces.append(jump_cells[-1:])
+    return np.concatenate(pieces)
+
+
+def jump_point_search(passable, robot_loc, goal_loc):
+    """ Jump Point Search on an eight connected grid
+    If the goal cannot be reached, the path goes to the visited jump point closest to the goal instead.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @return SearchResult, with every pixel of the path filled in"""
+    height, width = passable.shape
+    padded_width = width + 2
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+
+    free_array = padded_grid(passable)
+    g_array = np.zeros(free_array.size, dtype=np.float32)
+    parent_array = np.zeros(free_array.size, dtype=np.int32)   # parent id + 1, 0 means never visited
+    closed_array = np.zeros(free_array.size, dtype=bool)
+
+    free = memoryview(free_array)
+    g = memoryview(g_array)
+    parent = memoryview(parent_array)
+    closed = memoryview(closed_array)
+
+    dx_table, dy_table = octile_tables(width, height, goal_loc)
+
+    start = (robot_loc[1] + 1) * padded_width + robot_loc[0] + 1
+    goal = (goal_loc[1] + 1) * padded_width + goal_loc[0] + 1
+
+    parent[start] = start + 1
+    priority_queue = [(octile(dx_table[robot_loc[0] + 1], dy_table[robot_loc[1] + 1]), start)]
+    expansions = 0
+    reached = False
+
+    while priority_queue:
+        node = heapq.heappop(priority_queue)[1]
+        if closed[node]:
+            continue
+        closed[node] = True
+        expansions += 1
+
+        if node == goal:
+            reached = True
+            break
+
+        node_y, node_x = divmod(node, padded_width)
+        node_g = g[node]
+        for di, dj in _directions(free, node, parent[node] - 1, padded_width):
+            if di and dj:
+                jump = _jump_diagonal(free, node, di, dj * padded_width, padded_width, goal)
+            elif di:
+                jump = _jump_straight(free, node, di, padded_width, goal)
+            else:
+                jump = _jump_straight(free, node, dj * padded_width, 1, goal)
+            if jump == -1 or closed[jump]:
+                continue
+
+            jump_y, jump_x = divmod(jump, padded_width)
+            distance = node_g + octile(abs(jump_x - node_x), abs(jump_y - node_y))
+            if parent[jump] and distance >= g[jump]:
+                continue
+            g[jump] = distance
+            parent[jump] = node + 1
+            heapq.heappush(priority_queue, (distance + octile(dx_table[jump_x], dy_table[jump_y]), jump))
+
+    visited = None
+    end = goal
+    if not reached:
+        end = closest_visited(parent_array, padded_width, goal_loc)
+        visited = visited_image(parent_array, height, width)
+
+    path = densify(trace_parents(parent_array, end, padded_width))
+    return SearchResult(path, reached, expansions, visited)
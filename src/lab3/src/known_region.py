@@ -0,0 +1,79 @@
+# Cropping the map down to the part the robot has actually seen
+#
+# gmapping hands out a big fixed size grid (4000 x 4000 by default) and only a small box in the middle of it is
+#   known. Thresholding, inflating, finding frontiers and planning on the full grid costs time and memory in
+#   proportion to the grid, not to what has been explored. A Region is the bounding box of the known cells, padded
+#   so that the inflation near its edges comes out the same as on the full grid. Everything runs on a view of that
+#   box, and the results are moved back into full grid coordinates.
+
+import copy
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from costmap import PLANNING_RADIUS, FRONTIER_RADIUS
+
+
+def inflation_margin(resolution, radii=(PLANNING_RADIUS, FRONTIER_RADIUS)):
+    """ How many pixels of padding a crop needs so that inflating by any of radii (meters) can't tell the crop edge
+    apart from unseen space, plus one pixel for the frontier check"""
+    return int(math.ceil(max(radii) / resolution)) + 2
+
+
+class Region(namedtuple("Region", ["x0", "y0", "x1", "y1"])):
+    """ Box of pixels [x0, x1) x [y0, y1) in the full map"""
+    __slots__ = ()
+
+    @property
+    def shape(self):
+        return self.y1 - self.y0, self.x1 - self.x0
+
+    def crop(self, im):
+        """ View of the region of a full size image (no copy)"""
+        return im[self.y0:self.y1, self.x0:self.x1]
+
+    def to_local(self, pix):
+        """ Full map pixel (i, j) to a pixel of the cropped image"""
+        return int(pix[0]) - self.x0, int(pix[1]) - self.y0
+
+    def to_full(self, points):
+        """ Pixel (i, j), or (N, 2) array of pixels, of the cropped image back to the full map"""
+        return np.asarray(points) + (self.x0, self.y0)
+
+    def origin(self, origin, resolution):
+        """ Map frame (x, y) of the corner of the region, given the origin of the full map"""
+        return origin[0] + self.x0 * resolution, origin[1] + self.y0 * resolution
+
+    def map_data(self, map_data):
+        """ MapMetaData for the cropped image: same resolution, origin moved to the corner of the region. Anything
+        that turns cropped pixels into map coordinates with it gets the same answer as on the full map"""
+        cropped = copy.deepcopy(map_data)
+        cropped.width = self.x1 - self.x0
+        cropped.height = self.y1 - self.y0
+        cropped.origin.position.x += self.x0 * map_data.resolution
+        cropped.origin.position.y += self.y0 * map_data.resolution
+        return cropped
+
+
+def known_region(im, margin, include=(), unknown=-1):
+    """ Bounding box of the known cells of a map, padded by margin and clipped to the map
+    @param im - (H, W) map, with unknown cells set to unknown (-1 for the raw OccupancyGrid data)
+    @param margin - padding in pixels, see inflation_margin
+    @param include - pixels (i, j) that have to be in the region even if they aren't known, like the robot
+    @param unknown - value of the unknown cells
+    @return Region. The whole map if nothing is known yet"""
+    height, width = im.shape
+    known = im != unknown
+    rows = np.flatnonzero(known.any(axis=1))
+    cols = np.flatnonzero(known.any(axis=0))
+    if len(rows) == 0:
+        return Region(0, 0, width, height)
+
+    x0, x1 = cols[0], cols[-1] + 1
+    y0, y1 = rows[0], rows[-1] + 1
+    for pix in include:
+        x0, x1 = min(x0, int(pix[0])), max(x1, int(pix[0]) + 1)
+        y0, y1 = min(y0, int(pix[1])), max(y1, int(pix[1]) + 1)
+    return Region(int(max(x0 - margin, 0)), int(max(y0 - margin, 0)),
+                  int(min(x1 + margin, width)), int(min(y1 + margin, height)))
@@ -0,0 +1,190 @@
+# Maps in shared memory, for worker processes
+#
+# Sending a map to another process pickles it, a few megabytes for every task. A MapStore keeps the map in shared
+#   memory (multiprocessing.shared_memory) instead, written once per version, and the workers attach to it by name
+#   and read it through NumPy views, without copying anything.
+#
+# Each version is an OccupancyGrid's data (int8) and the planning passable mask made from it (bool), the same shape,
+#   with the resolution and origin. There are two slots, so a new version is written into the one that isn't being
+#   read and then published by switching over: a reader gets either the old map or the new one, never half of each.
+#   Each slot has a sequence number that is odd while it is being written. A reader checks it before and after it
+#   makes its views, and MapView.valid says whether the slot has been written over since (after two more versions).
+#
+# Slots grow when the map does (gmapping makes it bigger as it goes): a bigger segment is made with a new name and
+#   the old one is unlinked. Readers that still have the old one mapped keep it until they let go of it.
+#
+#   store = MapStore()                                  # in the process that has the maps
+#   version = store.write(data, passable, resolution, origin)
+#   reader = MapReader(store.name)                      # in a worker
+#   view = reader.read(version)
+
+import secrets
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Header layout, as int64s
+VERSION = 0         # last version published, 0 before the first one
+ACTIVE = 1          # slot it is in
+SEQUENCE = 2        # per slot, odd while it is being written
+GENERATION = 4      # per slot, part of the name of its segment, goes up when it grows
+HEIGHT = 6          # per slot
+WIDTH = 8           # per slot
+SLOT_VERSION = 10   # per slot, which version it has
+FLOATS = 12         # per slot resolution, origin x, origin y, as float64s from here on
+HEADER_BYTES = (FLOATS + 6) * 8
+
+# How much more room than needed a slot gets when it grows
+HEADROOM = 1.5
+
+
+class StaleMap(Exception):
+    """ The version asked for isn't in the store any more"""
+
+
+class MapView(namedtuple("MapView", ["version", "data", "passable", "resolution", "origin", "reader", "slot",
+                                     "sequence"])):
+    """ A version of the map in the store. data and passable are views into shared memory, only good while valid()"""
+    def valid(self):
+        """ Has the slot not been written over since the views were made? Check after using them"""
+        return int(self.reader._ints[SEQUENCE + self.slot]) == self.sequence
+
+
+def _slot_name(name, slot, generation):
+    return f"{name}_{slot}_{generation}"
+
+
+class MapReader:
+    """ Reads the maps of a MapStore, from any process"""
+    def __init__(self, name):
+        """
+        @param name - MapStore.name"""
+        self.name = name
+        self._header = shared_memory.SharedMemory(name=name)
+        self._ints = np.ndarray(FLOATS, dtype=np.int64, buffer=self._header.buf)
+        self._floats = np.ndarray(6, dtype=np.float64, buffer=self._header.buf, offset=FLOATS * 8)
+        # Segments by name, kept open so the views into them stay good
+        self._segments = {}
+        self._retired = []
+
+    @property
+    def version(self):
+        return int(self._ints[VERSION])
+
+    def _segment(self, slot):
+        name = _slot_name(self.name, slot, int(self._ints[GENERATION + slot]))
+        segment = self._segments.get(name)
+        if segment is None:
+            # The slot grew. Views into the old segment may still be around, so it stays mapped until close
+            for old in [key for key in self._segments if key.startswith(_slot_name(self.name, slot, ""))]:
+                self._retired.append(self._segments.pop(old))
+            segment = self._segments[name] = shared_memory.SharedMemory(name=name)
+        return segment
+
+    def read(self, version=None, retries=100):
+        """ Views of a version of the map, without copying it
+        @param version - which one, the latest if None
+        @param retries - how many times to try again if it is being written right then
+        @return MapView
+        @raise StaleMap if that version has been written over, or there is no map yet"""
+        for _ in range(retries):
+            if version is None:
+                slot = int(self._ints[ACTIVE])
+            elif int(self._ints[SLOT_VERSION]) == version:
+                slot = 0
+            elif int(self._ints[SLOT_VERSION + 1]) == version:
+                slot = 1
+            else:
+                raise StaleMap(f"version {version} is not in {self.name}, the latest is {self.version}")
+            sequence = int(self._ints[SEQUENCE + slot])
+            if sequence % 2:
+                continue
+            slot_version = int(self._ints[SLOT_VERSION + slot])
+            if slot_version == 0:
+                raise StaleMap(f"nothing has been written to {self.name} yet")
+            shape = (int(self._ints[HEIGHT + slot]), int(self._ints[WIDTH + slot]))
+            resolution, origin_x, origin_y = (float(v) for v in self._floats[3 * slot:3 * slot + 3])
+            buf = self._segment(slot).buf
+            size = shape[0] * shape[1]
+            data = np.ndarray(shape, dtype=np.int8, buffer=buf)
+            passable = np.ndarray(shape, dtype=bool, buffer=buf, offset=size)
+            view = MapView(slot_version, data, passable, resolution, (origin_x, origin_y), self, slot, sequence)
+            if view.valid():
+                return view
+        raise StaleMap(f"{self.name} kept being written while it was read")
+
+    def close(self):
+        """ Let go of the shared memory. Views from read must not be used after this"""
+        for segment in list(self._segments.values()) + self._retired + [self._header]:
+            try:
+                segment.close()
+            except BufferError:
+                # Someone still has a view into it, the mapping goes when they do
+                pass
+        self._segments = {}
+        self._retired = []
+
+
+class MapStore(MapReader):
+    """ The writing end: puts versions of the map into shared memory, two slots, turn about"""
+    def __init__(self, name=None):
+        """
+        @param name - name of the header segment, made up if None. The slots are named after it"""
+        name = name or f"lab3_maps_{secrets.token_hex(4)}"
+        header = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES)
+        header.buf[:HEADER_BYTES] = bytes(HEADER_BYTES)
+        header.close()
+        super().__init__(name)
+        self._capacity = [0, 0]
+        self._owned = []
+
+    def write(self, data, passable, resolution, origin):
+        """ Copy a new version of the map in, and publish it
+        @param data - (H, W) OccupancyGrid data, -1 unseen, otherwise 0 (free) to 100 (wall)
+        @param passable - (H, W) boolean image, True where the robot can go
+        @param resolution - size of a pixel in meters
+        @param origin - (x, y) of pixel (0, 0) in the map frame
+        @return the new version number"""
+        height, width = data.shape
+        size = height * width
+        ints = self._ints
+        version = int(ints[VERSION]) + 1
+        slot = version % 2
+
+        ints[SEQUENCE + slot] += 1
+        if 2 * size > self._capacity[slot]:
+            old = _slot_name(self.name, slot, int(ints[GENERATION + slot]))
+            ints[GENERATION + slot] += 1
+            self._capacity[slot] = int(2 * size * HEADROOM)
+            new = _slot_name(self.name, slot, int(ints[GENERATION + slot]))
+            self._segments[new] = shared_memory.SharedMemory(name=new, create=True, size=self._capacity[slot])
+            self._owned.append(new)
+            if old in self._owned:
+                self._owned.remove(old)
+                segment = self._segments.pop(old)
+                self._retired.append(segment)
+                segment.unlink()
+        buf = self._segment(slot).buf
+        np.ndarray((height, width), dtype=np.int8, buffer=buf)[:] = data
+        np.ndarray((height, width), dtype=bool, buffer=buf, offset=size)[:] = passable
+        ints[HEIGHT + slot] = height
+        ints[WIDTH + slot] = width
+        ints[SLOT_VERSION + slot] = version
+        self._floats[3 * slot:3 * slot + 3] = (resolution, origin[0], origin[1])
+        ints[SEQUENCE + slot] += 1
+
+        ints[ACTIVE] = slot
+        ints[VERSION] = version
+        return version
+
+    def close(self):
+        """ Let go of the shared memory and remove it, readers that are still attached keep what they have"""
+        owned = [self._segments[name] for name in self._owned if name in self._segments]
+        header = self._header
+        super().close()
+        for segment in owned:
+            segment.unlink()
+        self._owned = []
+        header.unlink()
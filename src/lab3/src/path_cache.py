@@ -0,0 +1,128 @@
+# Cache of planned paths, in front of path_planning.dijkstra
+#
+# The controller replans every time the robot stops making progress, usually to the same goal and from a few
+#   pixels away from where it planned last time. A path is stored under the start pixel (rounded to a small
+#   block of pixels) and the goal pixel, for one version of the map.
+#
+# When a new version of the map comes in the cache isn't thrown away. Every path is checked against the new
+#   passable mask, and only the ones that now go through a blocked pixel are dropped. The rest carry over to the
+#   new version. Paths that didn't reach their goal are dropped too, since the new map might let them.
+#
+# The Explorer plans on a crop of the map that moves as the known region grows, and gmapping can move the origin of
+#   the map, so the paths and keys are kept on the pixel grid of the map frame (pixel (0, 0) at (0, 0) in the map
+#   frame) instead of in the pixels of whatever image they were planned on. A different crop of the map is just an
+#   offset.
+
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from theta_star import path_clear
+
+
+# pixels - (N, 2) int array of the path in pixels, for checking it against a new map. Stored on the map frame grid,
+#   handed out in the pixels of the current map
+# path - (N, 2) array of the path in map coordinates, what dijkstra returns
+# reached - True if the path gets to the goal
+CachedPath = namedtuple("CachedPath", ["pixels", "path", "reached"])
+
+
+class PathCache:
+    """ Least recently used cache of paths, for the current version of the map"""
+    def __init__(self, max_entries=64, max_bytes=8 * 1024 * 1024, start_cell=4):
+        """
+        @param max_entries - how many paths to keep
+        @param max_bytes - how much memory the stored paths can take up
+        @param start_cell - starts within the same block of this many pixels share an entry"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.start_cell = start_cell
+
+        self.version = None
+        self.resolution = None
+        # Map frame grid pixel of pixel (0, 0) of the current map
+        self.offset = np.zeros(2, dtype=np.int64)
+        self._paths = OrderedDict()
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _key(self, robot_loc, goal_loc):
+        robot_i, robot_j = int(robot_loc[0]) + int(self.offset[0]), int(robot_loc[1]) + int(self.offset[1])
+        return (robot_i // self.start_cell, robot_j // self.start_cell,
+                int(goal_loc[0]) + int(self.offset[0]), int(goal_loc[1]) + int(self.offset[1]))
+
+    def _remove(self, key):
+        entry = self._paths.pop(key)
+        self.nbytes -= entry.pixels.nbytes + entry.path.nbytes
+
+    def set_map(self, version, passable, origin=(0.0, 0.0), resolution=None):
+        """ Move the cache over to a new version of the map, dropping the paths the change has blocked
+        Nothing happens if this is the version and crop the cache is already on.
+        @param version - key of the map, see costmap.map_version
+        @param passable - (H, W) boolean image of that version, True where the robot can go
+        @param origin - (x, y) of pixel (0, 0) of passable in the map frame, for a crop of the map
+        @param resolution - size of a pixel in meters. Every path is dropped if it changes"""
+        offset = np.zeros(2, dtype=np.int64) if resolution is None else \
+            np.round(np.asarray(origin, dtype=float) / resolution).astype(np.int64)
+        if version == self.version and resolution == self.resolution and np.array_equal(offset, self.offset):
+            return
+        if resolution != self.resolution:
+            self.invalidations += len(self._paths)
+            self.clear()
+        self.version = version
+        self.resolution = resolution
+        self.offset = offset
+        height, width = passable.shape
+        for key, entry in list(self._paths.items()):
+            # The start doesn't have to be passable, the robot might be inside the inflation. Paths can be just their
+            #   corners (see theta_star), so the whole of each segment gets checked
+            pixels = entry.pixels - offset
+            inside = ((pixels[:, 0] >= 0) & (pixels[:, 0] < width) & (pixels[:, 1] >= 0) & (pixels[:, 1] < height)).all()
+            if not entry.reached or not inside or not path_clear(passable, pixels):
+                self._remove(key)
+                self.invalidations += 1
+
+    def get(self, robot_loc, goal_loc):
+        """ The stored path from (near) robot_loc to goal_loc on the current map
+        @param robot_loc - where the robot is (tuple, i,j)
+        @param goal_loc - where to go to (tuple, i,j)
+        @return CachedPath, or None if there isn't one"""
+        key = self._key(robot_loc, goal_loc)
+        entry = self._paths.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._paths.move_to_end(key)
+        return entry._replace(pixels=entry.pixels - self.offset)
+
+    def put(self, robot_loc, goal_loc, pixels, path, reached):
+        """ Store a path planned on the current map
+        @param robot_loc - where the robot was (tuple, i,j)
+        @param goal_loc - where the path was planned to (tuple, i,j)
+        @param pixels - (N, 2) int array of the path in pixels
+        @param path - (N, 2) array of the path in map coordinates
+        @param reached - True if the path gets to goal_loc"""
+        key = self._key(robot_loc, goal_loc)
+        if key in self._paths:
+            self._remove(key)
+        entry = CachedPath(np.asarray(pixels, dtype=np.int64) + self.offset, np.asarray(path), bool(reached))
+        size = entry.pixels.nbytes + entry.path.nbytes
+        if size > self.max_bytes:
+            return
+        self._paths[key] = entry
+        self.nbytes += size
+        while len(self._paths) > self.max_entries or self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._paths)))
+            self.evictions += 1
+
+    def clear(self):
+        self._paths.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._paths)
@@ -13,13 +13,10 @@
 # The ever-present numpy
 import numpy as np
 
-# Our priority queue
-import heapq
-import rospy
-from scipy.ndimage import convolve
-import matplotlib.pyplot as plt
 import os
-from exploring import find_highest_concentration_point
+# The planning itself, without ROS
+from planning_core import PLANNERS, convert_image, field_path, plan
+from helpers import map_origin
 
 
 # -------------- Showing start and end and path ---------------
@@ -122,30 +119,6 @@ def is_free(im, pix):
     return False
 
 
-def convert_image(im, wall_threshold, free_threshold):
-    """ Convert the image to a thresholded image with not seen pixels marked
-    @param im - WXHX ?? image (depends on input)
-    @param wall_threshold - number between 0 and 1 to indicate wall
-    @param free_threshold - number between 0 and 1 to indicate free space
-    @return an image of the same WXH but with 0 (free) 255 (wall) 128 (unseen)"""
-
-    # Assume all is unseen
-    im_ret = np.zeros((im.shape[0], im.shape[1]), dtype='uint8') + 128
-
-    im_avg = im
-    if len(im.shape) == 3:
-        # RGB image - convert to gray scale
-        im_avg = np.mean(im, axis=2)
-    # Force into 0,1
-    im_avg = im_avg / np.max(im_avg)
-    # threshold
-    #   in our example image, black is walls, white is free
-    im_ret[im > wall_threshold] = 0
-    im_ret[(im < free_threshold) & (im != -1)] = 255
-    return im_ret
-
-
-
 # -------------- Getting 4 or 8 neighbors ---------------
 def four_connected(pix):
     """ Generator function for 4 neighbors
@@ -186,190 +159,76 @@ def get_neighbors(im, loc):
 
 
 
-def dijkstra(im, robot_loc, goal_loc, map_data):
+def dijkstra(im, robot_loc, goal_loc, map_data, costmap=None, planner="astar", path_cache=None):
     """ Occupancy grid image, with robot and goal loc as pixels
     @param im - the thresholded image - use is_free(i, j) to determine if in reachable node
     @param robot_loc - where the robot is (tuple, i,j)
     @param goal_loc - where to go to (tuple, i,j)
-    @returns a list of tuples"""
+    @param map_data - MapMetaData, for the resolution and origin of the map
+    @param costmap - Costmap of this version of the map, so the inflation can be shared. Built here if None
+    @param planner - which search to use, one of the keys of PLANNERS, or a planner object that keeps its search
+        between calls (like dstar_lite.DStarLite)
+    @param path_cache - path_cache.PathCache to look the path up in first. Only used if the costmap has a version
+    @returns an (N, 2) array of (x, y) points in the map frame"""
+
+    return plan(im, robot_loc, goal_loc, map_data.resolution, map_origin(map_data), costmap, planner, path_cache).path
+
+
+def path_from_field(field, goal_loc, map_data):
+    """ The path to a pixel from a cost field that was already computed, without searching again
+    @param field - grid_search.CostField from the robot
+    @param goal_loc - where to go to (tuple, i,j), must be reachable
+    @param map_data - MapMetaData, for the resolution and origin of the map
+    @returns an (N, 2) array of (x, y) points in the map frame, like dijkstra"""
+    return field_path(field, goal_loc, map_data.resolution, map_origin(map_data))
+
+
+def open_image(im_name, data_dir="Data"):
+    """ A helper function to open up a map_server map (the image and its yaml file) and threshold it
+    The image is turned into OccupancyGrid data (-1 unseen, 0 free, 100 wall, row 0 at the bottom) using the
+    thresholds in the yaml file, then thresholded the same way StudentController does
+    @param im_name - name of image in data_dir
+    @param data_dir - directory with the image and yaml file
+    @returns OccupancyGrid style image, thresholded image and a MapMetaData stand-in (resolution, size, origin)"""
+
+    # Only needed for trying things out without ROS
+    from types import SimpleNamespace
+    from PIL import Image
+    import yaml
+
+    im = np.asarray(Image.open(os.path.join(data_dir, im_name)).convert("L"))
+
+    info = {"occupied_thresh": 0.65, "free_thresh": 0.196, "negate": 0, "resolution": 0.05, "origin": [0.0, 0.0, 0.0]}
+    yaml_name = os.path.join(data_dir, os.path.splitext(im_name)[0] + ".yaml")
+    if os.path.exists(yaml_name):
+        with open(yaml_name, "r") as f:
+            info.update(yaml.safe_load(f))
 
-    rospy.loginfo("Starting dijkstras")
-    
-    robot_height_in_pixels = int(0.44 / map_data.resolution * 1.5)
+    # Same as map_server: the darker the pixel, the more likely it is a wall
+    occupied = im / 255.0 if info["negate"] else (255 - im) / 255.0
+    grid = np.full(im.shape, -1, dtype=np.int8)
+    grid[occupied > info["occupied_thresh"]] = 100
+    grid[occupied < info["free_thresh"]] = 0
+    # Image rows go top to bottom, OccupancyGrid rows go up from the origin
+    grid = grid[::-1]
 
-    kernel = np.ones((robot_height_in_pixels, robot_height_in_pixels))
-    
-    unseen_or_blocked_areas = (im == 0)
-    convolve_result = convolve(unseen_or_blocked_areas, kernel, mode='constant', cval=1)
-    free_areas = convolve_result == 0
-
-    # free_areas = convolve(im, kernel, mode='constant', cval=0)
-    # free_areas = free_areas > 0
-
-    goal_loc = (goal_loc[0], goal_loc[1])
-
-    # Sanity check
-    #if not is_free(im, robot_loc):
-    #    raise ValueError(f"Start location {robot_loc} is not in the free space of the map")
-
-    #if not is_free(im, goal_loc):
-    #    raise ValueError(f"Goal location {goal_loc} is not in the free space of the map")
-
-    # The priority queue itself is just a list, with elements of the form (weight, (i,j))
-    #    - i.e., a tuple with the first element the weight/score, the second element a tuple with the pixel location
-    priority_queue = []
-    # Push the start node onto the queue
-    #   push takes the queue itself, then a tuple with the first element the priority value and the second
-    #   being whatever data you want to keep - in this case, the robot location, which is a tuple
-    heapq.heappush(priority_queue, (0, robot_loc))
-
-    # The power of dictionaries - we're going to use a dictionary to store every node we've visited, along
-    #   with the node we came from and the current distance
-    # This is easier than trying to get the distance from the heap
-    visited = {}
-    # Use the (i,j) tuple to index the dictionary
-    #   Store the best distance, the parent, and if closed y/n
-    visited[robot_loc] = (0, None, False)   # For every other node this will be the current_node, distance
-
-    # While the list is not empty - use a break for if the node is the end node
-    while priority_queue:
-        # Get the current best node off of the list
-        current_node = heapq.heappop(priority_queue)
-        # Pop returns the value and the i, j
-        node_score = current_node[0]
-        node_ij = current_node[1]
-
-        # Showing how to get this data back out of visited
-        visited_triplet = visited[node_ij]
-        visited_distance = visited_triplet[0]
-        visited_parent = visited_triplet[1]
-        visited_closed_yn = visited_triplet[2]
-
-        #  Step 1: Break out of the loop if node_ij is the goal node
-        if node_ij == goal_loc:
-            break
-
-        #  Step 2: If this node is closed, skip it
-        if visited_closed_yn:
-            continue
-
-        #  Step 3: Set the node to closed
-        visited[node_ij] = (visited_distance, visited_parent, True)
-
-        #    Now do the instructions from the slide (the actual algorithm)
-        #  Lec 8_1: Planning, at the end
-        #  https://docs.google.com/presentation/d/1pt8AcSKS2TbKpTAVV190pRHgS_M38ldtHQHIltcYH6Y/edit#slide=id.g18d0c3a1e7d_0_0
-        for di in [-1, 0, 1]:
-            for dj in [-1, 0, 1]:
-                # Don't do anything for the case where we don't move
-                if di == 0 and dj == 0:
-                    continue
-                
-                neighbor = (node_ij[0] + di, node_ij[1] + dj)
-                
-                # Check if neighbor in direction (di, dj) is valid and free
-                if not is_free(im, (neighbor)):
-                    continue
-
-                if not free_areas[neighbor[1], neighbor[0]]:
-                    if neighbor == goal_loc:
-                        rospy.logerr("Skipping goal_loc")
-                    continue
-                    
-                # if free_areas[im[1], im[0]] == 0:
-                #     continue
-
-                # Calculate distance to neighbor and distance to goal and add them to existing cost
-                distance = np.linalg.norm((di, dj)) + visited_distance
-                heuristic = np.linalg.norm((neighbor[0] - goal_loc[0], neighbor[1] - goal_loc[1]))
-                
-                # If we haven't tried this path add it to the queue
-                if neighbor not in visited or distance < visited[neighbor][0]:
-                    visited[neighbor] = (distance, node_ij, False)
-                    heapq.heappush(priority_queue, (distance + heuristic, neighbor))
-
-    # Now check that we actually found the goal node, if not make a path as close as possible
-    if not goal_loc in visited:
-        old_goal_loc = goal_loc
-        visited_points = np.array(list(visited.keys()))
-        distances = np.linalg.norm(visited_points - goal_loc)
-        goal_loc = visited_points[np.argmin(distances)]
-        ## rospy.loginfo(f"Recursing dijkstra")
-        ## return dijkstra(im, robot_loc, ((goal_loc[0] + robot_loc[0]) // 2, (goal_loc[1] + robot_loc[1]) // 2), map_data)
-        # goal_loc = tuple(find_highest_concentration_point(visited.keys(), im, map_data, radius=0.25))
-        rospy.logerr(f"Goal {old_goal_loc} was unreachable, sending {goal_loc} instead")
-        rospy.logerr(f"Length of visited is {len(visited)}")
-
-        rospy.loginfo("Saving visited points visualization")
-
-        fig, ax = plt.subplots()
-
-        # Plot the base image/map
-        plt.imshow(im[1800:2200, 1800:2200], cmap='plasma')
-
-        # Plot visited points in blue
-        ax.scatter(visited_points[:, 0] - 1800, visited_points[:, 1] - 1800, 
-                color='blue', marker='.', s=0.25, alpha=0.5)
-
-        # Plot robot location with yellow star
-        ax.scatter([robot_loc[0] - 1800], [robot_loc[1] - 1800], 
-                color='yellow', marker='*', s=100)
-
-        # Plot goal location with green star
-        ax.scatter([old_goal_loc[0] - 1800], [old_goal_loc[1] - 1800], 
-                color='green', marker='*', s=100)
-
-        ax.invert_yaxis()
-        plt.colorbar()
-        plt.savefig(os.path.expanduser("~/ros_ws/src/lab3/images/visited_points.png"))
-        rospy.loginfo(f"im shape: {im.shape}")
-        rospy.loginfo("Saved visited points visualization")
-        
-    path = []
-    current = tuple(goal_loc)
-    # While there's a parent
-    while current is not None:
-        current_x_in_space = current[0] * map_data.resolution + map_data.origin.position.x
-        current_y_in_space = current[1] * map_data.resolution + map_data.origin.position.y
-        path.insert(0, (current_x_in_space, current_y_in_space))
-        current = visited[current][1]
-
-    return path
-
-def open_image(im_name):
-    """ A helper function to open up the image and the yaml file and threshold
-    @param im_name - name of image in Data directory
-    @returns image anbd thresholded image"""
-
-    # Needed for reading in map info
-    from os import open
-
-    im = imageio.imread("Data/" + im_name)
-
-    wall_threshold = 0.7
-    free_threshold = 0.9
-    try:
-        yaml_name = "Data/" + im_name[0:-3] + "yaml"
-        with open(yaml_name, "r") as f:
-            dict = yaml.load_all(f)
-            wall_threshold = dict["occupied_thresh"]
-            free_threshold = dict["free_thresh"]
-    except:
-        pass
+    map_data = SimpleNamespace(resolution=info["resolution"], width=grid.shape[1], height=grid.shape[0],
+                               origin=SimpleNamespace(position=SimpleNamespace(x=info["origin"][0],
+                                                                               y=info["origin"][1])))
+    im_thresh = convert_image(grid, 0.8, 0.2)
+    return grid, im_thresh, map_data
 
-    im_thresh = convert_image(im, wall_threshold, free_threshold)
-    return im, im_thresh
 
+def map_to_pixels(path, map_data):
+    """ Undo the last step of dijkstra, (N, 2) points in the map frame back to pixels, for plotting"""
+    return (np.asarray(path) - np.array(map_origin(map_data))) / map_data.resolution
 
 
 if __name__ == '__main__':
-    # Putting this here because in JN it's yaml
-    import yaml_1 as yaml
-
     # Use one of these
 
     """ Values for SLAM map
-    im, im_thresh = open_image("SLAM_map.png")
+    im, im_thresh, map_data = open_image("SLAM_map.png")
     robot_start_loc = (200, 150)
     # Closer one to try
     # robot_goal_loc = (315, 250)
@@ -378,7 +237,7 @@ if __name__ == '__main__':
     """
 
     """ Values for map.pgm"""
-    im, im_thresh = open_image("map.pgm")
+    im, im_thresh, map_data = open_image("map.pgm")
     robot_start_loc = (1940, 1953)
     robot_goal_loc = (2135, 2045)
     zoom = 0.1
@@ -390,8 +249,9 @@ if __name__ == '__main__':
             if is_free(im_thresh, (i, j)):
                 print(f"Free {i} {j}")
     """
-    path = dijkstra(im_thresh, robot_start_loc, robot_goal_loc)
-    plot_with_path(im, im_thresh, zoom=zoom, robot_loc=robot_start_loc, goal_loc=robot_goal_loc, path=path)
+    path = dijkstra(im_thresh, robot_start_loc, robot_goal_loc, map_data)
+    plot_with_path(im, im_thresh, zoom=zoom, robot_loc=robot_start_loc, goal_loc=robot_goal_loc,
+                   path=map_to_pixels(path, map_data))
 
     # Depending on if your mac, windows, linux, and if interactive is true, you may need to call this to get the plt
     # windows to show
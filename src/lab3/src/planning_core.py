@@ -0,0 +1,595 @@
+# Planning and exploring without ROS
+#
+# Everything StudentController does with a map update, on plain arrays: the OccupancyGrid data as an (H, W) array,
+#   and the resolution and (x, y) origin of the map instead of the OccupancyGrid and MapMetaData messages. Nothing
+#   here imports rospy or matplotlib, so it can run in worker processes, benchmarks and other tools without a ROS
+#   master. path_planning and exploring keep their functions that take a MapMetaData, as wrappers around these, and
+#   StudentController only turns the messages into arrays and hands them to an Explorer.
+#
+# Log messages go to a logger that can be swapped out with set_logger. By default that is the standard library
+#   logger "lab3"; the ROS node puts in one that calls rospy.loginfo and friends. The messages are %-format strings
+#   plus their arguments, so nothing gets formatted when the logger throws the message away.
+#
+# Debug snapshots are off unless a snapshots.SnapshotWriter is set with set_snapshot_writer. Then every time a goal
+#   can't be reached, the image, what the search visited and the path are queued to be saved in the background.
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+from scipy.ndimage import find_objects, label
+
+from ara_star import ara_star
+from bidirectional import bidirectional_astar
+from costmap import Costmap, CostmapCache
+from frontier_index import FrontierIndex, frontier_mask, laser_window
+from frontier_tree import FrontierTree
+from goal_memory import GOAL_TOLERANCE, REACHED, TIMED_OUT, UNREACHABLE
+from grid_search import astar, cost_field
+from info_gain import SICK_RANGE
+from jump_point import jump_point_search
+from known_region import known_region, inflation_margin
+from path_cache import PathCache
+from pyramid import coarse_to_fine
+from theta_star import lazy_theta_star, shortcut
+
+
+# The search algorithms plan can use. They all take (passable, robot_loc, goal_loc) and return a SearchResult
+PLANNERS = {
+    "astar": astar,
+    "jps": jump_point_search,
+    "pyramid": coarse_to_fine,
+    "bidirectional": bidirectional_astar,
+    "theta": lazy_theta_star,
+    "ara": ara_star,
+}
+
+# Frontier points closer than this many robot diagonals are under the robot already
+GOAL_EXCLUSION = 10
+
+_default_logger = logging.getLogger("lab3")
+_logger = _default_logger
+_snapshots = None
+
+
+def set_logger(logger=None):
+    """ Send the log messages somewhere else
+    @param logger - anything with debug, info, warning and error methods that take a %-format string and its
+        arguments, like a logging.Logger. None goes back to the "lab3" logging.Logger"""
+    global _logger
+    _logger = _default_logger if logger is None else logger
+
+
+def get_logger():
+    return _logger
+
+
+def set_snapshot_writer(writer=None):
+    """ Save debug snapshots of unreachable goals with this snapshots.SnapshotWriter. None turns them off"""
+    global _snapshots
+    _snapshots = writer
+
+
+# The result of plan. path is in the map frame, pixels is the same path in pixels, goal is the pixel the path ends
+#   at (not the one asked for if that couldn't be reached), visited is the search's visited image, when it has one,
+#   and timed_out is True if an anytime planner (ara_star) stopped at its deadline
+PlanResult = namedtuple("PlanResult", ["path", "pixels", "goal", "reached", "expansions", "visited", "timed_out"])
+
+# Frontier pixels grouped into connected pieces of frontier, see frontier_clusters. Per pixel: cells (N, 2) int32
+#   (i, j) and labels (N,) int32, which cluster each pixel is in (0 to K-1). Per cluster: sizes (K,) in pixels,
+#   centroids (K, 2) float (i, j), boxes (K, 4) int32 (i0, j0, i1, j1) with i1 and j1 inclusive, and representatives
+#   (K,) index into cells of the pixel closest to the centroid, which is a frontier pixel even if the centroid isn't
+Frontiers = namedtuple("Frontiers", ["cells", "labels", "sizes", "centroids", "boxes", "representatives"])
+
+# Frontier clusters shorter than this many meters of frontier are noise in the map
+MIN_CLUSTER_LENGTH = 0.25
+
+# How much bigger frontier clusters are preferred, see cluster_weights
+CLUSTER_WEIGHT = 0.5
+
+# One step of exploring, see Explorer.update. path is in the map frame (only the corners if the Explorer is
+#   any_angle), goal is the frontier point in full map pixels, im is the thresholded crop the path was planned on
+ExploreStep = namedtuple("ExploreStep", ["path", "goal", "reached", "im", "region"])
+
+
+def convert_image(im, wall_threshold, free_threshold):
+    """ Convert the image to a thresholded image with not seen pixels marked
+    @param im - WXHX ?? image (depends on input)
+    @param wall_threshold - number between 0 and 1 to indicate wall
+    @param free_threshold - number between 0 and 1 to indicate free space
+    @return an image of the same WXH but with 0 (free) 255 (wall) 128 (unseen)"""
+
+    # Assume all is unseen
+    im_ret = np.zeros((im.shape[0], im.shape[1]), dtype='uint8') + 128
+
+    im_avg = im
+    if len(im.shape) == 3:
+        # RGB image - convert to gray scale
+        im_avg = np.mean(im, axis=2)
+    # Force into 0,1
+    im_avg = im_avg / np.max(im_avg)
+    # threshold
+    #   in our example image, black is walls, white is free
+    im_ret[im > wall_threshold] = 0
+    im_ret[(im < free_threshold) & (im != -1)] = 255
+    return im_ret
+
+
+def pixels_to_map(pixels, resolution, origin):
+    """ Pixels (i, j), or an (N, 2) array of them, to (x, y) in the map frame
+    @param resolution - size of a pixel in meters
+    @param origin - (x, y) of pixel (0, 0) in the map frame"""
+    return np.asarray(pixels) * resolution + np.asarray(origin, dtype=float)
+
+
+def plan(im, robot_loc, goal_loc, resolution, origin, costmap=None, planner="astar", path_cache=None):
+    """ Plan a path from the robot to the goal on the inflated free space
+    @param im - the thresholded image
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @param resolution - size of a pixel in meters
+    @param origin - (x, y) of pixel (0, 0) in the map frame
+    @param costmap - Costmap of this version of the map, so the inflation can be shared. Built here if None
+    @param planner - which search to use, one of the keys of PLANNERS, or a planner object that keeps its search
+        between calls (like dstar_lite.DStarLite)
+    @param path_cache - path_cache.PathCache to look the path up in first. Only used if the costmap has a version
+    @return PlanResult"""
+    if isinstance(planner, str) and planner not in PLANNERS:
+        raise ValueError(f"Unknown planner {planner}, expected one of {list(PLANNERS)}")
+    _logger.info("Planning with %s", planner if isinstance(planner, str) else type(planner).__name__)
+
+    if costmap is None:
+        costmap = Costmap(im, resolution)
+
+    # A pixel can be driven through if it is free and far enough away from any wall
+    passable = costmap.planning_passable
+
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+    if path_cache is not None and costmap.version is not None:
+        path_cache.set_map(costmap.version, passable, origin, resolution)
+        cached = path_cache.get(robot_loc, goal_loc)
+        if cached is not None:
+            _logger.info("Using cached path (%d hits, %d misses)", path_cache.hits, path_cache.misses)
+            end = (int(cached.pixels[-1][0]), int(cached.pixels[-1][1]))
+            return PlanResult(cached.path, cached.pixels, end, cached.reached, 0, None, False)
+    else:
+        path_cache = None
+
+    if planner == "pyramid":
+        # The pyramid is kept with the costmap, so it is only built once per version of the map
+        result = coarse_to_fine(passable, robot_loc, goal_loc, costmap.planning_pyramid)
+    elif isinstance(planner, str):
+        result = PLANNERS[planner](passable, robot_loc, goal_loc)
+    else:
+        result = planner.plan(passable, robot_loc, goal_loc, tuple(origin))
+
+    end = (int(result.path[-1][0]), int(result.path[-1][1]))
+    # Only an anytime search (ara_star) can run out of time
+    timed_out = bool(getattr(result, "timed_out", False))
+    if not result.reached and timed_out:
+        # Says nothing about whether the goal can be reached, so it isn't a snapshot either
+        _logger.warning("Ran out of time planning to %s, sending %s instead", goal_loc, end)
+    elif not result.reached:
+        # The path goes as close as it can get instead
+        _logger.error("Goal %s was unreachable, sending %s instead", goal_loc, end)
+        if _snapshots is not None:
+            arrays = {"im": im, "path": result.path, "robot": np.asarray(robot_loc), "goal": np.asarray(goal_loc),
+                      "origin": np.asarray(origin, dtype=float), "resolution": resolution}
+            if result.visited is not None:
+                arrays["visited"] = result.visited
+            _snapshots.submit("unreachable", **arrays)
+    _logger.info("Search expanded %d nodes", result.expansions)
+    bound = getattr(result, "bound", None)
+    if bound is not None:
+        _logger.info("Path is within %.2f of optimal after %d searches", bound, result.iterations)
+
+    path = pixels_to_map(result.path, resolution, origin)
+    if path_cache is not None:
+        path_cache.put(robot_loc, goal_loc, result.path, path, result.reached)
+    return PlanResult(path, result.path, end, result.reached, result.expansions, result.visited, timed_out)
+
+
+def frontier_points(im, resolution, costmap=None, factor=1):
+    """ Free pixels next to an unseen pixel, with room for the robot around them
+    @param im - the thresholded image
+    @param resolution - size of a pixel in meters
+    @param costmap - Costmap of this version of the map, so the inflation can be shared. Built here if None
+    @param factor - look for them on the map shrunk by this much (see Costmap.coarse), which is quicker and gives
+        fewer points. The points are still full resolution pixels, the middle of each coarse one
+    @return set of pixels (i, j)"""
+    if costmap is None:
+        costmap = Costmap(im, resolution)
+
+    if factor > 1:
+        coarse = costmap.coarse(factor)
+        coarse_points = frontier_points(coarse.im, resolution, coarse)
+        height, width = im.shape
+        return {(min(i * factor + factor // 2, width - 1), min(j * factor + factor // 2, height - 1))
+                for i, j in coarse_points}
+
+    rows, cols = np.nonzero(frontier_mask(im, costmap.frontier_free_areas))
+    return set(zip(cols.tolist(), rows.tolist()))
+
+
+def frontier_clusters(im, resolution, costmap=None, min_length=MIN_CLUSTER_LENGTH):
+    """ The frontier pixels (see frontier_points), grouped into eight connected clusters, all with array operations
+    Clusters with fewer than min_length / resolution pixels are dropped as noise
+    @param im - the thresholded image
+    @param resolution - size of a pixel in meters
+    @param costmap - Costmap of this version of the map, so the inflation can be shared. Built here if None
+    @param min_length - smallest cluster that is kept, in meters of frontier
+    @return Frontiers, ordered by cluster and then by row"""
+    if costmap is None:
+        costmap = Costmap(im, resolution)
+    return clusters_from_mask(frontier_mask(im, costmap.frontier_free_areas), resolution, min_length)
+
+
+def clusters_from_mask(mask, resolution, min_length=MIN_CLUSTER_LENGTH):
+    """ frontier_clusters of a frontier mask that was already worked out (like FrontierIndex.mask, cropped)
+    @param mask - boolean image, True on the frontier
+    @param resolution - size of a pixel in meters
+    @param min_length - smallest cluster that is kept, in meters of frontier
+    @return Frontiers"""
+    labels, count = label(mask, structure=np.ones((3, 3), dtype=bool))
+    sizes = np.bincount(labels.ravel(), minlength=count + 1)[1:]
+    keep = sizes >= max(min_length / resolution, 1)
+    # New cluster numbers for the ones that are kept, 0 for the background and the dropped ones
+    renumber = np.zeros(count + 1, dtype=np.int32)
+    renumber[1:][keep] = np.arange(1, np.count_nonzero(keep) + 1)
+    boxes = [box for box, kept in zip(find_objects(labels), keep) if kept]
+    labels = renumber[labels]
+
+    rows, cols = np.nonzero(labels)
+    cell_labels = labels[rows, cols] - 1
+    order = np.argsort(cell_labels, kind="stable")
+    cells = np.column_stack((cols[order], rows[order])).astype(np.int32)
+    cell_labels = cell_labels[order]
+    sizes = sizes[keep]
+
+    centroids = np.column_stack((np.bincount(cell_labels, weights=cells[:, 0], minlength=len(sizes)),
+                                 np.bincount(cell_labels, weights=cells[:, 1], minlength=len(sizes))))
+    centroids = centroids.astype(float) / np.maximum(sizes, 1)[:, None]
+    boxes = np.array([(box[1].start, box[0].start, box[1].stop - 1, box[0].stop - 1) for box in boxes],
+                     dtype=np.int32).reshape(-1, 4)
+    # Sorted by cluster and then by distance to its centroid, the first pixel of each cluster's block is the closest
+    distances = np.hypot(*(cells - centroids[cell_labels]).T)
+    starts = np.cumsum(sizes) - sizes
+    representatives = np.lexsort((distances, cell_labels))[starts]
+    return Frontiers(cells, cell_labels, sizes, centroids, boxes, representatives)
+
+
+def as_tree(possible_points):
+    """ Frontier points as a FrontierTree, from a set of them, an array (like Frontiers.cells) or a tree already
+    Build the tree once per set of frontier points and hand it to every strategy, instead of the points"""
+    if isinstance(possible_points, FrontierTree):
+        return possible_points
+    return FrontierTree(possible_points)
+
+
+def exclusion_radius(resolution):
+    """ Frontier points closer than this many pixels to the robot are under it, and not worth going to"""
+    robot_map_area = np.linalg.norm((0.22 / resolution, 0.19 / resolution))
+    return robot_map_area * GOAL_EXCLUSION
+
+
+def closest_frontier(possible_points, robot_loc, resolution):
+    """ The frontier point closest to the robot in a straight line, skipping the ones right next to it
+    @param possible_points - possible points to chose from, a set of (i, j), an (N, 2) array or a FrontierTree
+    @param robot_loc - location of the robot
+    @param resolution - size of a pixel in meters
+    @return the best point (i, j), or None if there isn't one"""
+    tree = as_tree(possible_points)
+    if len(tree) == 0:
+        return None
+    best_point_idx, _ = tree.nearest(robot_loc, exclusion_radius(resolution))
+    if best_point_idx is None:
+        _logger.error("All %d frontier points are under the robot", len(tree))
+        return None
+    best_point = tree.point(best_point_idx)
+    _logger.info("Closest point found is: %s", best_point)
+    return best_point
+
+
+def nearest_frontiers(possible_points, robot_loc, resolution, count):
+    """ The frontier points closest to the robot in a straight line, skipping the ones right next to it
+    @param possible_points - possible points to chose from, a set of (i, j), an (N, 2) array or a FrontierTree
+    @param robot_loc - location of the robot
+    @param resolution - size of a pixel in meters
+    @param count - how many
+    @return up to count points (i, j), closest first"""
+    tree = as_tree(possible_points)
+    nearest, _ = tree.k_nearest(robot_loc, count, exclusion_radius(resolution))
+    return [tree.point(i) for i in nearest]
+
+
+def cheapest_frontier(possible_points, robot_loc, resolution, field, penalties=None, weights=None):
+    """ The frontier point that is cheapest to drive to, by path cost instead of straight line distance
+    Points right next to the robot are skipped, the same as closest_frontier
+    @param possible_points - possible points to chose from, a set of (i, j), an (N, 2) array or a FrontierTree
+    @param robot_loc - location of the robot
+    @param resolution - size of a pixel in meters
+    @param field - grid_search.CostField from the robot, on the planning passable mask
+    @param penalties - (N,) meters to add to the path cost of each point, inf to skip it (see GoalMemory.penalties)
+    @param weights - (N,) how much each point is worth, the cost is divided by it (see cluster_weights)
+    @return the best point (i, j) and its path cost in pixels, or None, inf if none of them can be reached"""
+    tree = as_tree(possible_points)
+    points = tree.points
+    if len(points) == 0:
+        return None, np.inf
+    costs = field.cost(points)
+    costs[tree.excluded(robot_loc, exclusion_radius(resolution))] = np.inf
+    if penalties is not None:
+        costs += np.asarray(penalties) / resolution
+    weighted = costs if weights is None else costs / np.asarray(weights)
+
+    best_point_idx = int(np.argmin(weighted))
+    if costs[best_point_idx] == np.inf:
+        _logger.error("None of the %d frontier points can be reached", len(points))
+        return None, np.inf
+    best_point = tree.point(best_point_idx)
+    _logger.info("Cheapest point found is: %s, path cost %.1f pixels, %d of %d reachable", best_point,
+                 costs[best_point_idx], np.count_nonzero(np.isfinite(costs)), len(points))
+    return best_point, float(costs[best_point_idx])
+
+
+def informative_frontier(possible_points, robot_loc, resolution, field, im, gain, penalties=None, weights=None):
+    """ The frontier point with the best trade off between what the laser would see from it and the path cost there
+    Points right next to the robot and points that can't be reached are skipped
+    @param possible_points - possible points to chose from, a set of (i, j), an (N, 2) array or a FrontierTree
+    @param robot_loc - location of the robot
+    @param resolution - size of a pixel in meters
+    @param field - grid_search.CostField from the robot, on the planning passable mask
+    @param im - the thresholded image, for the raycasts
+    @param gain - info_gain.InformationGain
+    @param penalties - (N,) meters to add to the path cost of each point, inf to skip it (see GoalMemory.penalties)
+    @param weights - (N,) how much each point is worth, the score is multiplied by it (see cluster_weights)
+    @return the best point (i, j) and its score, or None, 0 if none of them can be reached"""
+    tree = as_tree(possible_points)
+    points = tree.points
+    if len(points) == 0:
+        return None, 0.0
+    keep = tree.outside(robot_loc, exclusion_radius(resolution))
+    costs = field.cost(points)
+    if penalties is not None:
+        costs += np.asarray(penalties) / resolution
+    keep &= np.isfinite(costs)
+    if not keep.any():
+        _logger.error("None of the %d frontier points can be reached", len(points))
+        return None, 0.0
+    points = points[keep]
+    costs = costs[keep] * resolution
+    gains = gain.gains(im, resolution, points)
+    scores = gain.scores(gains, costs)
+    if weights is not None:
+        scores = scores * np.asarray(weights)[keep]
+    best = int(np.argmax(scores))
+    best_point = tuple(int(v) for v in points[best])
+    _logger.info("Most informative point is %s: sees %.1f m^2 of unseen map, %.1f m away, score %.2f", best_point,
+                 gains[best], costs[best], scores[best])
+    return best_point, float(scores[best])
+
+
+def cluster_weights(sizes, resolution):
+    """ How much each frontier cluster is worth next to the others, from how much frontier it has. The smallest
+    clusters that are kept (MIN_CLUSTER_LENGTH) are worth 1, and it goes up with the log of the length, so a long
+    stretch of frontier wins over a short one that is a little closer but not over one that is much closer
+    @param sizes - (K,) Frontiers.sizes, in pixels
+    @param resolution - size of a pixel in meters
+    @return (K,) weights, at least 1"""
+    lengths = np.asarray(sizes, dtype=float) * resolution
+    return 1 + CLUSTER_WEIGHT * np.log(np.maximum(lengths / MIN_CLUSTER_LENGTH, 1))
+
+
+def field_path(field, goal_loc, resolution, origin):
+    """ Path to goal_loc out of a cost field that was already computed, instead of searching again
+    @param field - grid_search.CostField from the robot
+    @param goal_loc - where to go to (tuple, i,j), has to be reachable in the field
+    @param resolution - size of a pixel in meters
+    @param origin - (x, y) of pixel (0, 0) in the map frame
+    @return an (N, 2) array of (x, y) points in the map frame, like plan"""
+    return pixels_to_map(field.path_to(goal_loc), resolution, origin)
+
+
+class Explorer:
+    """ Picks the next frontier point to go to, and the path there, one map update at a time
+    Keeps what can be reused between updates: the costmaps per version of the map, the planner, the path cache and
+    the known region of the last update.
+
+    The planner is only used when no frontier point can be reached, to get as close as possible to the closest one.
+    That goal is different from one update to the next, so there is no search for D* Lite (dstar_lite.DStarLite) to
+    repair, and it ends up doing a full search and then a flood for the closest pixel it saw, which is slower than
+    A* on its own. So the default is A*; a DStarLite can still be passed in."""
+    def __init__(self, planner=None, costmaps=None, path_cache=None, any_angle=True, candidate_pool=None,
+                 candidates=4, information_gain=None, goal_memory=None, laser_range=SICK_RANGE):
+        """
+        @param planner - planner for when no frontier point can be reached, see plan. "astar" if None
+        @param costmaps - costmap.CostmapCache, a new one if None
+        @param path_cache - path_cache.PathCache, a new one if None
+        @param any_angle - pull the paths tight (theta_star.shortcut), so they are only their corners
+        @param candidate_pool - candidate_pool.CandidatePool. If there is one, the closest few frontier points are
+            planned to in parallel and the cheapest path wins, instead of scoring them all with one cost field
+        @param candidates - how many frontier points the candidate pool plans to
+        @param information_gain - info_gain.InformationGain. If there is one, the frontier point is picked by what
+            the laser would see from it as well as by the path cost (only without a candidate pool)
+        @param goal_memory - goal_memory.GoalMemory. If there is one, frontier points near goals that couldn't be
+            reached are skipped and the ones near goals that timed out or were reached cost more, see record_outcome
+        @param laser_range - in meters. Only the map within that of where the robot has been since the last update is
+            looked at for changes to the frontier"""
+        self.planner = "astar" if planner is None else planner
+        self.costmaps = CostmapCache() if costmaps is None else costmaps
+        self.path_cache = PathCache() if path_cache is None else path_cache
+        self.any_angle = any_angle
+        self.candidate_pool = candidate_pool
+        self.candidates = candidates
+        self.frontier_index = FrontierIndex()
+        self.information_gain = information_gain
+        self.goal_memory = goal_memory
+        # The last goal, (x, y) in the map frame, until record_outcome says how it went
+        self.goal = None
+        # Part of the map that was cropped out last time, see known_region
+        self.region = None
+        self.laser_range = laser_range
+        # Full map pixel the robot was at in the last update, to know where the laser can have changed the map since
+        self._robot_loc = None
+
+    def update(self, data, robot_loc, resolution, origin, version=None):
+        """ Work out where to go next on a new version of the map
+        @param data - (H, W) OccupancyGrid data, -1 unseen, otherwise 0 (free) to 100 (wall)
+        @param robot_loc - pixel (i, j) of the robot in the full map
+        @param resolution - size of a pixel in meters
+        @param origin - (x, y) of pixel (0, 0) in the map frame
+        @param version - key of this version of the map (see costmap.map_version). If None nothing is kept for the
+            next update
+        @return ExploreStep, or None if there are no frontier points left"""
+        # Only work on the part of the map that has been seen (plus enough room for the inflation), and move
+        #   everything into the pixels of that crop
+        region = known_region(data, inflation_margin(resolution), include=(robot_loc,))
+        self.region = region
+        _logger.info("Known region is %s of %s", region.shape, data.shape)
+        robot_loc = region.to_local(robot_loc)
+        region_origin = region.origin(origin, resolution)
+        im_thresh = convert_image(region.crop(data), wall_threshold=0.8, free_threshold=0.2)
+        # Inflate once for this version of the map, and share it between the frontiers and the planner
+        if version is None:
+            costmap = Costmap(im_thresh, resolution)
+        else:
+            costmap = self.costmaps.get(version, im_thresh, resolution, region_origin)
+
+        # Frontier pixels in clusters, without the specks of noise. The frontier index only redoes the part of the
+        #   frontier around what changed since the last version
+        if version is None:
+            frontiers = frontier_clusters(im_thresh, resolution, costmap)
+        else:
+            full_loc = region.to_full(robot_loc)
+            window = None if self._robot_loc is None else \
+                laser_window((self._robot_loc, full_loc), self.laser_range, resolution, data.shape)
+            self._robot_loc = full_loc
+            mask = self.frontier_index.update(data, region, im_thresh, costmap, origin, resolution, window)
+            frontiers = clusters_from_mask(mask, resolution)
+        points = frontiers.cells
+        _logger.info("Found %d frontier points in %d clusters", len(points), len(frontiers.sizes))
+        if not len(points):
+            return None
+        # One k-d tree of the frontier for every way of picking from it below. Goals are picked out of the tens of
+        #   clusters, by the pixel in the middle of each one, and only out of all of the pixels if none of those do
+        tree = FrontierTree(points)
+        representatives = points[frontiers.representatives]
+        sizes = frontiers.sizes
+
+        penalties = None
+        representative_penalties = None
+        skipped = set()
+        if self.goal_memory is not None:
+            penalties = self.goal_memory.penalties(pixels_to_map(points, resolution, region_origin))
+            skip = np.isinf(penalties)
+            representative_penalties = penalties[frontiers.representatives]
+            if skip.any():
+                _logger.info("Skipping %d frontier points near goals that failed", np.count_nonzero(skip))
+                skipped = {tuple(int(v) for v in point) for point in points[skip]}
+                if self.candidate_pool is not None:
+                    # Each candidate that would have been planned to without the memory is a search not done
+                    planned = nearest_frontiers(representatives, robot_loc, resolution, self.candidates)
+                    self.goal_memory.planner_calls_saved += sum(goal in skipped for goal in planned)
+                unfiltered = tree
+                keep = ~skip[frontiers.representatives]
+                representatives, sizes = representatives[keep], sizes[keep]
+                representative_penalties = penalties[frontiers.representatives][keep]
+                points, penalties = points[~skip], penalties[~skip]
+                if not len(points):
+                    self.goal_memory.planner_calls_saved += 1
+                    _logger.warning("Every frontier point is near a goal that failed, waiting for them to expire")
+                    return None
+                tree = FrontierTree(points)
+
+        best_point = None
+        if self.candidate_pool is not None:
+            # A search to the middle of each of the closest few clusters, in parallel
+            goals = nearest_frontiers(representatives, robot_loc, resolution, self.candidates)
+            key = None if version is None else (version, region)
+            best = self.candidate_pool.best_path(region.crop(data), costmap.planning_passable, resolution,
+                                                 region_origin, key, robot_loc, goals)
+            if best is not None:
+                best_point, pixels = best.goal, best.pixels
+                _logger.info("Cheapest of %d candidates is %s, path cost %.1f pixels", len(goals), best_point,
+                             best.cost)
+        else:
+            # One wavefront from the robot scores every cluster by how far it really is to drive there, and already
+            #   has the path to whichever one wins. Bigger clusters are worth more
+            field = cost_field(costmap.planning_passable, robot_loc)
+            clusters = FrontierTree(representatives)
+            weights = cluster_weights(sizes, resolution)
+            if self.information_gain is not None:
+                best_point, score = informative_frontier(clusters, robot_loc, resolution, field, im_thresh,
+                                                         self.information_gain, representative_penalties, weights)
+                if best_point is not None and score <= 0:
+                    # Nothing left to see from anywhere the laser model can tell, so just the cheapest one
+                    best_point = None
+            if best_point is None:
+                best_point, _ = cheapest_frontier(clusters, robot_loc, resolution, field, representative_penalties,
+                                                  weights)
+            if best_point is None:
+                # The middle of a cluster can be out of reach (or under the robot) when some of it isn't
+                best_point, _ = cheapest_frontier(tree, robot_loc, resolution, field, penalties)
+            if best_point is not None:
+                pixels = self._field_path(field, costmap, robot_loc, best_point, resolution, region_origin)
+        remembered = False
+        if best_point is not None:
+            reached = True
+        else:
+            # Nothing is reachable, so head for the closest one and let the planner get as close as it can
+            best_point = closest_frontier(tree, robot_loc, resolution)
+            if best_point is None:
+                return None
+            if skipped:
+                # Without the memory this search would have been to a goal that already failed
+                index, _ = unfiltered.nearest(robot_loc, exclusion_radius(resolution))
+                self.goal_memory.planner_calls_saved += index is not None and unfiltered.point(index) in skipped
+            result = plan(im_thresh, robot_loc, best_point, resolution, region_origin, costmap, self.planner,
+                          self.path_cache)
+            pixels = result.pixels
+            reached = result.reached
+            if not reached and not result.timed_out and self.goal_memory is not None:
+                # A search that ran out of time didn't find out the goal can't be reached
+                self.goal_memory.record(pixels_to_map(best_point, resolution, region_origin), UNREACHABLE)
+                remembered = True
+        if self.any_angle:
+            pixels = shortcut(costmap.planning_passable, pixels)
+        path = pixels_to_map(pixels, resolution, region_origin)
+        goal = tuple(int(v) for v in region.to_full(best_point))
+        _logger.info("best_point was %s", goal)
+        # A goal that couldn't be reached is already remembered, there's nothing more to hear about it. One the path
+        #   stops short of because the planner ran out of time is still to be heard about, see record_outcome
+        self.goal = None
+        if not remembered:
+            self.goal = tuple(float(v) for v in pixels_to_map(best_point, resolution, region_origin))
+        return ExploreStep(path, goal, reached, im_thresh, region)
+
+    def _field_path(self, field, costmap, robot_loc, goal_loc, resolution, origin):
+        """ Path in pixels to a goal that can be reached in the cost field, out of the path cache if it is still there
+        from an earlier update (the robot hasn't got anywhere and the same goal won again)"""
+        if costmap.version is None:
+            return field.path_to(goal_loc)
+        self.path_cache.set_map(costmap.version, costmap.planning_passable, origin, resolution)
+        cached = self.path_cache.get(robot_loc, goal_loc)
+        if cached is not None and cached.reached:
+            _logger.info("Using cached path (%d hits, %d misses)", self.path_cache.hits, self.path_cache.misses)
+            return cached.pixels
+        pixels = field.path_to(goal_loc)
+        self.path_cache.put(robot_loc, goal_loc, pixels, pixels_to_map(pixels, resolution, origin), True)
+        return pixels
+
+    def record_outcome(self, robot, tolerance=GOAL_TOLERANCE):
+        """ Say how going to the last goal turned out, for the goal memory, once the robot is done with it: reached
+        if the robot is within tolerance of it, timed out if it isn't (it got stuck, or the path stopped short).
+        Only the first call after an update counts, so it's safe to call every time the robot gives up on a goal
+        @param robot - (x, y) of the robot in the map frame
+        @param tolerance - meters
+        @return goal_memory.REACHED or goal_memory.TIMED_OUT, or None if nothing was recorded"""
+        if self.goal_memory is None or self.goal is None:
+            return None
+        distance = float(np.hypot(robot[0] - self.goal[0], robot[1] - self.goal[1]))
+        outcome = REACHED if distance <= tolerance else TIMED_OUT
+        self.goal_memory.record(self.goal, outcome)
+        _logger.info("Goal %s %s, %.2f m from it, %s", self.goal, outcome, distance, self.goal_memory.stats())
+        self.goal = None
+        return outcome
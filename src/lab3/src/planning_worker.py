@@ -0,0 +1,101 @@
+# Planning on a background thread, newest map first
+#
+# rospy calls the map callback on the subscriber's thread, and with a queue on the subscriber every map that came in
+#   while the last one was being planned on gets handed over afterwards, one at a time, each older than the last
+#   plan. A PlanningWorker keeps only one waiting job: the callback puts the newest map (and the pose that goes with
+#   it) there and returns straight away, and anything that was still waiting is dropped, since the new map has
+#   everything the old one had. One thread takes the jobs and runs them.
+#
+# The counters say how well planning keeps up: processed and dropped maps, and how long a map waited before it was
+#   planned on (the queueing delay).
+
+import threading
+import time
+
+from planning_core import get_logger
+
+
+class PlanningWorker:
+    """ Runs a function on a background thread, always on the newest arguments it was given"""
+    def __init__(self, handler, name="planning-worker"):
+        """
+        @param handler - what to run, called with the arguments given to submit
+        @param name - name of the thread"""
+        self.handler = handler
+        self.name = name
+        self._pending = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_delay = 0.0
+        self.max_delay = 0.0
+        self.total_delay = 0.0
+
+    def submit(self, *args):
+        """ Hand over a job, replacing the one still waiting, if there is one
+        @param args - arguments for the handler. They are not copied, so they must not be changed afterwards
+        @return True if a job that was waiting got dropped"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            dropped = self._pending is not None
+            if dropped:
+                self.dropped += 1
+            self._pending = (time.monotonic(), args)
+            self.submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return dropped
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                submitted, args = self._pending
+                self._pending = None
+
+            delay = time.monotonic() - submitted
+            self.last_delay = delay
+            self.max_delay = max(self.max_delay, delay)
+            self.total_delay += delay
+            try:
+                self.handler(*args)
+            except Exception:
+                self.errors += 1
+                get_logger().error("%s: job failed", self.name, exc_info=True)
+            self.processed += 1
+            get_logger().debug("%s: waited %.3f s, %d processed, %d dropped", self.name, delay, self.processed,
+                               self.dropped)
+
+    @property
+    def mean_delay(self):
+        return self.total_delay / self.processed if self.processed else 0.0
+
+    def stats(self):
+        """ The counters, as a dictionary"""
+        return {"submitted": self.submitted, "processed": self.processed, "dropped": self.dropped,
+                "errors": self.errors, "last_delay": self.last_delay, "max_delay": self.max_delay,
+                "mean_delay": self.mean_delay}
+
+    def close(self, wait=True):
+        """ Drop the waiting job and stop the thread, after the job it is on
+        @param wait - wait for the thread to finish"""
+        with self._condition:
+            self._closed = True
+            if self._pending is not None:
+                self._pending = None
+                self.dropped += 1
+            thread = self._thread
+            self._condition.notify()
+        if wait and thread is not None:
+            thread.join()
@@ -0,0 +1,116 @@
+# Coarse to fine planning on a pyramid of the map
+#
+# Level k of the pyramid is the map shrunk by 2^k in each direction. A coarse pixel is only passable if every
+#   pixel it covers is, so any path on a coarse level can be followed on the full map. The planner searches the
+#   coarsest level that gets to the goal, then at each finer level only searches inside a corridor a few pixels
+#   wide around the path from the level above. Most of the map never gets looked at at full resolution.
+#
+# Frontier goals sit right next to unseen pixels, so their coarse pixel usually isn't passable. A coarse path that
+#   ends within the corridor of the goal counts as getting there, and the finer levels find the last few pixels.
+#   If a finer level can't get through the corridor, the search starts over one level finer, and if even the
+#   finest coarse level doesn't work it falls back to a full grid_search.astar.
+
+import numpy as np
+from scipy.ndimage import binary_dilation
+
+from grid_search import SearchResult, astar
+
+
+def min_pool(image, factor, fill):
+    """ Shrink an image by factor, keeping the smallest value in each block
+    For a thresholded image (0 wall, 128 unseen, 255 free) a block is a wall if any of it is, and free only if all
+    of it is. For a passable mask a block is passable only if all of it is.
+    @param image - (H, W) image
+    @param factor - how much to shrink by
+    @param fill - value for the pixels past the edge of the image, when the size isn't a multiple of factor
+    @return (ceil(H / factor), ceil(W / factor)) image"""
+    height, width = image.shape
+    coarse_height = -(-height // factor)
+    coarse_width = -(-width // factor)
+    padded = np.full((coarse_height * factor, coarse_width * factor), fill, dtype=image.dtype)
+    padded[:height, :width] = image
+    return padded.reshape(coarse_height, factor, coarse_width, factor).min(axis=(1, 3))
+
+
+def build_pyramid(passable, levels=3):
+    """ Passable masks at 1x, 2x, 4x, ... 2^levels x
+    @param passable - (H, W) boolean image, True where the robot can go
+    @param levels - how many coarse levels to add
+    @return list of boolean images, the full resolution one first"""
+    pyramid = [passable]
+    for _ in range(levels):
+        pyramid.append(min_pool(pyramid[-1], 2, False))
+    return pyramid
+
+
+def _close_enough(result, goal_loc, corridor):
+    """ Did a search reach the goal, or end within corridor pixels of it?"""
+    if result.reached:
+        return True
+    end = result.path[-1]
+    return max(abs(int(end[0]) - goal_loc[0]), abs(int(end[1]) - goal_loc[1])) <= corridor
+
+
+def _refine(passable, coarse_path, robot_loc, goal_loc, corridor):
+    """ Search one level finer, only inside the corridor around the path of the level above
+    @param passable - passable mask of this level
+    @param coarse_path - (N, 2) path on the level above, which is half the size
+    @return SearchResult, with the path in the pixels of this level"""
+    height, width = passable.shape
+    coarse_height = -(-height // 2)
+    coarse_width = -(-width // 2)
+    # Corridor on the coarse level, only over the box around the path, then blown up to this level
+    cells = np.vstack((coarse_path, [(goal_loc[0] // 2, goal_loc[1] // 2)]))
+    cx0, cy0 = np.maximum(cells.min(axis=0) - corridor, 0)
+    cx1, cy1 = np.minimum(cells.max(axis=0) + corridor + 1, (coarse_width, coarse_height))
+    coarse_mask = np.zeros((cy1 - cy0, cx1 - cx0), dtype=bool)
+    coarse_mask[cells[:, 1] - cy0, cells[:, 0] - cx0] = True
+    coarse_mask = binary_dilation(coarse_mask, np.ones((3, 3), dtype=bool), iterations=corridor)
+
+    x0, x1 = cx0 * 2, min(cx1 * 2, width)
+    y0, y1 = cy0 * 2, min(cy1 * 2, height)
+    window = coarse_mask.repeat(2, axis=0).repeat(2, axis=1)[:y1 - y0, :x1 - x0] & passable[y0:y1, x0:x1]
+    result = astar(window, (robot_loc[0] - x0, robot_loc[1] - y0), (goal_loc[0] - x0, goal_loc[1] - y0))
+    return SearchResult(result.path + (x0, y0), result.reached, result.expansions, None)
+
+
+def coarse_to_fine(passable, robot_loc, goal_loc, pyramid=None, corridor=2):
+    """ Plan on the coarsest level of the pyramid that gets to the goal, then refine down to full resolution
+    If the goal cannot be reached, falls back to grid_search.astar, which goes as close as it can.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @param pyramid - from build_pyramid(passable), built here if None. Costmap keeps one per version of the map
+    @param corridor - half width in pixels of the corridor searched around the coarser path, at every level
+    @return SearchResult"""
+    if pyramid is None:
+        pyramid = build_pyramid(passable)
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+
+    expansions = 0
+    for level in range(len(pyramid) - 1, 0, -1):
+        factor = 2 ** level
+        coarse_goal = (goal_loc[0] // factor, goal_loc[1] // factor)
+        result = astar(pyramid[level], (robot_loc[0] // factor, robot_loc[1] // factor), coarse_goal)
+        expansions += result.expansions
+        if not _close_enough(result, coarse_goal, corridor):
+            continue
+
+        path = result.path
+        for finer in range(level - 1, -1, -1):
+            factor = 2 ** finer
+            finer_goal = (goal_loc[0] // factor, goal_loc[1] // factor)
+            result = _refine(pyramid[finer], path, (robot_loc[0] // factor, robot_loc[1] // factor), finer_goal,
+                             corridor)
+            expansions += result.expansions
+            if not (result.reached if finer == 0 else _close_enough(result, finer_goal, corridor)):
+                break
+            path = result.path
+        else:
+            return SearchResult(path, True, expansions, None)
+        # The corridor didn't get through (the coarse path ended on the wrong side of a thin wall), so start again
+        #   one level finer
+
+    fallback = astar(passable, robot_loc, goal_loc)
+    return SearchResult(fallback.path, fallback.reached, expansions + fallback.expansions, fallback.visited)
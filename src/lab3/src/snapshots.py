@@ -0,0 +1,92 @@
+# Debug snapshots written in the background
+#
+# When a plan goes wrong it helps to have the arrays it was working on. Drawing and saving a figure right then
+#   takes hundreds of milliseconds, inside the map callback, on exactly the updates that are already the slowest.
+#   A SnapshotWriter only puts the arrays on a queue. A background thread saves each snapshot to a compressed .npz
+#   file, and bench/render_snapshot.py draws them later.
+#
+# Snapshots are dropped instead of slowing anything down: if the last one was taken less than min_interval seconds
+#   ago, or if max_queue of them are still waiting to be written. The arrays are not copied, so they must not be
+#   changed after they are handed over.
+
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class SnapshotWriter:
+    """ Saves named groups of arrays to .npz files, from a background thread"""
+    def __init__(self, directory, min_interval=5.0, max_queue=4):
+        """
+        @param directory - where the .npz files go, made if it isn't there
+        @param min_interval - least number of seconds between two snapshots that get kept
+        @param max_queue - most snapshots waiting to be written, any more are dropped"""
+        self.directory = os.path.expanduser(directory)
+        self.min_interval = min_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._last = None
+        self._count = 0
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.rate_limited = 0
+        self.queue_full = 0
+        self.errors = 0
+        self.last_path = None
+
+    def submit(self, name, **arrays):
+        """ Queue a snapshot to be written, unless it is too soon after the last one or the queue is full
+        @param name - start of the file name, like "unreachable"
+        @param arrays - what to save. Anything np.savez takes
+        @return True if the snapshot was queued"""
+        now = time.monotonic()
+        with self._lock:
+            if self._last is not None and now - self._last < self.min_interval:
+                self.rate_limited += 1
+                return False
+            self._count += 1
+            file_name = f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_{self._count:04d}.npz"
+            try:
+                self._queue.put_nowait((file_name, arrays))
+            except queue.Full:
+                self.queue_full += 1
+                return False
+            self._last = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                file_name, arrays = item
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, file_name)
+                np.savez_compressed(path, **arrays)
+                self.written += 1
+                self.last_path = path
+            except (OSError, ValueError):
+                self.errors += 1
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """ Wait until everything queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        """ Write what is queued and stop the thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
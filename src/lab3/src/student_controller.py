@@ -8,11 +8,28 @@ import numpy as np
 
 from controller import RobotController
 #Import path_planning and exploring code
-from path_planning import dijkstra, open_image, plot_with_path, is_free, get_neighbors, convert_image
-from exploring import find_all_possible_goals, find_highest_concentration_point, find_closest_point, find_best_point, plot_with_explore_points, find_waypoints, find_furthest_point
-from helpers import world_to_map, map_to_world
+from exploring import find_waypoints, find_corner_waypoints
+from helpers import world_to_map, map_origin
+from costmap import map_version
+from ara_star import ARAStar
+from candidate_pool import CandidatePool
+from goal_memory import GoalMemory
+from info_gain import InformationGain
+from planning_core import Explorer, set_logger, set_snapshot_writer
+from snapshots import SnapshotWriter
 import time
 
+
+class RospyLogger:
+	'''
+	Sends the log messages of planning_core to rosout.
+	'''
+	debug = staticmethod(rospy.logdebug)
+	info = staticmethod(rospy.loginfo)
+	warning = staticmethod(rospy.logwarn)
+	error = staticmethod(rospy.logerr)
+
+
 class StudentController(RobotController):
 	'''
 	This class allows you to set waypoints that the robot will follow.  These robots should be in the map
@@ -26,6 +43,35 @@ class StudentController(RobotController):
 		self._last_distance_reading = 0
 		self._time_since_progress = time.time()
 
+		# All of the planning happens in planning_core, which doesn't know about ROS. The Explorer keeps the
+		# costmaps and the path cache between map updates
+		set_logger(RospyLogger)
+		# With a planning budget (seconds), the fallback search is ARA*, which gives up on the best path to
+		# return within the budget, for example _planning_budget:=0.2. Otherwise it is A*
+		planning_budget = rospy.get_param('~planning_budget', 0.0)
+		# With candidates, that many of the closest frontier points are planned to in parallel, in a pool of
+		# processes made now, for example _candidates:=4 _candidate_workers:=3
+		candidates = rospy.get_param('~candidates', 0)
+		candidate_pool = None
+		if candidates > 0:
+			candidate_pool = CandidatePool(workers=rospy.get_param('~candidate_workers', 0) or None,
+										   budget=rospy.get_param('~candidate_budget', 0.5))
+		# With _information_gain:=true, frontier points are scored by how much unseen map the laser would see from
+		# them as well as by how far away they are
+		information_gain = InformationGain() if rospy.get_param('~information_gain', False) else None
+		# Goals that couldn't be reached or where the robot got stuck are avoided for a while, unless
+		# _goal_memory:=false
+		goal_memory = GoalMemory() if rospy.get_param('~goal_memory', True) else None
+		self._explorer = Explorer(ARAStar(budget=planning_budget) if planning_budget > 0 else None,
+								  candidate_pool=candidate_pool, candidates=max(candidates, 1),
+								  information_gain=information_gain, goal_memory=goal_memory)
+
+		# Debug snapshots of unreachable goals are off unless there's somewhere to put them, for example
+		# rosrun lab3 student_controller.py _snapshot_dir:=~/ros_ws/src/lab3/snapshots
+		snapshot_dir = rospy.get_param('~snapshot_dir', '')
+		if snapshot_dir:
+			set_snapshot_writer(SnapshotWriter(snapshot_dir))
+
 	def distance_update(self, distance):
 		'''
 		This function is called every time the robot moves towards a goal.  If you want to make sure that
@@ -60,24 +106,30 @@ class StudentController(RobotController):
 		# with that.  Trying to unpack the position will fail if it's None, and this will raise an exception.
 		# We could also explicitly check to see if the point is None.
 		try:
-			if self._waypoints is None or len(self._waypoints) == 0 or time.time() - self._time_since_progress > 8:
+			no_waypoints = self._waypoints is None or len(self._waypoints) == 0
+			timed_out = time.time() - self._time_since_progress > 8
+			if no_waypoints or timed_out:
 				# The (x, y) position of the robot can be retrieved like this.
 				robot_position_world = (point.point.x, point.point.y)
+				# Tell the goal memory how the last goal went. Running out of waypoints only means the driver got
+				# to the end of the path, which can stop short of the goal, so it goes by how far away it is
+				self._explorer.record_outcome(robot_position_world)
 
 				self._robot_position = world_to_map(robot_position_world[0], robot_position_world[1], map.info)
-				im = np.array(map.data).reshape(map.info.height, map.info.width)
-				im_thresh = convert_image(im, wall_threshold=0.8, free_threshold=0.2)
-				rospy.loginfo(f"finding points")
-				points = find_all_possible_goals(im_thresh, map_data)
-				rospy.loginfo(f"points is {points}")
-				# best_point = find_furthest_point(points, self._robot_position)
-				best_point = find_closest_point(points, self._robot_position, map.info)
-				# best_point = find_highest_concentration_point(points, im, map.info)
-				rospy.loginfo(f"best_point was {best_point}")
-
-				path = dijkstra(im_thresh, self._robot_position, best_point, map_data)
-				waypoints = find_waypoints(im_thresh, path)
+				im = np.array(map.data, dtype=np.int8).reshape(map.info.height, map.info.width)
+				step = self._explorer.update(im, self._robot_position, map.info.resolution, map_origin(map.info),
+											 map_version(map.header))
+				if step is None:
+					rospy.loginfo('No frontier points left.')
+					return
+				if self._explorer.any_angle:
+					# Straight segments already, each corner is a waypoint
+					waypoints = find_corner_waypoints(step.path)
+				else:
+					waypoints = find_waypoints(step.im, step.path)
 				self.set_waypoints(waypoints)
+				# The 8 seconds start over for the new goal, so it isn't counted as timed out straight away
+				self._time_since_progress = time.time()
 		except Exception as e:
 			import traceback
 			rospy.logerr(f"Error in map_update: {e} \n {traceback.format_exc()}")
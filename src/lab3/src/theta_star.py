@@ -0,0 +1,208 @@
+# Any-angle paths: Lazy Theta* and line of sight shortcuts
+#
+# Paths on the eight connected grid are staircases, and every step of the staircase ends up as a possible
+#   waypoint. Theta* lets a pixel's parent be any pixel it can see, not just a neighbor, so the path comes out as a
+#   few straight segments between corners. Lazy Theta* (Nash, Koenig and Tovey, "Lazy Theta*: Any-angle path
+#   planning and path length analysis in 3D", 2010) assumes a new pixel can see its grandparent and only checks
+#   when the pixel is expanded, so there is one line of sight check per expansion instead of one per neighbor.
+#   When the check fails the pixel costs more than the guess it was taken off the queue with, so it goes back in the
+#   queue with its real cost instead of being expanded ahead of cheaper pixels. Without that the path could come out
+#   longer than the eight connected A* one.
+#
+# The line of sight checks are vectorized: the segment is sampled every half pixel along its longer axis, all at
+#   once, and every pixel a sample lands in has to be passable. The start pixel doesn't have to be, since the robot
+#   can be inside the inflation around a wall.
+#
+# shortcut does the same thing to a path that was already found some other way (like the cost field path to a
+#   frontier): it pulls the path tight, keeping only the corners.
+#
+# The path of the SearchResult is only the corners, including the start and the end. Consecutive points are joined
+#   by straight lines, not by single steps.
+
+import heapq
+import math
+
+import numpy as np
+
+from grid_search import SearchResult, padded_grid, neighbor_offsets, trace_parents, visited_image, unpad
+
+
+# How many points further along a path shortcut checks at once
+SHORTCUT_BLOCK = 64
+
+
+def _samples(starts, ends):
+    """ Pixels every half pixel along each segment from starts to ends
+    Each segment gets its own samples, the same ones however many segments are checked together, so a segment is
+    either in sight or not no matter which function asks. Shorter segments repeat their end to fill the row. A single
+    step only checks its two ends, the same as the moves of the grid searches.
+    @param starts - (K, 2) pixels (i, j)
+    @param ends - (K, 2) pixels (i, j)
+    @return two (K, n) int arrays of the i and j of the samples"""
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    longest = np.abs(ends - starts).max(axis=1, initial=0)
+    steps = np.where(longest > 1, 2 * longest, longest)
+    count = np.arange(int(steps.max(initial=0)) + 1)
+    t = np.minimum(count[None, :], steps[:, None]) / np.maximum(steps, 1)[:, None]
+    points = np.floor(starts[:, None, :] + (ends - starts)[:, None, :] * t[..., None] + 0.5).astype(np.int64)
+    return points[..., 0], points[..., 1]
+
+
+def clear_from(passable, start, ends):
+    """ Which of the straight lines from start to each of ends only go through passable pixels
+    @param passable - (H, W) boolean image, True where the robot can go. start doesn't have to be passable
+    @param start - pixel (i, j)
+    @param ends - (K, 2) pixels
+    @return (K,) boolean array"""
+    ends = np.asarray(ends).reshape(-1, 2)
+    starts = np.broadcast_to(np.asarray(start), ends.shape)
+    xs, ys = _samples(starts, ends)
+    ok = passable[ys, xs] | ((xs == start[0]) & (ys == start[1]))
+    return ok.all(axis=1)
+
+
+def path_clear(passable, points):
+    """ Does every segment of a path only go through passable pixels? The first point doesn't have to be passable
+    @param passable - (H, W) boolean image
+    @param points - (N, 2) pixels, the corners of the path (or every pixel of it)
+    @return bool"""
+    points = np.asarray(points).reshape(-1, 2)
+    if len(points) < 2:
+        return True
+    xs, ys = _samples(points[:-1], points[1:])
+    ok = passable[ys, xs] | ((xs == points[0][0]) & (ys == points[0][1]))
+    return bool(ok.all())
+
+
+def shortcut(passable, path):
+    """ Pull a path tight: from each corner, go straight to the furthest point along the path that can be seen
+    @param passable - (H, W) boolean image, True where the robot can go
+    @param path - (N, 2) pixels, each one in sight of the one before (like an eight connected path)
+    @return (M, 2) pixels, the corners of the new path, with the same start and end"""
+    path = np.asarray(path)
+    if len(path) < 3:
+        return path
+    corners = [0]
+    i = 0
+    last = len(path) - 1
+    while i < last:
+        # The next point is always in sight, see how much further we can go
+        j = i + 1
+        while j < last:
+            candidates = path[j + 1:j + 1 + SHORTCUT_BLOCK]
+            clear = clear_from(passable, path[i], candidates)
+            if clear.all():
+                j += len(candidates)
+                continue
+            j += int(np.argmin(clear))
+            break
+        corners.append(j)
+        i = j
+    return path[corners]
+
+
+def lazy_theta_star(passable, robot_loc, goal_loc):
+    """ Lazy Theta* on the eight connected grid, with a straight line distance heuristic
+    If the goal cannot be reached, the path goes to the expanded pixel closest to the goal instead.
+    @param passable - (H, W) boolean image, True where the robot can go. The start does not need to be passable
+    @param robot_loc - where the robot is (tuple, i,j)
+    @param goal_loc - where to go to (tuple, i,j)
+    @return SearchResult, the path is only the corners"""
+    height, width = passable.shape
+    padded_width = width + 2
+    robot_loc = (int(robot_loc[0]), int(robot_loc[1]))
+    goal_loc = (int(goal_loc[0]), int(goal_loc[1]))
+
+    start = (robot_loc[1] + 1) * padded_width + robot_loc[0] + 1
+    goal = (goal_loc[1] + 1) * padded_width + goal_loc[0] + 1
+
+    free_array = padded_grid(passable)
+    # Lines of sight can start from the robot, even if it is inside the inflation
+    free_array[start] = True
+    free = memoryview(free_array)
+    g_array = np.zeros(free_array.size, dtype=np.float64)
+    parent_array = np.zeros(free_array.size, dtype=np.int32)   # parent id + 1, 0 means never visited
+    closed_array = np.zeros(free_array.size, dtype=bool)
+    g = memoryview(g_array)
+    parent = memoryview(parent_array)
+    closed = memoryview(closed_array)
+    offsets = neighbor_offsets(padded_width)
+    goal_x = goal_loc[0] + 1
+    goal_y = goal_loc[1] + 1
+    hypot = math.hypot
+
+    def line_of_sight(a, b):
+        a_y, a_x = divmod(a, padded_width)
+        b_y, b_x = divmod(b, padded_width)
+        longest = max(abs(b_x - a_x), abs(b_y - a_y))
+        if longest <= 1:
+            return True
+        t = np.arange(2 * longest + 1) / (2 * longest)
+        xs = np.floor(a_x + (b_x - a_x) * t + 0.5).astype(np.int64)
+        ys = np.floor(a_y + (b_y - a_y) * t + 0.5).astype(np.int64)
+        return free_array[ys * padded_width + xs].all()
+
+    parent[start] = start + 1
+    priority_queue = [(hypot(robot_loc[0] - goal_loc[0], robot_loc[1] - goal_loc[1]), start)]
+    expansions = 0
+    reached = False
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while priority_queue:
+        node = heappop(priority_queue)[1]
+        if closed[node]:
+            continue
+        node_parent = parent[node] - 1
+        node_y, node_x = divmod(node, padded_width)
+        if node_parent != node and not line_of_sight(node_parent, node):
+            # The guess was wrong, so come from the best neighbor that has been expanded instead (there is always
+            #   at least the one that found this pixel)
+            best = math.inf
+            for offset, di, dj, cost in offsets:
+                neighbor = node - offset
+                if closed[neighbor] and g[neighbor] + cost < best:
+                    best = g[neighbor] + cost
+                    node_parent = neighbor
+            g[node] = best
+            parent[node] = node_parent + 1
+            # It was taken off the queue on the guess, which was cheaper. Put it back in where it belongs now, in case
+            #   something else comes first
+            f = best + hypot(node_x - goal_x, node_y - goal_y)
+            if priority_queue and priority_queue[0][0] < f:
+                heappush(priority_queue, (f, node))
+                continue
+        closed[node] = True
+        expansions += 1
+
+        if node == goal:
+            reached = True
+            break
+
+        # Every neighbor is first assumed to be in sight of this pixel's parent
+        parent_y, parent_x = divmod(node_parent, padded_width)
+        parent_g = g[node_parent]
+        for offset, di, dj, cost in offsets:
+            neighbor = node + offset
+            if not free[neighbor] or closed[neighbor]:
+                continue
+            x = node_x + di
+            y = node_y + dj
+            distance = parent_g + hypot(x - parent_x, y - parent_y)
+            if parent[neighbor] and distance >= g[neighbor]:
+                continue
+            g[neighbor] = distance
+            parent[neighbor] = node_parent + 1
+            heappush(priority_queue, (distance + hypot(x - goal_x, y - goal_y), neighbor))
+
+    visited = None
+    end = goal
+    if not reached:
+        # Only expanded pixels have had their line of sight checked
+        expanded = np.flatnonzero(closed_array)
+        cells = unpad(expanded, padded_width)
+        end = int(expanded[np.argmin(np.hypot(cells[:, 0] - goal_loc[0], cells[:, 1] - goal_loc[1]))])
+        visited = visited_image(parent_array, height, width)
+
+    return SearchResult(trace_parents(parent_array, end, padded_width), reached, expansions, visited)
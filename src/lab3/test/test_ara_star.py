@@ -0,0 +1,90 @@
+# Tests for ara_star, against grid_search.astar on the same grids
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import ara_star as ara_star_module
+from ara_star import ara_star
+from grid_search import astar
+
+
+def path_cost(path):
+    steps = np.diff(np.asarray(path, dtype=float), axis=0)
+    return float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        height, width = rng.integers(5, 80, size=2)
+        passable = rng.random((height, width)) > rng.uniform(0.1, 0.45)
+        free = np.argwhere(passable)
+        if len(free) < 2:
+            continue
+        yield passable, tuple(free[rng.integers(len(free))][::-1]), tuple(free[rng.integers(len(free))][::-1])
+
+
+class StepClock:
+    """ A clock that goes up by one every time it is looked at"""
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        self.now += 1.0
+        return self.now
+
+
+def test_cost_within_the_bound_of_astar():
+    for passable, robot_loc, goal_loc in random_grids(200):
+        result = ara_star(passable, robot_loc, goal_loc, budget=10.0)
+        expected = astar(passable, robot_loc, goal_loc)
+        assert result.reached == expected.reached
+        assert not result.timed_out
+        assert tuple(result.path[0]) == robot_loc
+        if expected.reached:
+            assert tuple(result.path[-1]) == goal_loc
+            assert path_cost(result.path) <= result.bound * path_cost(expected.path) + 1e-6
+        else:
+            # Goes as close as A* does
+            assert tuple(result.path[-1]) == tuple(expected.path[-1])
+            assert np.array_equal(result.visited, expected.visited)
+
+
+def test_unreachable_goes_to_the_closest_pixel_in_a_straight_line():
+    # Two dead ends: (18, 15) is closer to the goal in a straight line, (17, 19) has the smaller octile heuristic
+    passable = np.zeros((30, 40), dtype=bool)
+    passable[15, 5:19] = True
+    passable[15:20, 5] = True
+    passable[19, 5:18] = True
+    result = ara_star(passable, (5, 15), (30, 20), budget=10.0)
+    assert not result.reached
+    assert tuple(result.path[-1]) == tuple(astar(passable, (5, 15), (30, 20)).path[-1]) == (18, 15)
+
+
+def test_out_of_time_before_a_path():
+    passable = np.ones((500, 500), dtype=bool)
+    passable[:499, 250] = False
+    result = ara_star(passable, (10, 10), (490, 10), budget=1e-6)
+    assert result.timed_out
+    assert not result.reached
+    assert result.bound == np.inf
+    assert tuple(result.path[0]) == (10, 10)
+
+
+def test_out_of_time_working_out_the_bound(monkeypatch):
+    # The first path is found within the budget, and the deadline comes while going through the queue for the bound.
+    #   That stops at the next chunk, and the bound is the weight
+    clock = StepClock()
+    monkeypatch.setattr(ara_star_module, "time", clock)
+    monkeypatch.setattr(ara_star_module, "QUEUE_CHUNK", 1)
+    passable = np.ones((200, 200), dtype=bool)
+    result = ara_star(passable, (0, 0), (199, 150), budget=20.0 / (1 - ara_star_module.RESERVE), weight=3.0)
+    assert result.reached
+    assert result.timed_out
+    assert (result.bound, result.weight, result.iterations) == (3.0, 3.0, 1)
+    assert clock.now <= 22
@@ -0,0 +1,78 @@
+# Tests for bidirectional.bidirectional_astar, against grid_search.astar on the same grids
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bidirectional import bidirectional_astar
+from grid_search import astar
+
+
+def path_cost(path):
+    steps = np.diff(np.asarray(path, dtype=float), axis=0)
+    return float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        height, width = rng.integers(5, 80, size=2)
+        passable = rng.random((height, width)) > rng.uniform(0.1, 0.45)
+        free = np.argwhere(passable)
+        if len(free) < 2:
+            continue
+        yield passable, tuple(free[rng.integers(len(free))][::-1]), tuple(free[rng.integers(len(free))][::-1])
+
+
+def test_same_as_astar():
+    for passable, robot_loc, goal_loc in random_grids(500):
+        result = bidirectional_astar(passable, robot_loc, goal_loc)
+        expected = astar(passable, robot_loc, goal_loc)
+        assert result.reached == expected.reached
+        assert tuple(result.path[0]) == robot_loc
+        assert np.all(np.abs(np.diff(result.path, axis=0)) <= 1)
+        if expected.reached:
+            assert tuple(result.path[-1]) == goal_loc
+            assert abs(path_cost(result.path) - path_cost(expected.path)) < 1e-4
+        else:
+            assert tuple(result.path[-1]) == tuple(expected.path[-1])
+
+
+def test_goal_in_a_pocket_goes_as_close_as_astar():
+    # The search from the goal runs out of pixels straight away. The closest the robot can get is around the corner
+    #   of a wall, far from where the search from the robot had got to by then
+    passable = np.ones((60, 60), dtype=bool)
+    passable[28:33, 28:33] = False
+    passable[30, 30] = True
+    passable[10:50, 40] = False
+    result = bidirectional_astar(passable, (50, 30), (30, 30))
+    expected = astar(passable, (50, 30), (30, 30))
+    assert not result.reached
+    assert tuple(result.path[-1]) == tuple(expected.path[-1])
+
+
+def test_start_is_the_goal():
+    passable = np.ones((10, 10), dtype=bool)
+    result = bidirectional_astar(passable, (4, 4), (4, 4))
+    assert result.reached
+    assert [tuple(point) for point in result.path] == [(4, 4)]
+
+
+def test_start_inside_a_wall_and_blocked_goal():
+    # The robot can be inside the inflation around a wall, the same as with A*
+    passable = np.ones((30, 30), dtype=bool)
+    passable[10:20, 5] = False
+    result = bidirectional_astar(passable, (5, 15), (25, 15))
+    expected = astar(passable, (5, 15), (25, 15))
+    assert result.reached
+    assert abs(path_cost(result.path) - path_cost(expected.path)) < 1e-4
+
+    # Nothing can get into a goal in a wall, so it goes as close as it can
+    passable[15, 25] = False
+    result = bidirectional_astar(passable, (5, 15), (25, 15))
+    assert not result.reached
+    assert tuple(result.path[-1]) == tuple(astar(passable, (5, 15), (25, 15)).path[-1])
@@ -0,0 +1,74 @@
+# Tests for candidate_pool.CandidatePool, against grid_search.astar, and the lifecycle of its processes and shared
+#   memory
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from candidate_pool import CandidatePool, path_length
+from grid_search import astar
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # Starting the processes is the slow part, so every test shares one pool
+    pool = CandidatePool(workers=2, budget=2.0, timeout=10.0, tolerance=0.0)
+    yield pool
+    pool.close()
+
+
+def walls():
+    passable = np.ones((80, 80), dtype=bool)
+    passable[10:70, 40] = False
+    passable[40, 0:35] = False
+    data = np.where(passable, 0, 100).astype(np.int8)
+    return data, passable
+
+
+def test_cheapest_candidate_wins(pool):
+    data, passable = walls()
+    robot_loc = (20, 20)
+    goals = [(60, 20), (20, 60), (70, 75), (45, 5)]
+    best = pool.best_path(data, passable, 0.05, (0.0, 0.0), ("v", 1), robot_loc, goals)
+    costs = [path_length(astar(passable, robot_loc, goal).path) for goal in goals]
+    assert best.goal == goals[int(np.argmin(costs))]
+    assert best.cost == pytest.approx(min(costs), rel=1e-6)
+    assert tuple(best.pixels[0]) == robot_loc
+    assert tuple(best.pixels[-1]) == best.goal
+
+
+def test_unreachable_candidates_are_none(pool):
+    data, passable = walls()
+    passable[:, 50] = False
+    data = np.where(passable, 0, 100).astype(np.int8)
+    failed = pool.failed
+    assert pool.best_path(data, passable, 0.05, (0.0, 0.0), ("v", 2), (20, 20), [(70, 20), (70, 60)]) is None
+    assert pool.failed == failed + 2
+
+
+def test_map_only_written_when_the_key_changes(pool):
+    data, passable = walls()
+    pool.best_path(data, passable, 0.05, (0.0, 0.0), ("v", 3), (20, 20), [(30, 20)])
+    version = pool.store.version
+    pool.best_path(data, passable, 0.05, (0.0, 0.0), ("v", 3), (20, 20), [(30, 25)])
+    assert pool.store.version == version
+    pool.best_path(data, passable, 0.05, (0.0, 0.0), None, (20, 20), [(30, 25)])
+    assert pool.store.version == version + 1
+
+
+def test_close_removes_the_shared_memory():
+    pool = CandidatePool(workers=1, budget=1.0, timeout=10.0)
+    data, passable = walls()
+    assert pool.best_path(data, passable, 0.05, (0.0, 0.0), ("v", 1), (20, 20), [(30, 20)]) is not None
+    name = pool.store.name
+    pool.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=f"{name}_1_1")
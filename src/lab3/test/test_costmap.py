@@ -0,0 +1,31 @@
+# Tests for costmap.CostmapCache
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from costmap import CostmapCache
+
+
+def test_same_version_and_crop_is_a_hit():
+    cache = CostmapCache()
+    im = np.full((20, 30), 255, dtype=np.uint8)
+    first = cache.get(1, im, 0.05, (0.0, 0.0))
+    assert cache.get(1, im, 0.05, (0.0, 0.0)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_same_version_cropped_differently_is_not_shared():
+    cache = CostmapCache()
+    small = cache.get(1, np.full((20, 30), 255, dtype=np.uint8), 0.05, (0.0, 0.0))
+    big = cache.get(1, np.full((40, 50), 255, dtype=np.uint8), 0.05, (-1.0, -1.0))
+    assert big is not small
+    assert big.im.shape == (40, 50)
+    # Same shape, moved over
+    moved = cache.get(1, np.full((40, 50), 255, dtype=np.uint8), 0.05, (-0.5, -1.0))
+    assert moved is not big
+    assert cache.misses == 3
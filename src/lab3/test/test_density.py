@@ -0,0 +1,74 @@
+# Tests for density.UnseenDensity, against counting the unseen pixels one point at a time
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from density import UnseenDensity
+
+
+def random_image(seed=0, shape=(60, 80)):
+    rng = np.random.default_rng(seed)
+    return rng.choice(np.array([0, 128, 255], dtype=np.uint8), size=shape)
+
+
+def random_points(im, count, seed=0):
+    rng = np.random.default_rng(seed)
+    height, width = im.shape
+    # Some right on the edges, so the boxes get clipped
+    points = np.column_stack([rng.integers(0, width, count), rng.integers(0, height, count)])
+    points[:4] = [(0, 0), (width - 1, height - 1), (0, height - 1), (width - 1, 0)]
+    return points
+
+
+def test_box_counts():
+    im = random_image()
+    density = UnseenDensity(im)
+    points = random_points(im, 50)
+    for half_width, half_height in ((0, 0), (3, 3), (5, 2), (200, 200)):
+        counts, areas = density.box_counts(points, half_width, half_height)
+        for (i, j), count, area in zip(points, counts, areas):
+            box = im[max(j - half_height, 0):j + half_height + 1, max(i - half_width, 0):i + half_width + 1]
+            assert count == np.count_nonzero(box == 128)
+            assert area == box.size
+
+
+def test_box_half_width_per_point():
+    im = random_image(1)
+    density = UnseenDensity(im)
+    points = random_points(im, 20, 1)
+    half_widths = np.arange(20)
+    counts, _ = density.box_counts(points, half_widths)
+    for point, half_width, count in zip(points, half_widths, counts):
+        assert count == density.box_counts([point], half_width)[0][0]
+
+
+def test_box_fractions():
+    im = np.full((20, 20), 255, dtype=np.uint8)
+    im[:, 10:] = 128
+    density = UnseenDensity(im)
+    assert np.allclose(density.box([(2, 10), (17, 10), (10, 10)], 2), [0.0, 1.0, 0.6])
+
+
+def test_disk_is_close_to_the_circle():
+    # Unseen past a slanted line, so how much of each disk is unseen depends on the shape of the disk
+    y, x = np.ogrid[:120, :120]
+    im = np.where(2 * x + y > 150, 128, 255).astype(np.uint8)
+    density = UnseenDensity(im)
+    rng = np.random.default_rng(0)
+    for radius in (5, 12, 25):
+        for i, j in rng.integers(radius, 120 - radius, size=(20, 2)):
+            inside = (x - i) ** 2 + (y - j) ** 2 <= radius * radius
+            expected = np.count_nonzero(im[inside] == 128) / np.count_nonzero(inside)
+            assert abs(density.disk([(i, j)], radius)[0] - expected) < 0.05
+
+
+def test_disk_of_nothing_is_the_pixel():
+    im = random_image(3)
+    density = UnseenDensity(im)
+    points = random_points(im, 10, 3)
+    assert np.array_equal(density.disk(points, 0), (im[points[:, 1], points[:, 0]] == 128).astype(float))
@@ -0,0 +1,72 @@
+# Tests for dstar_lite.DStarLite, against grid_search.astar on the same grids, across map updates
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from dstar_lite import DStarLite
+from grid_search import astar
+
+
+def path_cost(path):
+    steps = np.diff(np.asarray(path, dtype=float), axis=0)
+    return float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+
+
+def check_same_as_astar(result, passable, robot_loc, goal_loc):
+    expected = astar(passable, robot_loc, goal_loc)
+    assert result.reached == expected.reached
+    assert tuple(result.path[0]) == tuple(robot_loc)
+    assert np.all(np.abs(np.diff(result.path, axis=0)) <= 1)
+    assert passable[result.path[1:, 1], result.path[1:, 0]].all()
+    if expected.reached:
+        assert tuple(result.path[-1]) == tuple(goal_loc)
+        assert abs(path_cost(result.path) - path_cost(expected.path)) < 1e-4
+
+
+def test_repairs_match_astar():
+    # The same goal over a run of map updates: walls come and go near the path and the robot moves along it
+    rng = np.random.default_rng(0)
+    passable = rng.random((60, 60)) > 0.2
+    goal_loc = (55, 55)
+    passable[55, 55] = True
+    planner = DStarLite()
+    robot_loc = (3, 3)
+    passable[3, 3] = True
+    for _ in range(15):
+        result = planner.plan(passable, robot_loc, goal_loc)
+        check_same_as_astar(result, passable, robot_loc, goal_loc)
+        if result.reached and len(result.path) > 3:
+            robot_loc = tuple(int(v) for v in result.path[2])
+        flips = rng.integers(0, 60, size=(20, 2))
+        passable[flips[:, 1], flips[:, 0]] ^= True
+        passable[goal_loc[1], goal_loc[0]] = True
+    assert planner.full_searches == 1
+    assert planner.repairs == 14
+
+
+def test_blocked_off_then_opened_again():
+    passable = np.ones((40, 40), dtype=bool)
+    planner = DStarLite()
+    check_same_as_astar(planner.plan(passable, (2, 20), (37, 20)), passable, (2, 20), (37, 20))
+
+    passable[:, 20] = False
+    result = planner.plan(passable, (2, 20), (37, 20))
+    assert not result.reached
+    check_same_as_astar(result, passable, (2, 20), (37, 20))
+
+    passable[5, 20] = True
+    check_same_as_astar(planner.plan(passable, (2, 20), (37, 20)), passable, (2, 20), (37, 20))
+    assert planner.full_searches == 1
+
+
+def test_new_goal_is_a_full_search():
+    passable = np.ones((30, 30), dtype=bool)
+    planner = DStarLite()
+    planner.plan(passable, (2, 2), (27, 27))
+    check_same_as_astar(planner.plan(passable, (2, 2), (27, 3)), passable, (2, 2), (27, 3))
+    assert (planner.full_searches, planner.repairs) == (2, 0)
@@ -0,0 +1,118 @@
+# Tests for planning_core.Explorer, on small made up maps
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ara_star import ARAStar
+from goal_memory import GoalMemory, REACHED, TIMED_OUT, UNREACHABLE
+from planning_core import Explorer, frontier_clusters
+
+RESOLUTION = 0.05
+ORIGIN = (-7.5, -7.5)
+
+
+def quiet():
+    """ convert_image divides by the max, which is 0 on unseen crops. Only for the test it is used in, so the rest of
+    the session still hears about floating point errors"""
+    return np.errstate(divide="ignore", invalid="ignore")
+
+
+def room():
+    """ A 300 x 300 OccupancyGrid with a seen 100 x 100 room in it, open on the right side"""
+    data = np.full((300, 300), -1, dtype=np.int8)
+    data[100:200, 60:160] = 0
+    data[100, 60:160] = 100
+    data[199, 60:160] = 100
+    data[100:200, 60] = 100
+    return data
+
+
+def walled_room():
+    """ A seen room with walls all around, and a seen pocket on the other side of its right wall that has frontier.
+    None of the frontier can be reached, so the Explorer falls back to its planner"""
+    data = np.full((200, 200), -1, dtype=np.int8)
+    data[20:180, 20:100] = 0
+    data[20:180, 20] = 100
+    data[20, 20:100] = 100
+    data[179, 20:100] = 100
+    data[20:180, 99] = 100
+    data[80:120, 100:140] = 0
+    data[80, 100:140] = 100
+    data[119, 100:140] = 100
+    return data
+
+
+def test_path_cache_hit_across_map_versions():
+    explorer = Explorer()
+    with quiet():
+        first = explorer.update(room(), (80, 150), RESOLUTION, ORIGIN, version=1)
+
+    # The next version has more seen off to the left, away from the path. The known region, and so the crop the
+    #   Explorer plans on, grows
+    data = room()
+    data[140:160, 20:30] = 0
+    with quiet():
+        second = explorer.update(data, (80, 150), RESOLUTION, ORIGIN, version=2)
+
+    assert second.region != first.region
+    assert second.goal == first.goal
+    assert explorer.path_cache.hits == 1
+    assert np.allclose(second.path, first.path)
+
+
+def test_goal_is_the_middle_of_a_cluster():
+    with quiet():
+        step = Explorer().update(room(), (80, 150), RESOLUTION, ORIGIN)
+        frontiers = frontier_clusters(step.im, RESOLUTION)
+    representatives = {tuple(int(v) for v in step.region.to_full(point))
+                       for point in frontiers.cells[frontiers.representatives]}
+    assert step.goal in representatives
+
+
+def test_planner_out_of_time_is_not_unreachable():
+    memory = GoalMemory()
+    explorer = Explorer(ARAStar(budget=1e-6), goal_memory=memory)
+    with quiet():
+        step = explorer.update(walled_room(), (50, 100), RESOLUTION, ORIGIN, version=1)
+    assert not step.reached
+    assert explorer.planner.last.timed_out
+    assert memory.recorded[UNREACHABLE] == 0
+    assert len(memory) == 0
+
+    # The robot gets to the end of the path, which stops short of the goal
+    assert explorer.record_outcome(step.path[-1]) == TIMED_OUT
+    assert memory.recorded[TIMED_OUT] == 1
+
+
+def test_unreachable_goal_is_remembered():
+    memory = GoalMemory()
+    explorer = Explorer(goal_memory=memory)
+    with quiet():
+        step = explorer.update(walled_room(), (50, 100), RESOLUTION, ORIGIN, version=1)
+    assert not step.reached
+    assert memory.recorded[UNREACHABLE] == 1
+
+
+def test_reached_only_within_tolerance():
+    memory = GoalMemory()
+    explorer = Explorer(goal_memory=memory)
+    with quiet():
+        step = explorer.update(room(), (80, 150), RESOLUTION, ORIGIN, version=1)
+    assert step.reached
+    goal = explorer.goal
+
+    # Out of waypoints, but the driver stopped a meter short
+    assert explorer.record_outcome((goal[0] - 1.0, goal[1])) == TIMED_OUT
+    # Only the first call after an update counts
+    assert explorer.record_outcome(goal) is None
+
+    with quiet():
+        explorer.update(room(), (80, 150), RESOLUTION, ORIGIN, version=1)
+    goal = explorer.goal
+    assert explorer.record_outcome((goal[0] + 0.3, goal[1])) == REACHED
+    assert memory.recorded == {UNREACHABLE: 0, TIMED_OUT: 1, REACHED: 1}
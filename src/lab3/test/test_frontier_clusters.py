@@ -0,0 +1,71 @@
+# Tests for the frontier clusters of planning_core (frontier_clusters, clusters_from_mask, cluster_weights)
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from planning_core import MIN_CLUSTER_LENGTH, cluster_weights, clusters_from_mask, frontier_clusters, \
+    frontier_points
+
+RESOLUTION = 0.05
+
+
+def three_clusters():
+    """ A long line, an L and a speck too small to keep"""
+    mask = np.zeros((40, 50), dtype=bool)
+    mask[5, 5:35] = True
+    mask[20:30, 10] = True
+    mask[29, 10:20] = True
+    mask[35, 45] = True
+    return mask
+
+
+def test_clusters_from_mask():
+    frontiers = clusters_from_mask(three_clusters(), RESOLUTION)
+    assert sorted(frontiers.sizes.tolist()) == [19, 30]
+    assert len(frontiers.cells) == 49
+    # Ordered by cluster, the labels go with the cells
+    assert np.all(np.diff(frontiers.labels) >= 0)
+    assert np.array_equal(np.bincount(frontiers.labels), frontiers.sizes)
+    # The speck is dropped as noise
+    assert (45, 35) not in {tuple(cell) for cell in frontiers.cells}
+
+    for cluster, size in enumerate(frontiers.sizes):
+        cells = frontiers.cells[frontiers.labels == cluster]
+        assert np.allclose(frontiers.centroids[cluster], cells.mean(axis=0))
+        x0, y0, x1, y1 = frontiers.boxes[cluster]
+        assert (x0, y0, x1, y1) == (cells[:, 0].min(), cells[:, 1].min(), cells[:, 0].max(), cells[:, 1].max())
+        # The representative is the pixel of the cluster closest to its centroid
+        representative = frontiers.cells[frontiers.representatives[cluster]]
+        assert frontiers.labels[frontiers.representatives[cluster]] == cluster
+        distances = np.hypot(*(cells - frontiers.centroids[cluster]).T)
+        assert np.isclose(np.hypot(*(representative - frontiers.centroids[cluster])), distances.min())
+
+
+def test_nothing_on_the_frontier():
+    frontiers = clusters_from_mask(np.zeros((10, 10), dtype=bool), RESOLUTION)
+    assert frontiers.cells.shape == (0, 2)
+    assert len(frontiers.sizes) == len(frontiers.representatives) == 0
+
+
+def test_same_pixels_as_frontier_points():
+    # A seen room, open to the unseen on one side
+    im = np.full((100, 100), 128, dtype=np.uint8)
+    im[20:80, 20:60] = 255
+    im[20, 20:60] = 0
+    im[79, 20:60] = 0
+    im[20:80, 20] = 0
+    frontiers = frontier_clusters(im, RESOLUTION)
+    assert {tuple(int(v) for v in cell) for cell in frontiers.cells} == frontier_points(im, RESOLUTION)
+    assert len(frontiers.sizes) == 1
+
+
+def test_bigger_clusters_weigh_more():
+    sizes = np.array([1, MIN_CLUSTER_LENGTH / RESOLUTION, 20, 100, 1000])
+    weights = cluster_weights(sizes, RESOLUTION)
+    assert weights[0] == weights[1] == 1.0
+    assert np.all(np.diff(weights[1:]) > 0)
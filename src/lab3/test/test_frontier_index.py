@@ -0,0 +1,63 @@
+# Tests for frontier_index.FrontierIndex, against the frontier from scratch
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from costmap import Costmap
+from frontier_index import FrontierIndex, frontier_mask, laser_window
+from known_region import inflation_margin, known_region
+from planning_core import convert_image
+
+RESOLUTION = 0.05
+
+
+def explore(steps, seed=0):
+    """ A gmapping sized grid of random walls, seen a disk at a time by a robot going across it
+    @return list of (data, robot pixel) after each step"""
+    rng = np.random.default_rng(seed)
+    world = np.where(rng.random((300, 300)) < 0.02, 100, 0).astype(np.int8)
+    data = np.full((300, 300), -1, dtype=np.int8)
+    y, x = np.ogrid[:300, :300]
+    for step in range(steps):
+        robot = (60 + 15 * step, 150)
+        seen = (x - robot[0]) ** 2 + (y - robot[1]) ** 2 <= 40 ** 2
+        data[seen] = world[seen]
+        yield data.copy(), robot
+
+
+def test_same_as_from_scratch_in_the_laser_window():
+    index = FrontierIndex()
+    last = None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for data, robot in explore(10):
+            region = known_region(data, inflation_margin(RESOLUTION), include=(robot,))
+            im = convert_image(region.crop(data), wall_threshold=0.8, free_threshold=0.2)
+            costmap = Costmap(im, RESOLUTION)
+            window = None if last is None else laser_window((last, robot), 40 * RESOLUTION, RESOLUTION, data.shape)
+            last = robot
+            mask = index.update(data, region, im, costmap, (0.0, 0.0), RESOLUTION, window)
+            assert np.array_equal(mask, frontier_mask(im, costmap.frontier_free_areas))
+    assert index.rebuilds == 1
+    assert index.updates == 9
+    # Only the window was done again, not the whole region
+    assert index.pixels_updated < 9 * region.shape[0] * region.shape[1]
+
+
+def test_no_window_builds_from_scratch():
+    index = FrontierIndex()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for data, robot in explore(3):
+            region = known_region(data, inflation_margin(RESOLUTION), include=(robot,))
+            im = convert_image(region.crop(data), wall_threshold=0.8, free_threshold=0.2)
+            index.update(data, region, im, Costmap(im, RESOLUTION), (0.0, 0.0), RESOLUTION)
+    assert (index.rebuilds, index.updates) == (3, 0)
+
+
+def test_laser_window_is_clipped_to_the_map():
+    window = laser_window(((10, 20), (50, 20)), 1.0, RESOLUTION, (100, 200))
+    assert window == (0, 0, 72, 42)
@@ -0,0 +1,88 @@
+# Tests for frontier_tree.FrontierTree, against measuring the distance to every point
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from frontier_tree import FrontierTree
+
+
+def random_points(count, seed=0):
+    # On a small grid, so there are plenty of ties in distance
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 30, size=(count, 2))
+
+
+def distances(points, loc):
+    return np.linalg.norm(points - np.asarray(loc), axis=1)
+
+
+def test_nearest_and_k_nearest():
+    rng = np.random.default_rng(1)
+    for seed in range(20):
+        points = random_points(100, seed)
+        tree = FrontierTree(points)
+        for loc in rng.integers(-5, 35, size=(10, 2)):
+            exclude = float(rng.choice([0.0, 3.0, 5.0, 8.0]))
+            all_distances = distances(points, loc)
+            outside = np.flatnonzero(all_distances >= exclude)
+            # The same as np.argmin over the points outside the zone, ties to the first point
+            index, distance = tree.nearest(loc, exclude)
+            if len(outside):
+                assert index == outside[np.argmin(all_distances[outside])]
+                assert np.isclose(distance, all_distances[index])
+            else:
+                assert (index, distance) == (None, np.inf)
+
+            indices, nearest = tree.k_nearest(loc, 7, exclude)
+            order = outside[np.argsort(all_distances[outside], kind="stable")][:7]
+            assert np.array_equal(indices, order)
+            assert np.allclose(nearest, all_distances[order])
+
+
+def test_excluded_and_within():
+    points = random_points(200)
+    tree = FrontierTree(points)
+    for loc, radius in (((15, 15), 5.0), ((0, 0), 10.0), ((12, 20), 0.0), ((15, 15), 100.0)):
+        all_distances = distances(points, loc)
+        assert np.array_equal(tree.excluded(loc, radius), np.flatnonzero(all_distances < radius))
+        assert np.array_equal(tree.outside(loc, radius), all_distances >= radius)
+        assert np.array_equal(tree.within(loc, radius), np.flatnonzero(all_distances <= radius))
+
+
+def test_exclusion_zone_edge():
+    # (3, 0) is exactly on the edge of the zone, so it counts
+    tree = FrontierTree({(3, 0)})
+    assert len(tree.excluded((0, 0), 3.0)) == 0
+    assert tree.nearest((0, 0), 3.0) == (0, 3.0)
+    assert tree.nearest((0, 0), 3.5) == (None, np.inf)
+
+
+def test_furthest():
+    points = random_points(100)
+    tree = FrontierTree(points)
+    index, distance = tree.furthest((4, 9))
+    all_distances = distances(points, (4, 9))
+    assert index == np.argmax(all_distances)
+    assert distance == all_distances.max()
+
+
+def test_empty():
+    for tree in (FrontierTree(set()), FrontierTree(np.zeros((0, 2), dtype=np.int32))):
+        assert len(tree) == 0
+        assert tree.nearest((1, 1)) == (None, np.inf)
+        assert len(tree.k_nearest((1, 1), 3)[0]) == 0
+        assert len(tree.excluded((1, 1), 5.0)) == 0
+        assert len(tree.within((1, 1), 5.0)) == 0
+        assert tree.furthest((1, 1)) == (None, -np.inf)
+
+
+def test_set_of_points():
+    points = {(1, 2), (5, 5), (9, 0)}
+    tree = FrontierTree(points)
+    assert {tree.point(index) for index in range(len(tree))} == points
+    assert tree.point(tree.nearest((6, 6))[0]) == (5, 5)
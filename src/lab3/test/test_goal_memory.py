@@ -0,0 +1,89 @@
+# Tests for goal_memory.GoalMemory, with a made up clock
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from goal_memory import EXPIRY, REACHED, TIMED_OUT, UNREACHABLE, GoalMemory
+
+
+class Clock:
+    """ A clock that only moves when told to"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_unreachable_is_skipped_nearby():
+    clock = Clock()
+    memory = GoalMemory(cell=0.5, neighborhood=1, clock=clock)
+    memory.record((1.2, 1.2), UNREACHABLE)
+    # Same cell, the next cell over, and three cells away
+    penalties = memory.penalties([(1.1, 1.4), (1.7, 0.6), (2.8, 1.2)])
+    assert np.array_equal(penalties, [np.inf, np.inf, 0.0])
+    assert memory.skipped == 2
+
+
+def test_penalties_fade_and_expire():
+    clock = Clock()
+    memory = GoalMemory(penalty=2.0, clock=clock)
+    memory.record((0.0, 0.0), REACHED)
+    assert memory.penalties([(0.0, 0.0)])[0] == 2.0
+    clock.now = EXPIRY[REACHED] / 2
+    assert np.isclose(memory.penalties([(0.0, 0.0)])[0], 1.0)
+    clock.now = EXPIRY[REACHED] + 1
+    assert memory.penalties([(0.0, 0.0)])[0] == 0.0
+    assert len(memory) == 0
+    assert memory.expired == 1
+
+
+def test_each_time_lasts_longer():
+    clock = Clock()
+    memory = GoalMemory(clock=clock)
+    memory.record((0.0, 0.0), UNREACHABLE)
+    memory.record((0.0, 0.0), UNREACHABLE)
+    clock.now = 1.5 * EXPIRY[UNREACHABLE]
+    memory.prune()
+    assert len(memory) == 1
+    clock.now = 2 * EXPIRY[UNREACHABLE] + 1
+    memory.prune()
+    assert len(memory) == 0
+
+
+def test_timed_out_is_skipped_after_enough_times():
+    clock = Clock()
+    memory = GoalMemory(penalty=2.0, skip_after=2, clock=clock)
+    memory.record((0.0, 0.0), TIMED_OUT)
+    first = memory.penalties([(0.0, 0.0)])[0]
+    assert 0 < first < np.inf
+    memory.record((0.0, 0.0), TIMED_OUT)
+    assert memory.penalties([(0.0, 0.0)])[0] == np.inf
+
+
+def test_reached_forgets_the_failures():
+    clock = Clock()
+    memory = GoalMemory(penalty=2.0, clock=clock)
+    memory.record((0.0, 0.0), UNREACHABLE)
+    memory.record((0.0, 0.0), TIMED_OUT)
+    memory.record((0.1, 0.1), REACHED)
+    assert len(memory) == 1
+    assert memory.penalties([(0.0, 0.0)])[0] == 2.0
+    assert memory.recorded == {UNREACHABLE: 1, TIMED_OUT: 1, REACHED: 1}
+
+
+def test_unknown_outcome():
+    with pytest.raises(ValueError):
+        GoalMemory(clock=Clock()).record((0.0, 0.0), "lost")
+
+
+def test_nothing_remembered():
+    memory = GoalMemory(clock=Clock())
+    assert np.array_equal(memory.penalties([(0.0, 0.0), (5.0, 5.0)]), [0.0, 0.0])
+    assert len(memory.penalties(np.zeros((0, 2)))) == 0
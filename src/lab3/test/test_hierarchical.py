@@ -0,0 +1,80 @@
+# Tests for hierarchical.HierarchicalPlanner, against grid_search.astar on the same grids
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from grid_search import astar
+from hierarchical import HierarchicalPlanner
+
+
+def path_cost(path):
+    steps = np.diff(np.asarray(path, dtype=float), axis=0)
+    return float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+
+
+def check_path(passable, path, robot_loc):
+    """ Starts at the robot, takes eight connected steps, and only goes over passable pixels after the start"""
+    path = np.asarray(path)
+    assert tuple(path[0]) == tuple(robot_loc)
+    assert np.all(np.abs(np.diff(path, axis=0)) <= 1)
+    assert passable[path[1:, 1], path[1:, 0]].all()
+
+
+def random_grids(count, seed=0):
+    """ Random obstacle grids with a start and goal on free pixels. Every few are one cluster wide or tall"""
+    rng = np.random.default_rng(seed)
+    for n in range(count):
+        height, width = rng.integers(5, 120, size=2)
+        if n % 3 == 0:
+            width = rng.integers(2, 16)
+        elif n % 3 == 1:
+            height = rng.integers(2, 16)
+        passable = rng.random((height, width)) > rng.uniform(0.1, 0.35)
+        free = np.argwhere(passable)
+        if len(free) < 2:
+            continue
+        robot_loc = tuple(int(v) for v in free[rng.integers(len(free))][::-1])
+        goal_loc = tuple(int(v) for v in free[rng.integers(len(free))][::-1])
+        yield passable, robot_loc, goal_loc
+
+
+def test_same_reachability_as_astar():
+    for passable, robot_loc, goal_loc in random_grids(200):
+        planner = HierarchicalPlanner(cluster_size=16)
+        result = planner.plan(passable, robot_loc, goal_loc)
+        expected = astar(passable, robot_loc, goal_loc)
+        assert result.reached == expected.reached
+        check_path(passable, result.path, robot_loc)
+        if expected.reached:
+            assert tuple(result.path[-1]) == goal_loc
+            # Near optimal: never better than A*, and not much worse through the entrance pixels
+            assert path_cost(expected.path) - 1e-6 <= path_cost(result.path) <= 1.5 * path_cost(expected.path) + 1e-6
+
+
+def test_one_cluster_wide_map():
+    # A corridor narrower than a cluster, several clusters tall, with a wall to go around
+    passable = np.ones((100, 10), dtype=bool)
+    passable[50, :8] = False
+    result = HierarchicalPlanner(cluster_size=16).plan(passable, (1, 1), (1, 98))
+    assert result.reached
+    check_path(passable, result.path, (1, 1))
+    assert tuple(result.path[-1]) == (1, 98)
+    assert path_cost(result.path) >= path_cost(astar(passable, (1, 1), (1, 98)).path) - 1e-6
+
+
+def test_map_update_matches_a_fresh_build():
+    passable = np.ones((64, 64), dtype=bool)
+    planner = HierarchicalPlanner(cluster_size=16)
+    assert planner.plan(passable, (2, 2), (60, 60)).reached
+
+    # Wall off the goal. Only the clusters under the wall are redone, and the goal can't be reached any more
+    passable[:, 40] = False
+    result = planner.plan(passable, (2, 2), (60, 60))
+    assert planner.full_builds == 1
+    assert not result.reached
+    assert np.array_equal(result.path, astar(passable, (2, 2), (60, 60)).path)
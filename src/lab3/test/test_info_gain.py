@@ -0,0 +1,73 @@
+# Tests for info_gain.InformationGain, against the area of the disk the laser covers
+#
+#   python3 -m pytest src/lab3/test
+
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import info_gain as info_gain_module
+from info_gain import SICK_RANGE, InformationGain
+
+RESOLUTION = 0.05
+
+
+def unseen(size=400):
+    return np.full((size, size), 128, dtype=np.uint8)
+
+
+def test_all_unseen_is_the_whole_disk():
+    gain = InformationGain().gains(unseen(), RESOLUTION, [(200, 200)])
+    assert np.isclose(gain[0], math.pi * SICK_RANGE ** 2, rtol=0.05)
+    # Fine cells come out the same
+    fine = InformationGain(cell=RESOLUTION).gains(unseen(), RESOLUTION, [(200, 200)])
+    assert np.isclose(fine[0], math.pi * SICK_RANGE ** 2, rtol=0.05)
+
+
+def test_half_seen_is_half_the_disk():
+    im = unseen()
+    im[:, :200] = 255
+    gain = InformationGain().gains(im, RESOLUTION, [(200, 200)])
+    assert np.isclose(gain[0], math.pi * SICK_RANGE ** 2 / 2, rtol=0.05)
+
+
+def test_walls_stop_the_rays():
+    # A ring of wall 2 m out, everything unseen
+    im = unseen()
+    y, x = np.ogrid[:400, :400]
+    distance = np.hypot(x - 200, y - 200)
+    im[(distance >= 40) & (distance < 42)] = 0
+    gain = InformationGain().gains(im, RESOLUTION, [(200, 200)])
+    assert np.isclose(gain[0], math.pi * 2.0 ** 2, rtol=0.15)
+
+
+def test_past_the_edge():
+    seen = np.full((48, 48), 255, dtype=np.uint8)
+    information_gain = InformationGain()
+    assert information_gain.gains(seen, RESOLUTION, [(24, 24)], outside_unseen=False)[0] == 0
+    # The crop to the known region only has unseen space around it
+    assert information_gain.gains(seen, RESOLUTION, [(24, 24)])[0] > 0.9 * math.pi * SICK_RANGE ** 2
+
+
+def test_chunks_dont_change_the_gains(monkeypatch):
+    rng = np.random.default_rng(0)
+    im = rng.choice(np.array([0, 128, 255], dtype=np.uint8), size=(200, 200), p=[0.02, 0.5, 0.48])
+    points = rng.integers(0, 200, size=(150, 2))
+    information_gain = InformationGain(max_range=3.0)
+    together = information_gain.gains(im, RESOLUTION, points)
+    one_at_a_time = [information_gain.gains(im, RESOLUTION, [point])[0] for point in points[:10]]
+    assert np.allclose(together[:10], one_at_a_time)
+    monkeypatch.setattr(info_gain_module, "CHUNK", 7)
+    assert np.allclose(information_gain.gains(im, RESOLUTION, points), together)
+
+
+def test_scores_fall_off_with_cost():
+    information_gain = InformationGain(distance_weight=0.5)
+    scores = information_gain.scores([10.0, 10.0, 10.0, 20.0], [0.0, 2.0, np.inf, 2.0])
+    assert scores[0] == 10.0
+    assert np.isclose(scores[1], 10.0 * math.exp(-1.0))
+    assert scores[2] == 0.0
+    assert scores[3] == 2 * scores[1]
@@ -0,0 +1,85 @@
+# Tests for jump_point.jump_point_search, against grid_search.astar and a plain Dijkstra with the same moves
+#
+#   python3 -m pytest src/lab3/test
+
+import math
+import os
+import sys
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from grid_search import astar
+from jump_point import jump_point_search
+
+
+def path_cost(path):
+    steps = np.diff(np.asarray(path, dtype=float), axis=0)
+    return float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+
+
+def no_corner_cutting_cost(passable, robot_loc, goal_loc):
+    """ Cheapest path cost with the moves JPS makes: diagonals only where both straight moves next to them are open"""
+    height, width = passable.shape
+    ids = np.arange(height * width).reshape(height, width)
+    rows, cols, costs = [], [], []
+    for a, b, cost in ((np.s_[:, :-1], np.s_[:, 1:], 1.0), (np.s_[:-1, :], np.s_[1:, :], 1.0)):
+        both = passable[a] & passable[b]
+        rows.append(ids[a][both])
+        cols.append(ids[b][both])
+        costs.append(np.full(np.count_nonzero(both), cost))
+    # Down-right and down-left, with the two pixels they cut past
+    down_right = passable[:-1, :-1] & passable[1:, 1:] & passable[:-1, 1:] & passable[1:, :-1]
+    down_left = passable[:-1, 1:] & passable[1:, :-1] & passable[:-1, :-1] & passable[1:, 1:]
+    for a, b, both in ((np.s_[:-1, :-1], np.s_[1:, 1:], down_right), (np.s_[:-1, 1:], np.s_[1:, :-1], down_left)):
+        rows.append(ids[a][both])
+        cols.append(ids[b][both])
+        costs.append(np.full(np.count_nonzero(both), math.sqrt(2)))
+    graph = coo_matrix((np.concatenate(costs), (np.concatenate(rows), np.concatenate(cols))),
+                       shape=(ids.size, ids.size)).tocsr()
+    return dijkstra(graph, directed=False, indices=ids[robot_loc[1], robot_loc[0]])[ids[goal_loc[1], goal_loc[0]]]
+
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        height, width = rng.integers(5, 80, size=2)
+        passable = rng.random((height, width)) > rng.uniform(0.05, 0.35)
+        free = np.argwhere(passable)
+        if len(free) < 2:
+            continue
+        yield passable, tuple(free[rng.integers(len(free))][::-1]), tuple(free[rng.integers(len(free))][::-1])
+
+
+def test_optimal_without_cutting_corners():
+    for passable, robot_loc, goal_loc in random_grids(300):
+        result = jump_point_search(passable, robot_loc, goal_loc)
+        expected = no_corner_cutting_cost(passable, robot_loc, goal_loc)
+        assert result.reached == (expected != np.inf)
+        path = result.path
+        assert tuple(path[0]) == robot_loc
+        steps = np.diff(path, axis=0)
+        assert np.all(np.abs(steps) <= 1)
+        assert passable[path[:, 1], path[:, 0]].all()
+        # Diagonal steps don't squeeze between two blocked pixels
+        diagonal = np.all(steps != 0, axis=1)
+        assert passable[path[:-1][diagonal, 1], path[1:][diagonal, 0]].all()
+        assert passable[path[1:][diagonal, 1], path[:-1][diagonal, 0]].all()
+        if result.reached:
+            assert tuple(path[-1]) == goal_loc
+            assert abs(path_cost(path) - expected) < 1e-4
+            # A* can cut corners, so it is never longer
+            assert path_cost(astar(passable, robot_loc, goal_loc).path) <= path_cost(path) + 1e-4
+
+
+def test_same_as_astar_in_the_open():
+    passable = np.ones((100, 120), dtype=bool)
+    passable[20:80, 60] = False
+    result = jump_point_search(passable, (5, 50), (110, 50))
+    expected = astar(passable, (5, 50), (110, 50))
+    assert result.reached
+    assert abs(path_cost(result.path) - path_cost(expected.path)) < 1e-4
+    # A long open stretch is a handful of jump points, not one expansion per pixel
+    assert result.expansions < expected.expansions
@@ -0,0 +1,105 @@
+# Tests for map_store.MapStore and MapReader: versions, growing, and the lifecycle of the shared memory
+#
+#   python3 -m pytest src/lab3/test
+
+import multiprocessing
+import os
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from map_store import MapReader, MapStore, StaleMap
+
+
+def map_version(value, shape=(20, 30)):
+    data = np.full(shape, value, dtype=np.int8)
+    return data, data == 0
+
+
+def read_in_another_process(name, version):
+    """ Runs in a spawned process: the sums of a version, read out of the store by name"""
+    reader = MapReader(name)
+    try:
+        view = reader.read(version)
+        return int(view.data.sum()), int(view.passable.sum()), view.resolution, view.origin, view.valid()
+    finally:
+        reader.close()
+
+
+@pytest.fixture
+def store():
+    store = MapStore()
+    yield store
+    store.close()
+
+
+def test_write_and_read(store):
+    data, passable = map_version(0)
+    version = store.write(data, passable, 0.05, (-1.0, 2.0))
+    view = MapReader(store.name).read()
+    assert view.version == version == store.version == 1
+    assert np.array_equal(view.data, data)
+    assert np.array_equal(view.passable, passable)
+    assert (view.resolution, view.origin) == (0.05, (-1.0, 2.0))
+    assert view.valid()
+    view.reader.close()
+
+
+def test_two_versions_at_a_time(store):
+    reader = MapReader(store.name)
+    with pytest.raises(StaleMap):
+        reader.read()
+    first = store.write(*map_version(1), 0.05, (0.0, 0.0))
+    old = reader.read(first)
+    second = store.write(*map_version(2), 0.05, (0.0, 0.0))
+    # The one before is still there, in the other slot
+    assert reader.read(first).data[0, 0] == 1
+    assert reader.read(second).data[0, 0] == 2
+    assert old.valid()
+
+    # Two versions on, the slot has been written over
+    store.write(*map_version(3), 0.05, (0.0, 0.0))
+    assert not old.valid()
+    with pytest.raises(StaleMap):
+        reader.read(first)
+    reader.close()
+
+
+def test_growing_keeps_old_views_good(store):
+    reader = MapReader(store.name)
+    store.write(*map_version(1), 0.05, (0.0, 0.0))
+    small = reader.read()
+    store.write(*map_version(2), 0.05, (0.0, 0.0))
+    # Much bigger than the room the first slot has, so it moves to a new segment
+    version = store.write(*map_version(3, (200, 300)), 0.05, (0.0, 0.0))
+    big = reader.read(version)
+    assert big.data.shape == (200, 300)
+    assert (big.data == 3).all()
+    # The old segment is unlinked but stays mapped for the views into it
+    assert (small.data == 1).all()
+    del small, big
+    reader.close()
+
+
+def test_read_from_another_process(store):
+    version = store.write(*map_version(0), 0.05, (1.5, -2.5))
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        data_sum, passable_sum, resolution, origin, valid = pool.apply(read_in_another_process,
+                                                                       (store.name, version))
+    assert (data_sum, passable_sum) == (0, 20 * 30)
+    assert (resolution, origin, valid) == (0.05, (1.5, -2.5), True)
+
+
+def test_close_removes_the_shared_memory():
+    store = MapStore()
+    store.write(*map_version(0), 0.05, (0.0, 0.0))
+    store.write(*map_version(0), 0.05, (0.0, 0.0))
+    name = store.name
+    store.close()
+    for segment in (name, f"{name}_0_1", f"{name}_1_1"):
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=segment)
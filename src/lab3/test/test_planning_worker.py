@@ -0,0 +1,91 @@
+# Tests for planning_worker.PlanningWorker
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from planning_worker import PlanningWorker
+
+
+class Gate:
+    """ A handler that records its arguments, and can be held on a job until it is let go"""
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, *args):
+        self.started.set()
+        self.release.wait(5.0)
+        self.calls.append(args)
+
+
+def wait_for(worker, processed, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while worker.processed < processed:
+        assert time.monotonic() < deadline, "the worker didn't get through its jobs"
+        time.sleep(0.005)
+
+
+def test_newest_job_wins():
+    gate = Gate()
+    worker = PlanningWorker(gate)
+    assert not worker.submit(1)
+    assert gate.started.wait(5.0)
+    # Busy with the first one, each newer job replaces the one waiting
+    assert not worker.submit(2)
+    assert worker.submit(3)
+    assert worker.submit(4, "pose")
+    gate.release.set()
+    wait_for(worker, 2)
+    worker.close()
+    assert gate.calls == [(1,), (4, "pose")]
+    assert worker.stats()["submitted"] == 4
+    assert (worker.processed, worker.dropped, worker.errors) == (2, 2, 0)
+    assert worker.max_delay >= worker.mean_delay >= 0.0
+
+
+def test_errors_are_counted_and_the_worker_keeps_going():
+    calls = []
+
+    def handler(value):
+        calls.append(value)
+        if value == "bad":
+            raise ValueError(value)
+
+    worker = PlanningWorker(handler)
+    worker.submit("bad")
+    wait_for(worker, 1)
+    worker.submit("good")
+    wait_for(worker, 2)
+    worker.close()
+    assert calls == ["bad", "good"]
+    assert worker.errors == 1
+
+
+def test_close_drops_the_waiting_job_and_stops():
+    gate = Gate()
+    worker = PlanningWorker(gate)
+    worker.submit(1)
+    assert gate.started.wait(5.0)
+    worker.submit(2)
+    closing = threading.Thread(target=worker.close)
+    closing.start()
+    # Let the job go once close has dropped the waiting one, or it could be picked up first
+    deadline = time.monotonic() + 5.0
+    while worker.dropped < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    gate.release.set()
+    closing.join(5.0)
+    assert not closing.is_alive()
+    # The job it was on finishes, the one waiting doesn't run
+    assert gate.calls == [(1,)]
+    assert (worker.processed, worker.dropped) == (1, 1)
+    with pytest.raises(RuntimeError):
+        worker.submit(3)
@@ -0,0 +1,81 @@
+# Tests for snapshots.SnapshotWriter, and the snapshots planning_core.plan takes of unreachable goals
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import snapshots
+from ara_star import ARAStar
+from planning_core import plan, set_snapshot_writer
+from snapshots import SnapshotWriter
+
+
+def test_written_in_the_background(tmp_path):
+    writer = SnapshotWriter(str(tmp_path / "snapshots"), min_interval=0.0)
+    assert writer.submit("unreachable", im=np.arange(6).reshape(2, 3), resolution=0.05)
+    writer.flush()
+    assert writer.written == 1
+    with np.load(writer.last_path) as saved:
+        assert np.array_equal(saved["im"], np.arange(6).reshape(2, 3))
+        assert float(saved["resolution"]) == 0.05
+    assert os.path.basename(writer.last_path).startswith("unreachable_")
+    writer.close()
+
+
+def test_rate_limited(tmp_path):
+    writer = SnapshotWriter(str(tmp_path), min_interval=60.0)
+    assert writer.submit("unreachable", a=np.zeros(3))
+    assert not writer.submit("unreachable", a=np.zeros(3))
+    writer.close()
+    assert (writer.written, writer.rate_limited) == (1, 1)
+
+
+def test_dropped_when_the_queue_is_full(tmp_path, monkeypatch):
+    # Hold the writer thread on the first snapshot, so the rest pile up
+    started = threading.Event()
+    release = threading.Event()
+    savez = np.savez_compressed
+
+    def slow_savez(*args, **kwargs):
+        started.set()
+        release.wait(5.0)
+        savez(*args, **kwargs)
+
+    monkeypatch.setattr(snapshots.np, "savez_compressed", slow_savez)
+    writer = SnapshotWriter(str(tmp_path), min_interval=0.0, max_queue=1)
+    assert writer.submit("unreachable", a=np.zeros(3))
+    assert started.wait(5.0)
+    assert writer.submit("unreachable", a=np.zeros(3))
+    assert not writer.submit("unreachable", a=np.zeros(3))
+    release.set()
+    writer.close()
+    assert (writer.written, writer.queue_full) == (2, 1)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_plan_snapshots_unreachable_goals_only(tmp_path):
+    im = np.full((60, 60), 255, dtype=np.uint8)
+    im[:, 30] = 0
+    writer = SnapshotWriter(str(tmp_path), min_interval=0.0)
+    set_snapshot_writer(writer)
+    try:
+        assert plan(im, (10, 30), (20, 30), 0.05, (0.0, 0.0)).reached
+        # Running out of time says nothing about whether the goal can be reached
+        assert plan(im, (10, 30), (50, 30), 0.05, (0.0, 0.0), planner=ARAStar(budget=1e-6)).timed_out
+        writer.flush()
+        assert writer.written == 0
+
+        assert not plan(im, (10, 30), (50, 30), 0.05, (0.0, 0.0)).reached
+        writer.flush()
+    finally:
+        set_snapshot_writer(None)
+        writer.close()
+    assert writer.written == 1
+    with np.load(writer.last_path) as saved:
+        assert tuple(saved["goal"]) == (50, 30)
+        assert saved["visited"].shape == im.shape
@@ -0,0 +1,57 @@
+# Tests for theta_star, against grid_search.astar on the same grids
+#
+#   python3 -m pytest src/lab3/test
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from grid_search import astar
+from theta_star import lazy_theta_star, path_clear, shortcut
+
+
+def path_cost(path):
+    steps = np.diff(np.asarray(path, dtype=float), axis=0)
+    return float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        height, width = rng.integers(5, 100, size=2)
+        passable = rng.random((height, width)) > rng.uniform(0.05, 0.4)
+        free = np.argwhere(passable)
+        if len(free) < 2:
+            continue
+        yield passable, tuple(free[rng.integers(len(free))][::-1]), tuple(free[rng.integers(len(free))][::-1])
+
+
+def test_never_longer_than_astar():
+    for passable, robot_loc, goal_loc in random_grids(500):
+        result = lazy_theta_star(passable, robot_loc, goal_loc)
+        expected = astar(passable, robot_loc, goal_loc)
+        assert result.reached == expected.reached
+        assert tuple(result.path[0]) == robot_loc
+        assert path_clear(passable, result.path)
+        if expected.reached:
+            assert tuple(result.path[-1]) == goal_loc
+            assert path_cost(result.path) <= path_cost(expected.path) + 1e-9
+
+
+def test_straight_line_in_the_open():
+    passable = np.ones((50, 50), dtype=bool)
+    result = lazy_theta_star(passable, (2, 3), (40, 30))
+    assert result.reached
+    assert [tuple(point) for point in result.path] == [(2, 3), (40, 30)]
+
+
+def test_shortcut_keeps_the_ends_and_never_gets_longer():
+    for passable, robot_loc, goal_loc in random_grids(200, seed=1):
+        path = astar(passable, robot_loc, goal_loc).path
+        corners = shortcut(passable, path)
+        assert tuple(corners[0]) == tuple(path[0])
+        assert tuple(corners[-1]) == tuple(path[-1])
+        assert path_clear(passable, corners)
+        assert path_cost(corners) <= path_cost(path) + 1e-9